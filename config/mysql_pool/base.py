@@ -0,0 +1,112 @@
+"""Backend MySQL (PyMySQL) avec pool de connexions par processus.
+
+Pour le mode ASGI : Django y ferme la connexion a chaque requete
+(CONN_MAX_AGE doit rester a 0), ``close()`` rend alors la connexion au pool
+au lieu de la fermer, et la requete suivante la reprend apres un ping.
+
+Active par ``DB_POOL_SIZE`` > 0 (voir config/settings_base.py) ; reglages
+lus dans DATABASES["default"] : POOL_SIZE (connexions inactives conservees)
+et POOL_RECYCLE (age maximum d'une connexion, en secondes).
+"""
+
+import queue
+import threading
+import time
+
+from django.db.backends.mysql import base
+from django.utils.asyncio import async_unsafe
+
+Database = base.Database
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+class ConnectionPool:
+    def __init__(self, size, recycle):
+        self.size = size
+        self.recycle = recycle
+        self._idle = queue.LifoQueue(maxsize=size)
+        self._created = {}
+
+    def acquire(self, connect):
+        """Connexion inactive encore valide, sinon nouvelle connexion."""
+        while True:
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                conn = connect()
+                self._created[id(conn)] = time.monotonic()
+                return conn
+            if time.monotonic() - self._created.get(id(conn), 0) > self.recycle:
+                self.discard(conn)
+                continue
+            try:
+                conn.ping(reconnect=False)
+            except Database.Error:
+                self.discard(conn)
+                continue
+            return conn
+
+    def release(self, conn):
+        """Remet la connexion dans le pool (transaction annulee), ou la ferme si plein."""
+        try:
+            conn.rollback()
+            conn.autocommit(True)
+        except Database.Error:
+            self.discard(conn)
+            return
+        try:
+            self._idle.put_nowait(conn)
+        except queue.Full:
+            self.discard(conn)
+
+    def discard(self, conn):
+        self._created.pop(id(conn), None)
+        try:
+            conn.close()
+        except Database.Error:
+            pass
+
+    def clear(self):
+        while True:
+            try:
+                self.discard(self._idle.get_nowait())
+            except queue.Empty:
+                return
+
+    def idle_count(self):
+        return self._idle.qsize()
+
+
+def get_pool(alias, settings_dict):
+    with _pools_lock:
+        pool = _pools.get(alias)
+        if pool is None:
+            pool = _pools[alias] = ConnectionPool(
+                size=int(settings_dict.get("POOL_SIZE") or 10),
+                recycle=int(settings_dict.get("POOL_RECYCLE") or 3600),
+            )
+        return pool
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    @property
+    def pool(self):
+        return get_pool(self.alias, self.settings_dict)
+
+    @async_unsafe
+    def get_new_connection(self, conn_params):
+        parent = super().get_new_connection
+        return self.pool.acquire(lambda: parent(conn_params))
+
+    def _close(self):
+        if self.connection is None:
+            return
+        if self.in_atomic_block:
+            # Etat de transaction incertain : on ne la reutilise pas
+            with self.wrap_database_errors:
+                self.pool.discard(self.connection)
+            return
+        with self.wrap_database_errors:
+            self.pool.release(self.connection)
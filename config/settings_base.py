@@ -30,6 +30,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    "core.middleware.PerfMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
@@ -63,6 +64,10 @@ DATABASES = {
         "PASSWORD": os.getenv("MYSQL_PASSWORD", "luxora_password"),
         "HOST": os.getenv("MYSQL_HOST", "mysql"),
         "PORT": os.getenv("MYSQL_PORT", "3306"),
+        # Connexions persistantes (secondes, 0 = une connexion par requete),
+        # verifiees avant reutilisation ; reglable par app dans docker-compose.
+        "CONN_MAX_AGE": int(os.getenv("DB_CONN_MAX_AGE", "60")),
+        "CONN_HEALTH_CHECKS": os.getenv("DB_CONN_HEALTH_CHECKS", "1") in {"1", "true", "True"},
         "OPTIONS": {
             "charset": "utf8mb4",
             "init_command": "SET sql_mode='STRICT_TRANS_TABLES'",
@@ -70,6 +75,16 @@ DATABASES = {
     }
 }
 
+# Pool de connexions (mode ASGI, ou Django ferme la connexion a chaque requete).
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "0"))
+if DB_POOL_SIZE:
+    DATABASES["default"].update(
+        ENGINE="config.mysql_pool",
+        CONN_MAX_AGE=0,
+        POOL_SIZE=DB_POOL_SIZE,
+        POOL_RECYCLE=int(os.getenv("DB_POOL_RECYCLE", "3600")),
+    )
+
 AUTH_PASSWORD_VALIDATORS = [
     {"NAME": "django.contrib.auth.password_validation.UserAttributeSimilarityValidator"},
     {"NAME": "django.contrib.auth.password_validation.MinimumLengthValidator"},
@@ -86,7 +101,94 @@ STATIC_URL = "static/"
 STATICFILES_DIRS = [BASE_DIR / "static"]
 STATIC_ROOT = BASE_DIR / "staticfiles"
 
+# collectstatic : bundles minifies, noms hashes, variantes .gz/.br (core.static_pipeline)
+STORAGES = {
+    "default": {"BACKEND": "django.core.files.storage.FileSystemStorage"},
+    "staticfiles": {"BACKEND": "core.static_pipeline.BundledManifestStaticFilesStorage"},
+    # Documents vehicules et pieces jointes de contact, dedupliques par SHA-256
+    "blobs": {"BACKEND": "core.storage.ContentAddressedStorage"},
+}
+STATIC_BUNDLES = {
+    "css/site.bundle.css": ["css/main.css", "css/animations.css"],
+    "css/cms.bundle.css": ["css/main.css", "css/cms.css"],
+    "js/site.bundle.js": ["js/main.js"],
+}
+# /static/ et /media/ sont servis par l'app (core.serving) ; 0 derriere un CDN / nginx
+STATIC_SERVE = os.getenv("DJANGO_STATIC_SERVE", "1") in {"1", "true", "True"}
+STATIC_UNHASHED_MAX_AGE = int(os.getenv("STATIC_UNHASHED_MAX_AGE", "3600"))
+
 MEDIA_URL = "media/"
 MEDIA_ROOT = BASE_DIR / "media"
+MEDIA_SERVE = os.getenv("DJANGO_MEDIA_SERVE", "1") in {"1", "true", "True"}
+MEDIA_CACHE_CONTROL = os.getenv("MEDIA_CACHE_CONTROL", "public, max-age=3600")
+
+# Envoi des fichiers delegue au proxy frontal : "" (Python, sendfile sous gunicorn),
+# "x-accel-redirect" (nginx, location interne FILE_OFFLOAD_PREFIX{static,media}/)
+# ou "x-sendfile" (Apache mod_xsendfile, lighttpd).
+FILE_OFFLOAD = os.getenv("FILE_OFFLOAD", "").lower()
+FILE_OFFLOAD_PREFIX = os.getenv("FILE_OFFLOAD_PREFIX", "/_protected/")
+
+# Declinaisons des images uploadees (core.images) : largeurs du srcset et
+# format (AVIF si Pillow le supporte, sinon WEBP, sinon JPEG).
+IMAGE_DERIVATIVE_WIDTHS = (320, 640, 960, 1280, 1920)
+IMAGE_DERIVATIVE_FORMAT = os.getenv("IMAGE_DERIVATIVE_FORMAT", "WEBP")
+
+# Copie locale des images externes (core.mirror).
+MIRROR_FETCH_TIMEOUT = float(os.getenv("MIRROR_FETCH_TIMEOUT", "10"))
+MIRROR_MAX_BYTES = int(os.getenv("MIRROR_MAX_BYTES", str(15 * 1024 * 1024)))
+MIRROR_WORKERS = int(os.getenv("MIRROR_WORKERS", "8"))
+MIRROR_MAX_ATTEMPTS = int(os.getenv("MIRROR_MAX_ATTEMPTS", "3"))
+
+# File de taches en base (core.jobs), traitee par `manage.py run_jobs`.
+# JOBS_EAGER=1 : execution immediate apres commit, sans worker (dev).
+JOBS_EAGER = os.getenv("JOBS_EAGER", "0") in {"1", "true", "True"}
+JOBS_VISIBILITY_TIMEOUT = int(os.getenv("JOBS_VISIBILITY_TIMEOUT", "300"))
+JOBS_MAX_ATTEMPTS = int(os.getenv("JOBS_MAX_ATTEMPTS", "5"))
+JOBS_RETRY_DELAY = int(os.getenv("JOBS_RETRY_DELAY", "10"))
+JOBS_KEEP_DONE_DAYS = int(os.getenv("JOBS_KEEP_DONE_DAYS", "7"))
+
+# Analyse antivirus des fichiers dedupliques (core.scanning) : "" (desactivee),
+# "core.scanning.clamd_scan" ou le chemin d'une fonction scanner(chemin) -> signature | None.
+UPLOAD_SCANNER = os.getenv("UPLOAD_SCANNER", "")
+CLAMD_HOST = os.getenv("CLAMD_HOST", "127.0.0.1")
+CLAMD_PORT = int(os.getenv("CLAMD_PORT", "3310"))
+
+# Demandes de contact : adresses prevenues de chaque nouvelle demande (tache
+# "contact.notify" de core.jobs), separees par des virgules ; vide = aucun e-mail.
+CONTACT_NOTIFY_EMAILS = [a.strip() for a in os.getenv("CONTACT_NOTIFY_EMAILS", "").split(",") if a.strip()]
+EMAIL_HOST = os.getenv("EMAIL_HOST", "localhost")
+EMAIL_PORT = int(os.getenv("EMAIL_PORT", "25"))
+EMAIL_HOST_USER = os.getenv("EMAIL_HOST_USER", "")
+EMAIL_HOST_PASSWORD = os.getenv("EMAIL_HOST_PASSWORD", "")
+EMAIL_USE_TLS = os.getenv("EMAIL_USE_TLS", "0") in {"1", "true", "True"}
+DEFAULT_FROM_EMAIL = os.getenv("DEFAULT_FROM_EMAIL", "Luxora Motors <noreply@luxora-motors.fr>")
 
 DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
+
+# Liste publique : taille de page (pagination par curseur) et durees de cache du
+# total et des fragments HTML (invalides de toute facon a chaque modification).
+CATALOGUE_PAGE_SIZE = int(os.getenv("CATALOGUE_PAGE_SIZE", "24"))
+CATALOGUE_COUNT_CACHE_TTL = int(os.getenv("CATALOGUE_COUNT_CACHE_TTL", "600"))
+CATALOGUE_PARTIAL_CACHE_TTL = int(os.getenv("CATALOGUE_PARTIAL_CACHE_TTL", "600"))
+# Delai max (s) avant qu'un processus voie une nouvelle version du catalogue
+# ecrite par un autre (core.catalogue) ; 0 = lecture en base a chaque requete.
+CATALOGUE_VERSION_TTL = float(os.getenv("CATALOGUE_VERSION_TTL", "1"))
+
+# Mesures par requete (core.perf) : en-tete Server-Timing, journal des requetes
+# lentes, percentiles par vue sur /_perf/ (liste blanche Tailscale).
+PERF_ENABLED = os.getenv("PERF_ENABLED", "1") in {"1", "true", "True"}
+PERF_SERVER_TIMING = os.getenv("PERF_SERVER_TIMING", "1") in {"1", "true", "True"}
+PERF_SLOW_REQUEST_MS = float(os.getenv("PERF_SLOW_REQUEST_MS", "500"))
+PERF_SAMPLES = int(os.getenv("PERF_SAMPLES", "1000"))
+
+# Recherche plein texte (core.search)
+SEARCH_RESULTS_LIMIT = int(os.getenv("SEARCH_RESULTS_LIMIT", "60"))
+SEARCH_SUGGESTIONS_LIMIT = int(os.getenv("SEARCH_SUGGESTIONS_LIMIT", "8"))
+SEARCH_QUERY_MAX_LENGTH = 200
+
+# Fiche vehicule : Cache-Control pour le navigateur (max-age) et un reverse
+# proxy devant app-user (s-maxage). Revalidation par ETag : dates du vehicule,
+# version du catalogue et deploiement (RELEASE_ID + hash du manifest des static).
+RELEASE_ID = os.getenv("RELEASE_ID", "")
+VEHICULE_DETAIL_MAX_AGE = int(os.getenv("VEHICULE_DETAIL_MAX_AGE", "60"))
+VEHICULE_DETAIL_SHARED_MAX_AGE = int(os.getenv("VEHICULE_DETAIL_SHARED_MAX_AGE", "300"))
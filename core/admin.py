@@ -1,6 +1,18 @@
 from django.contrib import admin
 from django.contrib.admin import ModelAdmin, TabularInline
-from .models import Vehicule, ImageVehicule, OptionVehicule, RendezVous, RendezVousFichier
+from django.utils import timezone
+
+from . import search
+from .models import (
+    ImageDistante,
+    ImageVehicule,
+    Job,
+    OptionVehicule,
+    RendezVous,
+    RendezVousFichier,
+    StoredBlob,
+    Vehicule,
+)
 
 
 class OptionVehiculeInline(TabularInline):
@@ -20,6 +32,13 @@ class VehiculeAdmin(ModelAdmin):
     search_fields = ("titre", "modele", "marque")
     inlines = [OptionVehiculeInline, ImageVehiculeInline]
 
+    def get_search_results(self, request, queryset, search_term):
+        """Index plein texte (core.search) plutot que des LIKE '%…%' sur chaque champ ;
+        tous les resultats, tries et pagines par la liste de l'admin."""
+        if not search.tokenize(search_term):
+            return super().get_search_results(request, queryset, search_term)
+        return queryset.filter(pk__in=search.matching_ids(search_term)), False
+
 
 @admin.register(OptionVehicule)
 class OptionVehiculeAdmin(ModelAdmin):
@@ -31,6 +50,14 @@ class ImageVehiculeAdmin(ModelAdmin):
     list_display = ("vehicule", "ordre", "legende")
 
 
+@admin.register(ImageDistante)
+class ImageDistanteAdmin(ModelAdmin):
+    list_display = ("url", "statut", "tentatives", "fetched_at")
+    list_filter = ("statut",)
+    search_fields = ("url",)
+    readonly_fields = ("url_hash", "fichier", "fetched_at", "created_at")
+
+
 class RendezVousFichierInline(TabularInline):
     model = RendezVousFichier
     extra = 0
@@ -44,3 +71,28 @@ class RendezVousAdmin(ModelAdmin):
     search_fields = ("nom", "prenom", "email")
     readonly_fields = ("created_at",)
     inlines = [RendezVousFichierInline]
+
+
+@admin.register(StoredBlob)
+class StoredBlobAdmin(ModelAdmin):
+    list_display = ("chemin", "taille", "references", "analyse", "created_at")
+    list_filter = ("analyse",)
+    search_fields = ("chemin", "sha256")
+    readonly_fields = (
+        "chemin", "sha256", "taille", "references", "analyse", "analyse_detail", "analyse_le", "created_at"
+    )
+
+
+@admin.register(Job)
+class JobAdmin(ModelAdmin):
+    list_display = ("nom", "statut", "tentatives", "disponible_le", "worker", "termine_le")
+    list_filter = ("statut", "nom")
+    readonly_fields = ("cle", "verrou_expire_le", "worker", "erreur", "created_at", "termine_le")
+    actions = ["relancer"]
+
+    @admin.action(description="Relancer les taches selectionnees")
+    def relancer(self, request, queryset):
+        count = queryset.exclude(statut="en_cours").update(
+            statut="en_attente", tentatives=0, disponible_le=timezone.now(), erreur=""
+        )
+        self.message_user(request, f"{count} tache(s) relancee(s).")
@@ -0,0 +1,320 @@
+"""Banc de mesure des vues chaudes (``manage.py bench_views``).
+
+Chaque scenario (accueil, liste avec differents filtres, fragment AJAX, fiche,
+envoi du formulaire de contact avec pieces jointes, documents d'un vehicule)
+est rejoue dans le processus via le client de test de Django, middlewares
+compris : debit (requetes/s), latences p50 / p95 / p99, requetes SQL par
+requete HTTP. Les resultats sont ecrits en JSON, un fichier par execution,
+et peuvent etre compares a une execution precedente (regressions signalees
+au-dela d'un seuil).
+
+Les tirages (fiches, filtres) dependent d'une graine : deux executions sur le
+meme catalogue rejouent exactement les memes requetes.
+"""
+
+import json
+import os
+import platform
+import random
+import subprocess
+import time
+from dataclasses import dataclass, field
+
+import django
+from django.apps import apps
+from django.conf import settings
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
+from django.test import Client
+from django.urls import NoReverseMatch, reverse
+from django.utils import timezone
+
+from . import synthetic
+from .listing import FACET_BANDS
+from .models import Job, RendezVous, Vehicule
+from .perf import percentile
+
+DEFAULT_SIZES = (100, 10_000, 100_000)
+# Marqueur des demandes de contact creees par le banc (supprimees a la fin)
+CONTACT_EMAIL = "bench@luxora.invalid"
+# Pieces jointes du scenario contact : (nom, taille en octets)
+CONTACT_FILES = (("devis.pdf", 200 * 1024), ("photo.jpg", 800 * 1024))
+
+XHR = {"HTTP_X_REQUESTED_WITH": "XMLHttpRequest"}
+
+
+@dataclass
+class Scenario:
+    name: str
+    url_name: str
+    method: str = "get"
+    # Parametres GET / POST : fonction (tirage aleatoire) -> dict
+    params: object = None
+    # Arguments de l'url : fonction (tirage aleatoire, contexte) -> liste
+    args: object = None
+    headers: dict = field(default_factory=dict)
+    staff: bool = False
+    expected: int = 200
+
+
+def _band(key, rng):
+    """Parametres min / max d'une tranche de facette tiree au hasard."""
+    _, bands = FACET_BANDS[key]
+    _, low, high = rng.choice(bands)
+    params = {}
+    if low is not None:
+        params[f"{key}_min"] = low
+    if high is not None:
+        params[f"{key}_max"] = high
+    return params
+
+
+def _marques(rng, k):
+    return rng.sample([value for value, _ in Vehicule.MARQUES], k)
+
+
+def _contact_post(rng):
+    return {
+        "nom": "Banc",
+        "prenom": "Mesure",
+        "email": CONTACT_EMAIL,
+        "telephone": "0600000000",
+        "raison": rng.choice([value for value, _ in RendezVous.RAISON_CHOICES]),
+        "message": "Demande generee par manage.py bench_views.",
+        "fichiers": [
+            SimpleUploadedFile(name, rng.randbytes(size)) for name, size in CONTACT_FILES
+        ],
+    }
+
+
+SCENARIOS = [
+    Scenario("home", "home"),
+    Scenario("vehicule_list", "vehicule_list"),
+    Scenario("vehicule_list marque", "vehicule_list", params=lambda rng: {"marque": _marques(rng, 1)}),
+    Scenario(
+        "vehicule_list marques+prix",
+        "vehicule_list",
+        params=lambda rng: {"marque": _marques(rng, 2), **_band("prix", rng), "tri": "prix_asc"},
+    ),
+    Scenario(
+        "vehicule_list annee+km",
+        "vehicule_list",
+        params=lambda rng: {**_band("annee", rng), **_band("km", rng), "tri": "km_asc"},
+    ),
+    Scenario(
+        "vehicule_list ajax",
+        "vehicule_list",
+        params=lambda rng: {"ajax": "1", "marque": _marques(rng, 1), "tri": rng.choice(["recent", "prix_desc"])},
+        headers=XHR,
+    ),
+    Scenario("vehicule_detail", "vehicule_detail", args=lambda rng, ctx: [rng.choice(ctx["vehicules"])]),
+    Scenario("contact POST", "contact", method="post", params=_contact_post, expected=302),
+    Scenario(
+        "cms_document_list",
+        "cms_document_list",
+        args=lambda rng, ctx: [rng.choice(ctx["documents"])],
+        staff=True,
+    ),
+]
+
+
+# ---------- catalogue ----------
+
+
+def _documents_installed():
+    return apps.is_installed("documents")
+
+
+def fill(size, seed, progress=None, errors=None):
+    """Complete le catalogue avec des vehicules synthetiques (core.synthetic) jusqu'a
+    ``size`` ; retourne le nombre de vehicules crees.
+
+    ``progress`` et ``errors`` : voir synthetic.generate (sans ``errors``, un lot en
+    echec leve synthetic.BatchError)."""
+    missing = size - Vehicule.objects.count()
+    if missing <= 0:
+        return 0
+    workers = 1 if connection.vendor == "sqlite" else os.cpu_count() or 1
+    # Graine propre a chaque palier : pas de vehicules identiques d'un palier a l'autre
+    totals = synthetic.generate(missing, f"{seed}:{size}", workers=workers, progress=progress, errors=errors)
+    return totals.get("vehicules", 0)
+
+
+# ---------- mesures ----------
+
+
+class _QueryCounter:
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+
+def _context(rng, sample):
+    pks = list(Vehicule.objects.order_by("pk").values_list("pk", flat=True))
+    documents = []
+    if _documents_installed():
+        from documents.models import DocumentVehicule
+
+        documents = list(
+            DocumentVehicule.objects.order_by("vehicule_id").values_list("vehicule_id", flat=True).distinct()[:1000]
+        )
+    return {"vehicules": rng.sample(pks, min(sample, len(pks))), "documents": documents}
+
+
+def _url(scenario, rng, ctx):
+    args = scenario.args(rng, ctx) if scenario.args else None
+    return reverse(scenario.url_name, args=args)
+
+
+def run_scenario(client, scenario, requests, warmup, seed, ctx):
+    """Rejoue ``scenario`` ; retourne ses mesures (dict serialisable)."""
+    for index in range(warmup):
+        rng = random.Random(f"{seed}:{scenario.name}:chauffe:{index}")
+        _request(client, scenario, rng, ctx)
+    latencies, errors, queries = [], 0, 0
+    started = time.perf_counter()
+    for index in range(requests):
+        rng = random.Random(f"{seed}:{scenario.name}:{index}")
+        counter = _QueryCounter()
+        with connection.execute_wrapper(counter):
+            begin = time.perf_counter()
+            status = _request(client, scenario, rng, ctx)
+            latencies.append((time.perf_counter() - begin) * 1000)
+        queries += counter.count
+        if status != scenario.expected:
+            errors += 1
+    elapsed = time.perf_counter() - started
+    latencies.sort()
+    return {
+        "requetes": requests,
+        "req_s": round(requests / elapsed, 1) if elapsed else None,
+        **{f"p{p}_ms": round(percentile(latencies, p), 2) for p in (50, 95, 99)},
+        "max_ms": round(latencies[-1], 2),
+        "sql_par_requete": round(queries / requests, 1),
+        "erreurs": errors,
+    }
+
+
+def _request(client, scenario, rng, ctx):
+    url = _url(scenario, rng, ctx)
+    params = scenario.params(rng) if scenario.params else {}
+    response = getattr(client, scenario.method)(url, params, **scenario.headers)
+    return response.status_code
+
+
+def available(scenario, ctx):
+    """Raison pour laquelle le scenario ne peut pas tourner ici, ou None."""
+    if scenario.args and not ctx["vehicules"]:
+        return "catalogue vide"
+    if scenario.url_name == "cms_document_list" and not ctx["documents"]:
+        return "aucun document"
+    try:
+        _url(scenario, random.Random(0), ctx)
+    except NoReverseMatch:
+        return "vue absente des urls de ce projet"
+    return None
+
+
+def run(scenarios, requests, warmup, seed, host, log=None):
+    """Mesure ``scenarios`` sur le catalogue actuel ; retourne {scenario: mesures}."""
+    from django.contrib.auth import get_user_model
+
+    rng = random.Random(seed)
+    ctx = _context(rng, max(requests, 1))
+    public = Client(HTTP_HOST=host)
+    staff = Client(HTTP_HOST=host)
+    user, created = get_user_model().objects.get_or_create(
+        username="bench", defaults={"is_staff": True, "email": CONTACT_EMAIL}
+    )
+    staff.force_login(user)
+    results = {}
+    try:
+        for scenario in scenarios:
+            reason = available(scenario, ctx)
+            if reason:
+                if log:
+                    log(f"  {scenario.name:28} ignore ({reason})")
+                continue
+            client = staff if scenario.staff else public
+            results[scenario.name] = measures = run_scenario(client, scenario, requests, warmup, seed, ctx)
+            if log:
+                log(
+                    f"  {scenario.name:28} {measures['req_s']:8.1f} req/s  "
+                    f"p50 {measures['p50_ms']:7.1f}  p95 {measures['p95_ms']:7.1f}  "
+                    f"p99 {measures['p99_ms']:7.1f} ms  {measures['sql_par_requete']:5.1f} SQL"
+                    + (f"  {measures['erreurs']} erreur(s)" if measures["erreurs"] else "")
+                )
+    finally:
+        # Demandes de contact du banc (les pieces jointes sont liberees par core.signals)
+        # et leurs notifications encore en file
+        contacts = RendezVous.objects.filter(email=CONTACT_EMAIL)
+        Job.objects.filter(nom="contact.notify", arguments__0__in=list(contacts.values_list("pk", flat=True))).delete()
+        contacts.delete()
+        if created:
+            user.delete()
+    return results
+
+
+# ---------- resultats ----------
+
+
+def _commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, timeout=5, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def metadata(requests, seed, with_cache):
+    return {
+        "date": timezone.now().isoformat(timespec="seconds"),
+        "commit": _commit(),
+        "base": connection.vendor,
+        "django": django.get_version(),
+        "python": platform.python_version(),
+        "projet": settings.ROOT_URLCONF,
+        "cache": with_cache,
+        "requetes": requests,
+        "graine": seed,
+    }
+
+
+def write(path, data):
+    with open(path, "w", encoding="utf-8") as out:
+        json.dump(data, out, indent=2, ensure_ascii=False)
+        out.write("\n")
+
+
+def load(path):
+    with open(path, encoding="utf-8") as stream:
+        return json.load(stream)
+
+
+def compare(previous, current, threshold):
+    """Ecarts entre deux executions : [(taille, scenario, metrique, avant, apres, variation %, regression)].
+
+    Regression : latence p50 / p95 / p99 en hausse ou debit en baisse de plus
+    de ``threshold`` %.
+    """
+    rows = []
+    for size, entry in current["tailles"].items():
+        before = previous.get("tailles", {}).get(size)
+        if before is None:
+            continue
+        for name, measures in entry["scenarios"].items():
+            old = before["scenarios"].get(name)
+            if old is None:
+                continue
+            for metric in ("req_s", "p50_ms", "p95_ms", "p99_ms"):
+                a, b = old.get(metric), measures.get(metric)
+                if not a or b is None:
+                    continue
+                change = (b - a) / a * 100
+                worse = -change if metric == "req_s" else change
+                rows.append((size, name, metric, a, b, change, worse > threshold))
+    return rows
@@ -0,0 +1,79 @@
+"""Version du catalogue partagee entre processus, pour la cle de tous les caches publics.
+
+Chaque ecriture sur un modele du catalogue incremente ``CatalogueVersion``
+en base (voir core.signals). Les processus app-user / app-admin /
+app-documents relisent cette version au plus toutes les
+``CATALOGUE_VERSION_TTL`` secondes et l'incluent dans leurs cles de cache :
+un changement de version rend toutes les entrees precedentes inaccessibles.
+"""
+
+import threading
+import time
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import F
+
+from .models import CatalogueVersion
+
+_local = {"version": None, "read_at": 0.0}
+_lock = threading.Lock()
+
+
+def get_version() -> int:
+    """Version courante (lecture en base memorisee CATALOGUE_VERSION_TTL secondes)."""
+    now = time.monotonic()
+    if _local["version"] is not None and now - _local["read_at"] < settings.CATALOGUE_VERSION_TTL:
+        return _local["version"]
+    version = CatalogueVersion.objects.filter(pk=1).values_list("version", flat=True).first()
+    if version is None:
+        try:
+            version = CatalogueVersion.objects.get_or_create(pk=1)[0].version
+        except IntegrityError:
+            version = CatalogueVersion.objects.get(pk=1).version
+    with _lock:
+        _local["version"] = version
+        _local["read_at"] = now
+    return version
+
+
+def bump_version():
+    """Incremente la version en base et oublie la valeur memorisee localement."""
+    if not CatalogueVersion.objects.filter(pk=1).update(version=F("version") + 1):
+        CatalogueVersion.objects.get_or_create(pk=1)
+        CatalogueVersion.objects.filter(pk=1).update(version=F("version") + 1)
+    with _lock:
+        _local["version"] = None
+
+
+def bump_version_on_commit():
+    """Incremente la version une fois la transaction courante validee (une seule
+    fois par transaction, quel que soit le nombre de lignes enregistrees)."""
+    on_commit_batch("catalogue.bump_version", (), lambda items: bump_version())
+
+
+def on_commit_batch(key, items, flush):
+    """Appelle ``flush(elements)`` une seule fois apres le commit de la transaction
+    courante, avec tous les ``items`` ajoutes sous ``key`` pendant celle-ci.
+
+    Le rappel est retrouve dans la file on_commit de la connexion : un rollback
+    l'efface avec elle. Hors transaction, ``flush`` est appele immediatement.
+    """
+    connection = transaction.get_connection()
+    if connection.in_atomic_block:
+        for _, callback, _ in connection.run_on_commit:
+            if getattr(callback, "batch_key", None) == key:
+                callback.items.update(items)
+                return
+
+    def callback():
+        flush(callback.items)
+
+    callback.batch_key = key
+    callback.items = set(items)
+    transaction.on_commit(callback)
+
+
+def cache_key(*parts) -> str:
+    """Cle de cache prefixee par la version courante du catalogue."""
+    return ":".join(["catalogue", f"v{get_version()}", *map(str, parts)])
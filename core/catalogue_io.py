@@ -0,0 +1,394 @@
+"""Import / export du catalogue en flux (JSON lines ou CSV), pour de gros volumes.
+
+Une ligne = un vehicule, avec ses options et images :
+
+- JSONL : ``{"id": 12, "titre": …, "options": ["Toit ouvrant", …],
+  "images": [{"image_url": …, "legende": …}, …]}`` ;
+- CSV : colonnes du vehicule, ``options`` et ``images`` (URL ou fichier du
+  stockage) separees par `` | ``.
+
+L'import lit le fichier par lots de ``batch_size`` lignes : un lot = une
+transaction, ``bulk_create`` des nouveaux vehicules, ``bulk_update`` des
+existants (cle : ``id``), remplacement en masse des options / images des
+lignes qui les fournissent, cartes (core.read_model) et index de recherche
+(core.search) des lignes modifiees. Les signaux du catalogue sont suspendus pendant l'import ; la
+version (core.catalogue) est incrementee une seule fois a la fin.
+"""
+
+import csv
+import json
+from collections import defaultdict
+from dataclasses import dataclass, field
+
+from django.core.exceptions import ValidationError
+from django.db import DatabaseError, connection, transaction
+from django.db.models import Max, Prefetch
+from django.utils import timezone
+
+from . import catalogue, jobs, mirror, read_model, search, signals
+from .models import ImageVehicule, OptionVehicule, Vehicule
+
+VEHICULE_FIELDS = [
+    "titre",
+    "marque",
+    "modele",
+    "annee",
+    "kilometrage",
+    "prix",
+    "puissance_ch",
+    "moteur",
+    "description",
+    "image_principale",
+    "image_url",
+    "en_vedette",
+    "ordre_affichage",
+]
+CSV_COLUMNS = ["id", *VEHICULE_FIELDS, "options", "images"]
+CSV_LIST_SEPARATOR = " | "
+
+
+class ImportRowError(Exception):
+    pass
+
+
+@dataclass
+class ImportStats:
+    crees: int = 0
+    mis_a_jour: int = 0
+    inchanges: int = 0
+    erreurs: list = field(default_factory=list)
+
+    @property
+    def lignes(self):
+        return self.crees + self.mis_a_jour + self.inchanges
+
+
+# ---------- lecture ----------
+
+
+def read_jsonl(stream):
+    for number, line in enumerate(stream, start=1):
+        line = line.strip()
+        if line:
+            try:
+                yield number, json.loads(line)
+            except ValueError as exc:
+                yield number, ImportRowError(f"JSON invalide : {exc}")
+
+
+def read_csv(stream):
+    for number, row in enumerate(csv.DictReader(stream), start=2):
+        record = {key: value for key, value in row.items() if key and value is not None}
+        for key in ("options", "images"):
+            if key in record:
+                items = [item.strip() for item in record[key].split(CSV_LIST_SEPARATOR.strip())]
+                record[key] = [item for item in items if item]
+        if "images" in record:
+            record["images"] = [
+                {"image_url": item} if "://" in item else {"image": item} for item in record["images"]
+            ]
+        yield number, record
+
+
+def _coerce(record):
+    """(id, {champ: valeur python}) d'un enregistrement brut ; ImportRowError si invalide."""
+    values = {}
+    for name in VEHICULE_FIELDS:
+        if name not in record:
+            continue
+        model_field = Vehicule._meta.get_field(name)
+        raw = record[name]
+        if raw in ("", None) and model_field.null:
+            values[name] = None
+            continue
+        if raw is None:
+            raw = ""
+        try:
+            values[name] = model_field.to_python(raw)
+        except ValidationError as exc:
+            raise ImportRowError(f"{name} : {' '.join(exc.messages)}") from exc
+    pk = record.get("id")
+    if pk in ("", None):
+        pk = None
+    else:
+        try:
+            pk = int(pk)
+        except (TypeError, ValueError) as exc:
+            raise ImportRowError(f"id invalide : {pk!r}") from exc
+    return pk, values
+
+
+def _children(record):
+    options = images = None
+    if "options" in record:
+        options = [str(libelle).strip() for libelle in record["options"] or [] if str(libelle).strip()]
+    if "images" in record:
+        images = []
+        for position, item in enumerate(record["images"] or []):
+            if isinstance(item, str):
+                item = {"image_url": item}
+            images.append(
+                {
+                    "image_url": item.get("image_url") or "",
+                    "image": item.get("image") or "",
+                    "legende": item.get("legende") or "",
+                    "ordre": item.get("ordre", position),
+                }
+            )
+    return options, images
+
+
+# ---------- import ----------
+
+
+# Relecture des cles apres bulk_create (MySQL) : champs fixes a l'insertion
+NATURAL_KEY = ("created_at", "titre", "marque", "modele")
+
+
+def bulk_create_with_keys(model, objects, natural_key, batch_size):
+    """``bulk_create`` de ``objects``, cles primaires comprises (pour y rattacher des lignes).
+
+    MySQL ne renvoie pas les cles apres un ``bulk_create`` : elles sont relues par
+    ``natural_key`` (champs fixes a l'insertion) parmi les lignes au-dela du plus
+    grand id connu avant l'insertion. Pas d'attribution ``Max(pk) + 1`` : une
+    creation concurrente (CMS, autre processus) prendrait la meme cle.
+    """
+    if connection.features.can_return_rows_from_bulk_insert:
+        model.objects.bulk_create(objects, batch_size=batch_size)
+        return
+    pending = [obj for obj in objects if obj.pk is None]
+    last = model.objects.aggregate(m=Max("pk"))["m"] or 0
+    model.objects.bulk_create(objects, batch_size=batch_size)
+    if not pending:
+        return
+    created = defaultdict(list)
+    rows = (
+        model.objects.filter(pk__gt=last)
+        .exclude(pk__in=[obj.pk for obj in objects if obj.pk is not None])
+        .order_by("pk")
+        .values_list("pk", *natural_key)
+    )
+    for pk, *key in rows:
+        created[tuple(key)].append(pk)
+    # Insertion dans l'ordre de la liste : cles croissantes pour des doublons exacts
+    for obj in pending:
+        pks = created.get(tuple(getattr(obj, name) for name in natural_key))
+        if not pks:
+            raise DatabaseError(f"{model._meta.object_name} introuvable apres insertion : {obj}")
+        obj.pk = pks.pop(0)
+
+
+def _existing_children(model, owners, columns):
+    """{vehicule_id: [tuple(colonnes)]} des enfants actuels, dans l'ordre d'affichage."""
+    current = {pk: [] for pk in owners}
+    rows = model.objects.filter(vehicule_id__in=owners).order_by("vehicule_id", "ordre", "pk")
+    for row in rows.values_list("vehicule_id", *columns):
+        current[row[0]].append(tuple("" if value is None else value for value in row[1:]))
+    return current
+
+
+def _replace_children(model, wanted, current, build, batch_size):
+    """Remplace les enfants des vehicules dont la liste a change ; retourne ces vehicules."""
+    changed = [pk for pk, rows in wanted.items() if current.get(pk, []) != rows]
+    if changed:
+        # Signaux suspendus : la date du vehicule (ETag de la fiche) avance ici
+        Vehicule.objects.filter(pk__in=changed).update(updated_at=timezone.now())
+        model.objects.filter(vehicule_id__in=changed).delete()
+        model.objects.bulk_create(
+            [build(pk, row) for pk in changed for row in wanted[pk]], batch_size=batch_size
+        )
+    return changed
+
+
+def _current(obj, name):
+    value = getattr(obj, name)
+    if name == "image_principale":
+        return value.name or None
+    return value
+
+
+def _import_batch(batch, stats, batch_size):
+    ids = [pk for _, pk, _, _, _ in batch if pk is not None]
+    existing = Vehicule.objects.in_bulk(ids) if ids else {}
+    to_create = []
+    to_update = defaultdict(list)  # champs modifies -> vehicules (un bulk_update par groupe)
+    unchanged = []
+    now = timezone.now()
+    children = []  # (vehicule, options, images)
+    lines = {}  # id du fichier -> ligne qui l'a deja utilise dans ce lot
+    for number, pk, values, options, images in batch:
+        if pk in lines:
+            # Un seul bulk_create / bulk_update par id : un doublon annulerait tout le lot
+            stats.erreurs.append((number, f"id {pk} en double (deja ligne {lines[pk]})"))
+            continue
+        obj = existing.get(pk)
+        if obj is None:
+            # id absent de la base : conserve (reimport d'un export), sinon attribue par la base
+            obj = Vehicule(pk=pk, **values)
+            changed = None
+            exclude = []
+        else:
+            # Seuls les champs modifies sont ecrits : une reimportation a
+            # l'identique ne genere aucune mise a jour
+            changed = tuple(sorted(name for name, value in values.items() if _current(obj, name) != value))
+            for name in changed:
+                setattr(obj, name, values[name])
+            exclude = [f for f in VEHICULE_FIELDS if f not in changed]
+        try:
+            obj.clean_fields(exclude=exclude + ["created_at", "updated_at"])
+        except ValidationError as exc:
+            stats.erreurs.append(
+                (number, "; ".join(f"{k} : {' '.join(v)}" for k, v in exc.message_dict.items()))
+            )
+            continue
+        if changed is None:
+            to_create.append(obj)
+        elif changed:
+            obj.updated_at = now  # bulk_update n'applique pas auto_now
+            to_update[changed].append(obj)
+        else:
+            unchanged.append(obj)
+        if pk is not None:
+            lines[pk] = number
+        children.append((obj, options, images))
+
+    with transaction.atomic(), signals.muted():
+        bulk_create_with_keys(Vehicule, to_create, NATURAL_KEY, batch_size)
+        for fields, objects in to_update.items():
+            Vehicule.objects.bulk_update(objects, [*fields, "updated_at"], batch_size=batch_size)
+
+        wanted = {obj.pk: [(libelle[:200], position) for position, libelle in enumerate(options)]
+                  for obj, options, _ in children if options is not None}
+        touched = {obj.pk for obj in to_create}
+        touched.update(obj.pk for objects in to_update.values() for obj in objects)
+        if wanted:
+            current = _existing_children(OptionVehicule, list(wanted), ["libelle", "ordre"])
+            touched.update(_replace_children(
+                OptionVehicule, wanted, current,
+                lambda pk, row: OptionVehicule(vehicule_id=pk, libelle=row[0], ordre=row[1]),
+                batch_size,
+            ))
+        wanted = {obj.pk: [(i["image_url"], i["image"], i["legende"], i["ordre"]) for i in images]
+                  for obj, _, images in children if images is not None}
+        if wanted:
+            current = _existing_children(ImageVehicule, list(wanted), ["image_url", "image", "legende", "ordre"])
+            _replace_children(
+                ImageVehicule, wanted, current,
+                lambda pk, row: ImageVehicule(
+                    vehicule_id=pk, image_url=row[0], image=row[1], legende=row[2], ordre=row[3]
+                ),
+                batch_size,
+            )
+        read_model.refresh(touched)
+        search.reindex(touched)
+    stats.crees += len(to_create)
+    stats.mis_a_jour += sum(len(objects) for objects in to_update.values())
+    stats.inchanges += len(unchanged)
+    return children
+
+
+def _post_import(children):
+    """Ce que les signaux post_save auraient fait : copie des images externes,
+    declinaisons des images deja presentes dans le stockage."""
+    urls, names = set(), set()
+    for vehicule, _, images in children:
+        urls.update(mirror.vehicule_urls(vehicule))
+        if vehicule.image_principale:
+            names.add(vehicule.image_principale.name)
+        for image in images or []:
+            if image["image"]:
+                names.add(image["image"])
+            elif image["image_url"]:
+                urls.add(image["image_url"])
+    mirror.register(urls)
+    for name in sorted(names):
+        jobs.enqueue("images.derivatives", name, unique=True)
+
+
+def import_records(records, batch_size=1000, progress=None):
+    """Importe les enregistrements ``(numero de ligne, dict)`` ; retourne ImportStats."""
+    stats = ImportStats()
+    batch = []
+
+    def flush():
+        children = _import_batch(batch, stats, batch_size)
+        _post_import(children)
+        batch.clear()
+        if progress:
+            progress(stats)
+
+    for number, record in records:
+        try:
+            if isinstance(record, Exception):
+                raise record
+            if not isinstance(record, dict):
+                raise ImportRowError("objet JSON attendu")
+            pk, values = _coerce(record)
+            options, images = _children(record)
+        except ImportRowError as exc:
+            stats.erreurs.append((number, str(exc)))
+            continue
+        batch.append((number, pk, values, options, images))
+        if len(batch) >= batch_size:
+            flush()
+    if batch:
+        flush()
+    if stats.lignes:
+        catalogue.bump_version()
+    return stats
+
+
+# ---------- export ----------
+
+
+def export_queryset(chunk_size=2000):
+    """Vehicules avec options et images, lus par paquets (memoire constante)."""
+    return (
+        Vehicule.objects.order_by("pk")
+        .prefetch_related(
+            Prefetch("options", queryset=OptionVehicule.objects.order_by("ordre", "pk")),
+            Prefetch("images", queryset=ImageVehicule.objects.order_by("ordre", "pk")),
+        )
+        .iterator(chunk_size=chunk_size)
+    )
+
+
+def vehicule_record(vehicule):
+    record = {"id": vehicule.pk}
+    for name in VEHICULE_FIELDS:
+        value = getattr(vehicule, name)
+        if name == "image_principale":
+            value = value.name or ""
+        elif name == "prix":
+            value = int(value)
+        record[name] = value
+    record["options"] = [option.libelle for option in vehicule.options.all()]
+    record["images"] = [
+        {"image_url": image.image_url, "image": image.image.name or "", "legende": image.legende, "ordre": image.ordre}
+        for image in vehicule.images.all()
+    ]
+    return record
+
+
+def write_jsonl(stream, vehicules):
+    count = 0
+    for vehicule in vehicules:
+        stream.write(json.dumps(vehicule_record(vehicule), ensure_ascii=False))
+        stream.write("\n")
+        count += 1
+    return count
+
+
+def write_csv(stream, vehicules):
+    writer = csv.DictWriter(stream, fieldnames=CSV_COLUMNS)
+    writer.writeheader()
+    count = 0
+    for vehicule in vehicules:
+        record = vehicule_record(vehicule)
+        record["options"] = CSV_LIST_SEPARATOR.join(record["options"])
+        # Fichier uploade (nom dans le stockage) sinon URL externe ; legendes : JSONL seulement
+        record["images"] = CSV_LIST_SEPARATOR.join(i["image"] or i["image_url"] for i in record["images"])
+        record["en_vedette"] = int(record["en_vedette"])
+        writer.writerow(record)
+        count += 1
+    return count
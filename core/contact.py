@@ -0,0 +1,148 @@
+"""Demandes de contact : pieces jointes ecrites au fil de la lecture de la
+requete, enregistrement en une transaction, notification en tache de fond.
+
+``AttachmentUploadHandler`` remplace les gestionnaires d'upload de Django
+pour la page contact : chaque morceau recu est ecrit dans le repertoire
+temporaire du stockage dedoublonne (core.storage) et ajoute au SHA-256, sans
+copie en memoire ni second passage. Au-dela des limites du formulaire
+(nombre, type, taille), les octets sont seulement comptes : le formulaire
+refuse ensuite la demande avec son message habituel.
+
+``save_request`` cree la demande et ses pieces jointes (``adopt`` des
+fichiers temporaires, ``bulk_create``) dans une seule transaction ; la
+notification de l'equipe (tache ``contact.notify``) part apres commit.
+"""
+
+import hashlib
+import logging
+import os
+
+from django.conf import settings
+from django.core.files.uploadedfile import UploadedFile
+from django.core.files.uploadhandler import FileUploadHandler
+from django.core.mail import send_mail
+from django.db import transaction
+
+from . import jobs
+from .forms import CONTACT_ALLOWED_EXTENSIONS, CONTACT_MAX_FILE_SIZE, CONTACT_MAX_FILES
+from .models import RendezVous, RendezVousFichier
+from .storage import blob_storage
+
+logger = logging.getLogger(__name__)
+
+
+class StreamedAttachment(UploadedFile):
+    """Piece jointe deja ecrite sur disque (``path``, None si non conservee)."""
+
+    def __init__(self, path, name, content_type, size, sha256, charset=None, content_type_extra=None):
+        super().__init__(None, name, content_type, size, charset, content_type_extra)
+        self.path = path
+        self.sha256 = sha256
+
+    @property
+    def extension(self):
+        return os.path.splitext(self.name or "")[1].lower()
+
+    def close(self):
+        # Fin de requete (HttpRequest.close) : fichier temporaire non adopte
+        if self.path and os.path.exists(self.path):
+            os.unlink(self.path)
+        self.path = None
+
+
+class AttachmentUploadHandler(FileUploadHandler):
+    """Ecrit les pieces jointes acceptables au fur et a mesure de leur reception."""
+
+    def __init__(self, request=None):
+        super().__init__(request)
+        self.count = 0
+        self.out = None
+
+    def new_file(self, field_name, file_name, content_type, content_length, charset=None, content_type_extra=None):
+        super().new_file(field_name, file_name, content_type, content_length, charset, content_type_extra)
+        self.count += 1
+        self.size = 0
+        self.digest = hashlib.sha256()
+        self.path = None
+        ext = os.path.splitext(self.file_name or "")[1].lower()
+        if self.count <= CONTACT_MAX_FILES and ext in CONTACT_ALLOWED_EXTENSIONS:
+            fd, self.path = blob_storage().temporary_file()
+            self.out = os.fdopen(fd, "wb")
+
+    def receive_data_chunk(self, raw_data, start):
+        self.size += len(raw_data)
+        if self.out is not None:
+            if self.size > CONTACT_MAX_FILE_SIZE:
+                # Trop volumineux : la suite est seulement comptee
+                self._discard()
+            else:
+                self.digest.update(raw_data)
+                self.out.write(raw_data)
+        return None
+
+    def file_complete(self, file_size):
+        if self.out is not None:
+            self.out.close()
+            self.out = None
+        return StreamedAttachment(
+            self.path,
+            self.file_name,
+            self.content_type,
+            self.size,
+            self.digest.hexdigest() if self.path else "",
+            self.charset,
+            self.content_type_extra,
+        )
+
+    def upload_interrupted(self):
+        self._discard()
+
+    def _discard(self):
+        if self.out is not None:
+            self.out.close()
+            self.out = None
+        if self.path:
+            os.unlink(self.path)
+            self.path = None
+
+
+def save_request(form, attachments):
+    """Enregistre la demande validee ``form`` et ses pieces jointes ; retourne le RendezVous."""
+    storage = blob_storage()
+    kept = [f for f in attachments if f.path][:CONTACT_MAX_FILES]
+    with transaction.atomic():
+        rdv = form.save()
+        names = []
+        for attachment in kept:
+            names.append(storage.adopt(attachment.path, sha256=attachment.sha256, ext=attachment.extension))
+            attachment.path = None
+        RendezVousFichier.objects.bulk_create(
+            RendezVousFichier(rendez_vous=rdv, fichier=name) for name in names
+        )
+        jobs.enqueue("contact.notify", rdv.pk)
+    return rdv
+
+
+def notify_staff(pk):
+    """E-mail a CONTACT_NOTIFY_EMAILS pour la demande ``pk``."""
+    rdv = RendezVous.objects.filter(pk=pk).first()
+    if rdv is None:
+        return
+    if not settings.CONTACT_NOTIFY_EMAILS:
+        logger.info("Nouvelle demande de contact #%s (CONTACT_NOTIFY_EMAILS vide, pas d'e-mail)", pk)
+        return
+    fichiers = rdv.fichiers.count()
+    lines = [
+        f"{rdv.prenom} {rdv.nom} — {rdv.get_raison_display()}",
+        f"E-mail : {rdv.email}",
+        f"Téléphone : {rdv.telephone}",
+        f"Pièces jointes : {fichiers}",
+        "",
+        rdv.message or "(pas de message)",
+    ]
+    send_mail(
+        f"Nouvelle demande de rendez-vous : {rdv.prenom} {rdv.nom}",
+        "\n".join(lines),
+        None,
+        settings.CONTACT_NOTIFY_EMAILS,
+    )
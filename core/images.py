@@ -0,0 +1,109 @@
+"""Declinaisons redimensionnees (srcset) des images uploadees, generees avec Pillow.
+
+Pour ``vehicules/abc123.jpg`` on stocke a cote de l'original
+``vehicules/abc123__w320.webp``, ``vehicules/abc123__w640.webp``… (une par
+largeur de IMAGE_DERIVATIVE_WIDTHS inferieure a celle de l'original).
+"""
+
+import logging
+import os
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from PIL import Image, ImageOps, UnidentifiedImageError, features
+
+logger = logging.getLogger(__name__)
+
+FORMATS = {
+    # format Pillow : (extension, options d'encodage)
+    "AVIF": ("avif", {"quality": 60}),
+    "WEBP": ("webp", {"quality": 80, "method": 4}),
+    "JPEG": ("jpg", {"quality": 82, "optimize": True, "progressive": True}),
+}
+
+
+def derivative_format():
+    """Format configure s'il est supporte par Pillow, sinon WebP, sinon JPEG."""
+    wanted = getattr(settings, "IMAGE_DERIVATIVE_FORMAT", "WEBP").upper()
+    for fmt in (wanted, "WEBP", "JPEG"):
+        if fmt in FORMATS and (fmt == "JPEG" or features.check(fmt.lower())):
+            return fmt
+    return "JPEG"
+
+
+def derivative_name(name, width, fmt=None):
+    root = os.path.splitext(name)[0]
+    ext = FORMATS[fmt or derivative_format()][0]
+    return f"{root}__w{width}.{ext}"
+
+
+def derivative_widths():
+    return sorted(getattr(settings, "IMAGE_DERIVATIVE_WIDTHS", (320, 640, 960, 1280, 1920)))
+
+
+def _encode(image, width, fmt):
+    height = max(1, round(image.height * width / image.width))
+    resized = image.resize((width, height), Image.LANCZOS)
+    if fmt == "JPEG" and resized.mode != "RGB":
+        resized = resized.convert("RGB")
+    buffer = BytesIO()
+    resized.save(buffer, format=fmt, **FORMATS[fmt][1])
+    return ContentFile(buffer.getvalue())
+
+
+def generate_derivatives(name, storage=None, force=False):
+    """Cree les declinaisons manquantes de ``name`` ; retourne les largeurs generees."""
+    storage = storage or default_storage
+    fmt = derivative_format()
+    widths = derivative_widths()
+    missing = [w for w in widths if force or not storage.exists(derivative_name(name, w, fmt))]
+    if not missing:
+        return []
+    try:
+        with storage.open(name, "rb") as fh:
+            image = Image.open(fh)
+            image = ImageOps.exif_transpose(image)
+            image.load()
+    except (OSError, UnidentifiedImageError):
+        logger.warning("Image illisible, pas de declinaisons : %s", name)
+        return []
+    if image.mode not in ("RGB", "RGBA"):
+        image = image.convert("RGBA" if "A" in image.getbands() else "RGB")
+
+    generated = []
+    for width in missing:
+        if width >= image.width:
+            continue
+        target = derivative_name(name, width, fmt)
+        if storage.exists(target):
+            storage.delete(target)
+        storage.save(target, _encode(image, width, fmt))
+        generated.append(width)
+    return generated
+
+
+def generate_derivatives_in_worker(name, force=False):
+    """Point d'entree pour un pool de processus (initialise Django si besoin)."""
+    import django
+    from django.apps import apps
+
+    if not apps.ready:
+        django.setup()
+    try:
+        return name, generate_derivatives(name, force=force), None
+    except Exception as exc:  # remonte l'erreur au processus parent
+        return name, [], str(exc)
+
+
+def available_derivatives(name, storage=None):
+    """[(largeur, url)] des declinaisons existantes, par largeur croissante."""
+    storage = storage or default_storage
+    fmt = derivative_format()
+    result = []
+    for width in derivative_widths():
+        target = derivative_name(name, width, fmt)
+        if storage.exists(target):
+            result.append((width, storage.url(target)))
+    return result
@@ -0,0 +1,159 @@
+"""File de taches en base de donnees, sans broker externe.
+
+``enqueue()`` insere une ligne ``core.Job`` dans la transaction courante :
+la tache n'est visible des workers qu'apres commit, et disparait avec un
+rollback. ``manage.py run_jobs`` (un ou plusieurs processus) reserve les
+taches par une mise a jour conditionnelle (pas de double execution, quel que
+soit le moteur), avec un delai de visibilite : une tache dont le worker est
+mort redevient disponible a l'expiration du verrou. Echec -> nouvel essai
+avec attente doublee, jusqu'a JOBS_MAX_ATTEMPTS.
+
+Les taches sont des fonctions declarees dans les modules ``<app>/tasks.py`` ::
+
+    @jobs.task("images.derivatives")
+    def derivatives(name): ...
+
+    jobs.enqueue("images.derivatives", name, unique=True)
+"""
+
+import hashlib
+import json
+import logging
+import os
+import socket
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F, Q
+from django.utils import timezone
+from django.utils.module_loading import autodiscover_modules
+
+from .models import Job
+
+logger = logging.getLogger(__name__)
+
+REGISTRY = {}
+# Attente maximale entre deux essais
+MAX_RETRY_DELAY = 3600
+
+
+class Task:
+    def __init__(self, name, func, max_attempts=None, timeout=None):
+        self.name = name
+        self.func = func
+        self.max_attempts = max_attempts or settings.JOBS_MAX_ATTEMPTS
+        self.timeout = timeout or settings.JOBS_VISIBILITY_TIMEOUT
+
+
+def task(name, *, max_attempts=None, timeout=None):
+    """Enregistre une fonction comme tache ``name`` (arguments serialisables en JSON)."""
+
+    def decorator(func):
+        REGISTRY[name] = Task(name, func, max_attempts, timeout)
+        return func
+
+    return decorator
+
+
+def discover():
+    """Importe les modules ``tasks`` des applications installees."""
+    autodiscover_modules("tasks")
+
+
+def _key(args):
+    return hashlib.sha1(json.dumps(args, sort_keys=True, default=str).encode()).hexdigest()
+
+
+def enqueue(name, *args, delay=0, unique=False):
+    """Ajoute une tache ; ``unique`` : ignoree si la meme (nom, arguments) attend deja.
+
+    Avec JOBS_EAGER, la tache s'execute dans le processus courant apres commit.
+    """
+    if settings.JOBS_EAGER:
+        transaction.on_commit(lambda: _run_eager(name, args))
+        return None
+    key = _key(args) if unique else ""
+    if unique and Job.objects.filter(nom=name, cle=key, statut="en_attente").exists():
+        return None
+    return Job.objects.create(
+        nom=name,
+        arguments=list(args),
+        cle=key,
+        disponible_le=timezone.now() + timedelta(seconds=delay),
+    )
+
+
+def _run_eager(name, args):
+    if name not in REGISTRY:
+        discover()
+    try:
+        REGISTRY[name].func(*args)
+    except Exception:
+        logger.exception("Tache %s en echec (JOBS_EAGER)", name)
+
+
+def worker_id():
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def claim(worker, candidates=10):
+    """Reserve la prochaine tache disponible pour ``worker`` ; None si la file est vide."""
+    now = timezone.now()
+    available = Q(statut="en_attente", disponible_le__lte=now) | Q(
+        statut="en_cours", verrou_expire_le__lt=now
+    )
+    for job in Job.objects.filter(available).order_by("disponible_le")[:candidates]:
+        task = REGISTRY.get(job.nom)
+        if job.statut == "en_cours" and job.tentatives >= (task.max_attempts if task else 1):
+            # Worker disparu au dernier essai : abandon
+            Job.objects.filter(pk=job.pk, statut="en_cours", tentatives=job.tentatives).update(
+                statut="echec", erreur="Delai de visibilite depasse.", verrou_expire_le=None
+            )
+            continue
+        timeout = task.timeout if task else settings.JOBS_VISIBILITY_TIMEOUT
+        won = Job.objects.filter(pk=job.pk, statut=job.statut, tentatives=job.tentatives).update(
+            statut="en_cours",
+            tentatives=F("tentatives") + 1,
+            verrou_expire_le=now + timedelta(seconds=timeout),
+            worker=worker,
+        )
+        if won:  # sinon un autre worker l'a prise entre-temps
+            job.refresh_from_db()
+            return job
+    return None
+
+
+def run(job, worker):
+    """Execute une tache reservee ; retourne True si elle a reussi."""
+    mine = Job.objects.filter(pk=job.pk, worker=worker, tentatives=job.tentatives)
+    task = REGISTRY.get(job.nom)
+    try:
+        if task is None:
+            raise LookupError(f"Tache inconnue : {job.nom}")
+        task.func(*job.arguments)
+    except Exception as exc:
+        logger.exception("Tache %s #%s en echec (essai %s)", job.nom, job.pk, job.tentatives)
+        error = f"{type(exc).__name__}: {exc}"[:2000]
+        if task is None or job.tentatives >= task.max_attempts:
+            mine.update(statut="echec", erreur=error, verrou_expire_le=None)
+        else:
+            delay = min(settings.JOBS_RETRY_DELAY * 2 ** (job.tentatives - 1), MAX_RETRY_DELAY)
+            mine.update(
+                statut="en_attente",
+                erreur=error,
+                disponible_le=timezone.now() + timedelta(seconds=delay),
+                verrou_expire_le=None,
+            )
+        return False
+    mine.update(statut="termine", erreur="", termine_le=timezone.now(), verrou_expire_le=None)
+    return True
+
+
+def purge_finished(days=None):
+    """Supprime les taches terminees depuis plus de ``days`` jours (JOBS_KEEP_DONE_DAYS)."""
+    days = settings.JOBS_KEEP_DONE_DAYS if days is None else days
+    deleted, _ = Job.objects.filter(
+        statut="termine", termine_le__lt=timezone.now() - timedelta(days=days)
+    ).delete()
+    return deleted
@@ -0,0 +1,266 @@
+"""Filtres, tri, facettes et pagination par curseur (keyset) de la liste publique des vehicules."""
+
+import base64
+import hashlib
+import json
+from datetime import datetime
+from decimal import Decimal
+from typing import NamedTuple
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, Q
+from django.http import QueryDict
+
+from . import catalogue
+
+# Chaque tri se termine par la cle primaire pour un ordre total (curseur stable).
+SORTS = {
+    "recent": ("-ordre_affichage", "-created_at", "-pk"),
+    "prix_asc": ("prix", "pk"),
+    "prix_desc": ("-prix", "-pk"),
+    "annee_desc": ("-annee", "-pk"),
+    "annee_asc": ("annee", "pk"),
+    "km_asc": ("kilometrage", "pk"),
+}
+DEFAULT_SORT = "recent"
+
+RANGE_FILTERS = (
+    ("annee_min", "annee__gte"),
+    ("annee_max", "annee__lte"),
+    ("prix_min", "prix__gte"),
+    ("prix_max", "prix__lte"),
+    ("km_min", "kilometrage__gte"),
+    ("km_max", "kilometrage__lte"),
+)
+
+# Tranches des facettes : (libelle, min, max), bornes incluses comme les filtres
+# (None : ouverte). La cle d'une tranche est "min-max", reutilisable telle quelle
+# pour remplir les champs du formulaire.
+FACET_BANDS = {
+    "annee": (
+        "annee",
+        (
+            ("Avant 2000", None, 1999),
+            ("2000 – 2009", 2000, 2009),
+            ("2010 – 2014", 2010, 2014),
+            ("2015 – 2019", 2015, 2019),
+            ("2020 et après", 2020, None),
+        ),
+    ),
+    "prix": (
+        "prix",
+        (
+            ("Moins de 100 000 €", None, 99999),
+            ("100 000 – 250 000 €", 100000, 249999),
+            ("250 000 – 500 000 €", 250000, 499999),
+            ("500 000 – 1 000 000 €", 500000, 999999),
+            ("Plus de 1 000 000 €", 1000000, None),
+        ),
+    ),
+    "km": (
+        "kilometrage",
+        (
+            ("Moins de 5 000 km", None, 4999),
+            ("5 000 – 20 000 km", 5000, 19999),
+            ("20 000 – 50 000 km", 20000, 49999),
+            ("50 000 – 100 000 km", 50000, 99999),
+            ("Plus de 100 000 km", 100000, None),
+        ),
+    ),
+}
+
+
+def parse_int(s):
+    """Entier depuis une saisie libre ("250 000", "1,5e3"…), None si invalide."""
+    if not s or not isinstance(s, str):
+        return None
+    s = s.strip().replace(" ", "").replace(",", ".").replace("\u202f", "")
+    if not s:
+        return None
+    try:
+        return int(float(s))
+    except (ValueError, TypeError, OverflowError):
+        return None
+
+
+class ListingFilters(NamedTuple):
+    """Etat normalise des filtres : deux requetes equivalentes ont la meme signature."""
+
+    marques: tuple = ()
+    annee_min: int | None = None
+    annee_max: int | None = None
+    prix_min: int | None = None
+    prix_max: int | None = None
+    km_min: int | None = None
+    km_max: int | None = None
+    tri: str = DEFAULT_SORT
+
+    @classmethod
+    def from_querydict(cls, data):
+        tri = data.get("tri", DEFAULT_SORT)
+        return cls(
+            marques=tuple(sorted(set(data.getlist("marque")))),
+            tri=tri if tri in SORTS else DEFAULT_SORT,
+            **{name: parse_int(data.get(name, "")) for name, _ in RANGE_FILTERS},
+        )
+
+    @property
+    def ordering(self):
+        return SORTS[self.tri]
+
+    def signature(self) -> str:
+        raw = json.dumps(self._asdict(), sort_keys=True)
+        return hashlib.sha1(raw.encode()).hexdigest()
+
+    def urlencode(self, **extra) -> str:
+        """Query string canonique (les valeurs par defaut sont omises)."""
+        params = QueryDict(mutable=True)
+        params.setlist("marque", list(self.marques))
+        for name, _ in RANGE_FILTERS:
+            value = getattr(self, name)
+            if value is not None:
+                params[name] = str(value)
+        params["tri"] = self.tri
+        params.update(extra)
+        return params.urlencode()
+
+    def condition(self, exclude=None):
+        """Q des filtres actifs, sauf ceux de la facette ``exclude`` ("marque", "annee"…)."""
+        q = Q()
+        if self.marques and exclude != "marque":
+            q &= Q(marque__in=self.marques)
+        for name, lookup in RANGE_FILTERS:
+            value = getattr(self, name)
+            if value is not None and name.split("_")[0] != exclude:
+                q &= Q(**{lookup: value})
+        return q
+
+    def apply(self, qs):
+        """Filtre et trie un queryset de vehicules."""
+        return qs.filter(self.condition()).order_by(*self.ordering)
+
+
+def _field_value(obj, field):
+    return getattr(obj, field.lstrip("-"))
+
+
+def encode_cursor(obj, ordering) -> str:
+    """Curseur opaque : valeurs des champs de tri du dernier element de la page."""
+    values = []
+    for field in ordering:
+        value = _field_value(obj, field)
+        if isinstance(value, datetime):
+            value = value.isoformat()
+        elif isinstance(value, Decimal):
+            value = str(value)
+        values.append(value)
+    raw = json.dumps(values, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(token, ordering):
+    """Valeurs du curseur, ou None si absent / invalide (retour a la premiere page)."""
+    if not token:
+        return None
+    try:
+        raw = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4))
+        values = json.loads(raw)
+    except (ValueError, TypeError):
+        return None
+    if not isinstance(values, list) or len(values) != len(ordering):
+        return None
+    decoded = []
+    for field, value in zip(ordering, values):
+        name = field.lstrip("-")
+        try:
+            if name == "created_at":
+                value = datetime.fromisoformat(value)
+            elif name == "prix":
+                value = Decimal(value)
+            else:
+                value = int(value)
+        except (ValueError, TypeError, ArithmeticError):
+            return None
+        decoded.append(value)
+    return decoded
+
+
+def after_cursor(ordering, values):
+    """Condition keyset « strictement apres » pour un tri multi-colonnes."""
+    condition = Q()
+    equal = {}
+    for field, value in zip(ordering, values):
+        name = field.lstrip("-")
+        lookup = "lt" if field.startswith("-") else "gt"
+        condition |= Q(**equal, **{f"{name}__{lookup}": value})
+        equal[name] = value
+    return condition
+
+
+def get_page(qs, filters, cursor=None, size=None):
+    """Une page de resultats apres le curseur : (elements, curseur suivant ou None)."""
+    size = size or settings.CATALOGUE_PAGE_SIZE
+    values = decode_cursor(cursor, filters.ordering)
+    if values is not None:
+        qs = qs.filter(after_cursor(filters.ordering, values))
+    items = list(qs[: size + 1])
+    if len(items) <= size:
+        return items, None
+    items = items[:size]
+    return items, encode_cursor(items[-1], filters.ordering)
+
+
+def cache_key(kind, filters, cursor="") -> str:
+    return catalogue.cache_key("vehicule_list", kind, filters.signature(), cursor or "")
+
+
+def band_key(low, high) -> str:
+    return f"{'' if low is None else low}-{'' if high is None else high}"
+
+
+def _band_condition(field, low, high):
+    q = Q()
+    if low is not None:
+        q &= Q(**{f"{field}__gte": low})
+    if high is not None:
+        q &= Q(**{f"{field}__lte": high})
+    return q
+
+
+def compute_facets(qs, filters, marques):
+    """Nombre de resultats par marque et par tranche, en une seule requete agregee.
+
+    Chaque facette ignore son propre filtre (les autres marques restent
+    proposees avec leur nombre, selection multiple) mais applique tous les autres.
+    """
+    aggregates, slots = {}, []
+    for value in marques:
+        slots.append(("marque", value))
+        aggregates[f"f{len(slots)}"] = Count("pk", filter=filters.condition("marque") & Q(marque=value))
+    for facet, (field, bands) in FACET_BANDS.items():
+        others = filters.condition(facet)
+        for _, low, high in bands:
+            slots.append((facet, band_key(low, high)))
+            aggregates[f"f{len(slots)}"] = Count("pk", filter=others & _band_condition(field, low, high))
+    row = qs.aggregate(**aggregates)
+    facets = {"marque": {}, **{facet: {} for facet in FACET_BANDS}}
+    for index, (facet, key) in enumerate(slots, start=1):
+        facets[facet][key] = row[f"f{index}"] or 0
+    return facets
+
+
+def cached_facets(qs, filters, marques):
+    """Facettes en cache ; le tri n'y change rien, d'ou une signature sans tri."""
+    return cache.get_or_set(
+        cache_key("facets", filters._replace(tri=DEFAULT_SORT)),
+        lambda: compute_facets(qs, filters, marques),
+        settings.CATALOGUE_COUNT_CACHE_TTL,
+    )
+
+
+def cached_count(qs, filters):
+    """Nombre total de resultats, mis en cache par signature de filtres."""
+    return cache.get_or_set(
+        cache_key("count", filters), qs.count, settings.CATALOGUE_COUNT_CACHE_TTL
+    )
@@ -0,0 +1,112 @@
+import time
+from io import BytesIO
+
+from django.core.handlers.wsgi import WSGIHandler
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.test import override_settings
+
+MODES = {
+    # libelle : reglages appliques a DATABASES["default"]
+    "avant (CONN_MAX_AGE=0)": {"CONN_MAX_AGE": 0, "CONN_HEALTH_CHECKS": False},
+    "persistant + health checks": {"CONN_MAX_AGE": 60, "CONN_HEALTH_CHECKS": True},
+}
+
+
+def _environ(path, host):
+    return {
+        "REQUEST_METHOD": "GET",
+        "PATH_INFO": path,
+        "QUERY_STRING": "",
+        "SERVER_NAME": host,
+        "SERVER_PORT": "80",
+        "HTTP_HOST": host,
+        "REMOTE_ADDR": "127.0.0.1",
+        "wsgi.url_scheme": "http",
+        "wsgi.input": BytesIO(),
+        "wsgi.errors": BytesIO(),
+    }
+
+
+class Command(BaseCommand):
+    help = (
+        "Mesure la part du temps d'ouverture des connexions MySQL dans la latence "
+        "des requetes, sans puis avec connexions persistantes (et pool si MySQL)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--requests", type=int, default=300)
+        parser.add_argument("--path", default="/vehicules/")
+        parser.add_argument("--host", default="localhost")
+        parser.add_argument(
+            "--with-cache",
+            action="store_true",
+            help="Garde les caches applicatifs (par defaut desactives : chaque requete lit la base).",
+        )
+
+    def handle(self, *args, **options):
+        modes = dict(MODES)
+        if connections["default"].vendor == "mysql":
+            modes["pool (mode ASGI)"] = {"CONN_MAX_AGE": 0, "POOL_SIZE": 4}
+
+        self.stdout.write(
+            f"{options['requests']} requetes GET {options['path']} "
+            f"({connections['default'].vendor})"
+        )
+        no_cache = {} if options["with_cache"] else {
+            "CACHES": {"default": {"BACKEND": "django.core.cache.backends.dummy.DummyCache"}},
+            "CATALOGUE_VERSION_TTL": 0,
+        }
+        for label, overrides in modes.items():
+            with override_settings(**no_cache):
+                total, connects, connect_time = self._run(options, overrides)
+            n = options["requests"]
+            share = connect_time / total * 100 if total else 0
+            self.stdout.write(
+                f"  {label:28} {total / n * 1e3:7.2f} ms/requete  "
+                f"{connects:4} connexion(s)  "
+                f"connexion : {connect_time / n * 1e3:6.2f} ms/requete ({share:4.1f} %)"
+            )
+
+    def _run(self, options, overrides):
+        original = connections["default"]
+        settings_dict = dict(original.settings_dict, **overrides)
+        if "POOL_SIZE" in overrides:
+            from config.mysql_pool.base import DatabaseWrapper
+        else:
+            DatabaseWrapper = type(original)
+        original.close()
+        conn = DatabaseWrapper(settings_dict, original.alias)
+
+        stats = {"count": 0, "time": 0.0}
+        get_new_connection = conn.get_new_connection
+
+        def timed_get_new_connection(conn_params):
+            start = time.perf_counter()
+            try:
+                return get_new_connection(conn_params)
+            finally:
+                stats["count"] += 1
+                stats["time"] += time.perf_counter() - start
+
+        conn.get_new_connection = timed_get_new_connection
+        connections["default"] = conn
+        handler = WSGIHandler()
+        try:
+            start = time.perf_counter()
+            for _ in range(options["requests"]):
+                status = []
+                response = handler(
+                    _environ(options["path"], options["host"]),
+                    lambda s, h, *a: status.append(s),
+                )
+                b"".join(response)
+                # Declenche request_finished -> close_old_connections, comme sous gunicorn
+                response.close()
+                if not status[0].startswith("200"):
+                    raise CommandError(f"{options['path']} : HTTP {status[0]}")
+            total = time.perf_counter() - start
+        finally:
+            conn.close()
+            connections["default"] = original
+        return total, stats["count"], stats["time"]
@@ -0,0 +1,81 @@
+import ipaddress
+import tempfile
+import time
+from pathlib import Path
+
+from django.core.management.base import BaseCommand
+from django.test import RequestFactory, override_settings
+
+from core import middleware
+
+
+def _legacy_is_allowed(request, clients_file):
+    """Ancien comportement : relecture + parsing du fichier a chaque requete."""
+    ips = set()
+    for line in Path(clients_file).read_text(encoding="utf-8").splitlines():
+        line = line.strip()
+        if not line or line.startswith("#"):
+            continue
+        ips.add(line.split("#", 1)[0].strip())
+    return str(middleware.get_client_ip(request)) in ips
+
+
+class Command(BaseCommand):
+    help = (
+        "Micro-benchmark du TailscaleAdminMiddleware : cout par requete de la "
+        "verification de liste blanche, avant/apres cache."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--entries", type=int, default=5000)
+        parser.add_argument("--requests", type=int, default=2000)
+
+    def handle(self, *args, **options):
+        entries = options["entries"]
+        n_requests = options["requests"]
+
+        base = int(ipaddress.ip_address("100.64.0.0"))
+        lines = ["# liste blanche de benchmark"]
+        for i in range(entries):
+            if i % 10 == 0:
+                lines.append(f"{ipaddress.ip_address(base + i * 256)}/24")
+            else:
+                lines.append(str(ipaddress.ip_address(base + i * 256 + 1)))
+        # Derniere entree exacte : pire cas pour l'ancien scan
+        client_ip = lines[-1].split("/", 1)[0]
+
+        factory = RequestFactory()
+        request = factory.get("/cms/", REMOTE_ADDR=client_ip)
+
+        with tempfile.TemporaryDirectory() as tmp:
+            clients_file = Path(tmp) / "allowed_tailscale_ips.txt"
+            clients_file.write_text("\n".join(lines) + "\n", encoding="utf-8")
+
+            with override_settings(
+                TAILSCALE_ADMIN_REQUIRED=True,
+                TAILSCALE_ALLOW_LOCALHOST=False,
+                TAILSCALE_ALLOWED_CLIENT_IPS=[],
+                TAILSCALE_CLIENTS_FILE=str(clients_file),
+            ):
+                start = time.perf_counter()
+                for _ in range(n_requests):
+                    assert _legacy_is_allowed(request, clients_file)
+                legacy = (time.perf_counter() - start) / n_requests
+
+                mw = middleware.TailscaleAdminMiddleware(lambda r: None)
+                middleware._allow_list_cache["allow_list"] = None
+                start = time.perf_counter()
+                middleware.get_allow_list()
+                first_load = time.perf_counter() - start
+
+                start = time.perf_counter()
+                for _ in range(n_requests):
+                    assert mw.process_request(request) is None
+                cached = (time.perf_counter() - start) / n_requests
+
+        self.stdout.write(f"Liste blanche : {entries} entrees, {n_requests} requetes")
+        self.stdout.write(f"  avant (relecture fichier) : {legacy * 1e6:10.1f} µs/requete")
+        self.stdout.write(f"  apres (cache + bisection) : {cached * 1e6:10.1f} µs/requete")
+        self.stdout.write(f"  chargement initial / rechargement : {first_load * 1e3:.1f} ms")
+        if cached:
+            self.stdout.write(self.style.SUCCESS(f"  gain : x{legacy / cached:.0f}"))
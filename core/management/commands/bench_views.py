@@ -0,0 +1,133 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import override_settings
+from django.utils import timezone
+
+from core import benchmark
+from core.models import Vehicule
+
+
+def _sizes(value):
+    try:
+        sizes = sorted({int(part.replace("_", "")) for part in value.split(",") if part.strip()})
+    except ValueError as exc:
+        raise CommandError(f"--sizes invalide : {value}") from exc
+    if not sizes or sizes[0] <= 0:
+        raise CommandError(f"--sizes invalide : {value}")
+    return sizes
+
+
+class Command(BaseCommand):
+    help = (
+        "Mesure debit et latences (p50/p95/p99) des vues chaudes (accueil, liste filtree, "
+        "fragment AJAX, fiche, contact avec pieces jointes, documents) ; resultats en JSON, "
+        "comparables a une execution precedente (--compare). Avec --fill, complete le "
+        "catalogue a chaque taille de --sizes (base dediee aux mesures)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--sizes",
+            default=",".join(map(str, benchmark.DEFAULT_SIZES)),
+            help="Tailles de catalogue (avec --fill), ex. 100,10000,100000.",
+        )
+        parser.add_argument(
+            "--fill",
+            action="store_true",
+            help="Ajoute des vehicules synthetiques jusqu'a chaque taille. Sans --fill : catalogue actuel seul.",
+        )
+        parser.add_argument("--requests", type=int, default=200, help="Requetes par scenario.")
+        parser.add_argument("--warmup", type=int, default=5)
+        parser.add_argument("--seed", type=int, default=1)
+        parser.add_argument(
+            "--scenario",
+            action="append",
+            choices=[scenario.name for scenario in benchmark.SCENARIOS],
+            help="Scenario a mesurer (repetable ; par defaut tous).",
+        )
+        parser.add_argument(
+            "--with-cache",
+            action="store_true",
+            help="Garde les caches applicatifs (par defaut desactives : chaque requete lit la base).",
+        )
+        parser.add_argument("--host", default="localhost")
+        parser.add_argument("--output", help="Fichier JSON des resultats (defaut : bench-<base>-<date>.json).")
+        parser.add_argument("--compare", metavar="JSON", help="Execution precedente a comparer.")
+        parser.add_argument(
+            "--threshold", type=float, default=10.0, help="Variation signalee comme regression (%%, defaut 10)."
+        )
+
+    def handle(self, *args, **options):
+        if options["requests"] <= 0:
+            raise CommandError("--requests doit etre positif.")
+        previous = None
+        if options["compare"]:
+            try:
+                previous = benchmark.load(options["compare"])
+            except (OSError, ValueError) as exc:
+                raise CommandError(f"{options['compare']} : {exc}")
+        names = options["scenario"]
+        scenarios = [s for s in benchmark.SCENARIOS if not names or s.name in names]
+
+        overrides = {"TAILSCALE_ADMIN_REQUIRED": False}
+        if not options["with_cache"]:
+            overrides["CACHES"] = {"default": {"BACKEND": "django.core.cache.backends.dummy.DummyCache"}}
+
+        sizes = _sizes(options["sizes"]) if options["fill"] else [None]
+        data = {**benchmark.metadata(options["requests"], options["seed"], options["with_cache"]), "tailles": {}}
+        for size in sizes:
+            if size is not None:
+                self._fill(size, options)
+            count = Vehicule.objects.count()
+            if size is not None and count > size:
+                self.stderr.write(f"Taille {size} ignoree : le catalogue compte deja {count} vehicules.")
+                continue
+            self.stdout.write(
+                f"{count} vehicules ({connection.vendor}), {options['requests']} requetes par scenario"
+            )
+            with override_settings(**overrides):
+                results = benchmark.run(
+                    scenarios, options["requests"], options["warmup"], options["seed"], options["host"],
+                    log=self.stdout.write,
+                )
+            data["tailles"][str(count)] = {"vehicules": count, "scenarios": results}
+
+        path = options["output"] or f"bench-{connection.vendor}-{timezone.now():%Y%m%d-%H%M%S}.json"
+        benchmark.write(path, data)
+        self.stdout.write(self.style.SUCCESS(f"Resultats : {path}"))
+        if previous is not None:
+            self._compare(previous, data, options["threshold"])
+
+    def _fill(self, size, options):
+        start = time.perf_counter()
+
+        def progress(totals, done, batches):
+            if options["verbosity"] > 1:
+                self.stdout.write(f"  lot {done}/{batches} : {totals.get('vehicules', 0)} vehicule(s) ajoute(s)")
+
+        def errors(index, message):
+            # Catalogue incomplet : les mesures ne correspondraient pas a la taille demandee
+            raise CommandError(f"Remplissage a {size} vehicules : lot {index} en echec ({message}).")
+
+        created = benchmark.fill(size, options["seed"], progress, errors)
+        if created:
+            self.stdout.write(f"{created} vehicule(s) synthetique(s) ajoute(s) en {time.perf_counter() - start:.1f} s")
+
+    def _compare(self, previous, data, threshold):
+        rows = benchmark.compare(previous, data, threshold)
+        if not rows:
+            self.stdout.write("Comparaison : aucune taille / scenario en commun.")
+            return
+        self.stdout.write(f"Comparaison avec {previous.get('date')} ({previous.get('commit') or '?'}) :")
+        regressions = 0
+        for size, name, metric, before, after, change, regression in rows:
+            line = f"  {size:>7} {name:28} {metric:7} {before:9.1f} -> {after:9.1f}  {change:+6.1f} %"
+            if regression:
+                regressions += 1
+                line = self.style.ERROR(f"{line}  REGRESSION")
+            self.stdout.write(line)
+        if regressions:
+            raise CommandError(f"{regressions} regression(s) au-dela de {threshold:g} %.")
+        self.stdout.write(self.style.SUCCESS(f"Aucune regression au-dela de {threshold:g} %."))
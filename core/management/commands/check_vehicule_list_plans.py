@@ -0,0 +1,97 @@
+import itertools
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.http import QueryDict
+
+from core.listing import SORTS, ListingFilters, after_cursor, decode_cursor, encode_cursor
+from core.models import VehiculeListing
+
+RANGES = {
+    "annee": {"annee_min": "2015", "annee_max": "2022"},
+    "prix": {"prix_min": "100000", "prix_max": "400000"},
+    "km": {"km_min": "0", "km_max": "50000"},
+}
+MARQUES = {
+    "toutes": [],
+    "une": ["ferrari"],
+    "plusieurs": ["ferrari", "porsche"],
+}
+MIN_REPRESENTATIVE_ROWS = 1000
+
+
+def _filters(marques, ranges, tri):
+    data = QueryDict(mutable=True)
+    data.setlist("marque", marques)
+    for name in ranges:
+        data.update(RANGES[name])
+    data["tri"] = tri
+    return ListingFilters.from_querydict(data)
+
+
+def _full_scans(qs):
+    """Tables lues integralement selon le plan du SGBD (liste vide si aucun)."""
+    sql, params = qs.query.sql_with_params()
+    table = VehiculeListing._meta.db_table
+    with connection.cursor() as cursor:
+        if connection.vendor == "mysql":
+            cursor.execute("EXPLAIN " + sql, params)
+            columns = [col[0] for col in cursor.description]
+            rows = [dict(zip(columns, row)) for row in cursor.fetchall()]
+            return [r["table"] for r in rows if r["type"] == "ALL" and r["table"] == table]
+        if connection.vendor == "sqlite":
+            cursor.execute("EXPLAIN QUERY PLAN " + sql, params)
+            details = [row[-1] for row in cursor.fetchall()]
+            return [
+                d for d in details
+                if d.startswith(f"SCAN {table}") and "INDEX" not in d
+            ]
+    raise CommandError(f"EXPLAIN non pris en charge pour {connection.vendor}.")
+
+
+class Command(BaseCommand):
+    help = (
+        "Execute EXPLAIN sur chaque combinaison de filtres/tri que vehicule_list "
+        "et home peuvent generer (table de lecture VehiculeListing) ; echoue si "
+        "l'une d'elles lit toute la table."
+    )
+
+    def handle(self, *args, **options):
+        rows = VehiculeListing.objects.count()
+        if rows < MIN_REPRESENTATIVE_ROWS:
+            self.stdout.write(self.style.WARNING(
+                f"{rows} vehicule(s) seulement : l'optimiseur peut preferer un "
+                "parcours complet sur une petite table, plans peu representatifs."
+            ))
+
+        sample = VehiculeListing.objects.order_by(*SORTS["recent"]).first()
+        plans = []
+        range_sets = [()] + [(name,) for name in RANGES] + [tuple(RANGES)]
+        for (marque_label, marques), ranges, tri in itertools.product(
+            MARQUES.items(), range_sets, SORTS
+        ):
+            filters = _filters(marques, ranges, tri)
+            qs = filters.apply(VehiculeListing.objects.all())
+            label = f"marque={marque_label} plages={'+'.join(ranges) or '-'} tri={tri}"
+            plans.append((f"{label} [page 1]", qs[:25]))
+            plans.append((f"{label} [total]", qs.order_by().values("pk")))
+            if sample is not None:
+                values = decode_cursor(encode_cursor(sample, filters.ordering), filters.ordering)
+                plans.append((f"{label} [page suivante]", qs.filter(after_cursor(filters.ordering, values))[:25]))
+        plans.append((
+            "home vedettes",
+            VehiculeListing.objects.filter(en_vedette=True).order_by(*SORTS["recent"])[:3],
+        ))
+
+        failures = []
+        for label, qs in plans:
+            scans = _full_scans(qs)
+            if scans:
+                failures.append(label)
+                self.stdout.write(self.style.ERROR(f"FULL SCAN  {label}"))
+            elif options["verbosity"] > 1:
+                self.stdout.write(f"ok         {label}")
+
+        if failures:
+            raise CommandError(f"{len(failures)}/{len(plans)} requete(s) en parcours complet de table.")
+        self.stdout.write(self.style.SUCCESS(f"{len(plans)} plans verifies, aucun parcours complet."))
@@ -0,0 +1,40 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from core import catalogue, read_model
+from core.models import VehiculeListing
+
+# Ecarts detailles affiches au plus
+MAX_REPORTED = 20
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare la table de lecture VehiculeListing aux vehicules (cartes manquantes, "
+        "en trop ou perimees) ; --fix corrige les ecarts. Code de sortie 1 si ecart."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--fix", action="store_true", help="Recalcule les cartes en ecart.")
+        parser.add_argument("--batch-size", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        missing, extra, stale = read_model.check(options["batch_size"])
+        for pk in missing[:MAX_REPORTED]:
+            self.stdout.write(f"  manquante  vehicule #{pk}")
+        for pk in extra[:MAX_REPORTED]:
+            self.stdout.write(f"  en trop    carte #{pk}")
+        for pk, fields in list(stale.items())[:MAX_REPORTED]:
+            self.stdout.write(f"  perimee    vehicule #{pk} : {', '.join(fields)}")
+        errors = len(missing) + len(extra) + len(stale)
+        if not errors:
+            self.stdout.write(self.style.SUCCESS("Table VehiculeListing coherente."))
+            return
+        summary = f"{len(missing)} manquante(s), {len(extra)} en trop, {len(stale)} perimee(s)"
+        if not options["fix"]:
+            raise CommandError(f"{summary} (--fix pour corriger).")
+        with transaction.atomic():
+            VehiculeListing.objects.filter(pk__in=extra).delete()
+            read_model.refresh([*missing, *stale])
+        catalogue.bump_version()
+        self.stdout.write(self.style.SUCCESS(f"{summary} : corrige."))
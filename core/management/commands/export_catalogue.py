@@ -0,0 +1,35 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from core import catalogue_io
+
+
+class Command(BaseCommand):
+    help = (
+        "Exporte le catalogue (vehicules, options, images) en JSON lines ou CSV, en flux : "
+        "lecture par paquets (iterator), memoire constante quel que soit le volume."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("-o", "--output", default="-", help="Fichier de sortie (defaut : sortie standard).")
+        parser.add_argument("--format", choices=["jsonl", "csv"], help="Deduit de l'extension par defaut.")
+        parser.add_argument("--chunk-size", type=int, default=2000)
+
+    def handle(self, *args, **options):
+        output = options["output"]
+        fmt = options["format"] or ("csv" if output.endswith(".csv") else "jsonl")
+        writer = catalogue_io.write_csv if fmt == "csv" else catalogue_io.write_jsonl
+        start = time.perf_counter()
+        vehicules = catalogue_io.export_queryset(options["chunk_size"])
+        if output == "-":
+            self.stdout.ending = ""  # les lignes portent deja leur fin
+            count = writer(self.stdout, vehicules)
+        else:
+            with open(output, "w", encoding="utf-8", newline="") as stream:
+                count = writer(stream, vehicules)
+        elapsed = time.perf_counter() - start
+        # Resume sur stderr : stdout peut etre le fichier exporte
+        self.stderr.write(
+            f"{count} vehicule(s) exporte(s) en {elapsed:.1f} s ({count / max(elapsed, 1e-9):.0f} lignes/s)."
+        )
@@ -0,0 +1,82 @@
+import os
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from core import synthetic
+from core.forms import CONTACT_MAX_FILES
+
+
+class Command(BaseCommand):
+    help = (
+        "Ajoute N vehicules synthetiques (toutes marques, options, images, documents de chaque "
+        "type) et des demandes de contact avec pieces jointes, par lots (bulk_create) ecrits en "
+        "parallele ; meme graine = meme catalogue. Pour les tests de charge, sur une base dediee."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("count", type=int, help="Nombre de vehicules a ajouter.")
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument("--options", type=int, default=4, help="Options par vehicule.")
+        parser.add_argument("--images", type=int, default=3, help="Images de galerie par vehicule.")
+        parser.add_argument(
+            "--documents",
+            type=int,
+            help="Documents par vehicule (defaut : un de chaque type ; ignore sans l'application documents).",
+        )
+        parser.add_argument("--contacts", type=int, default=0, help="Demandes de contact a ajouter.")
+        parser.add_argument(
+            "--attachments",
+            type=int,
+            default=2,
+            help=f"Pieces jointes par demande, au plus (0 a {CONTACT_MAX_FILES}).",
+        )
+        parser.add_argument("--batch-size", type=int, default=1000)
+        parser.add_argument(
+            "--workers",
+            type=int,
+            help="Processus d'ecriture (defaut : nombre de CPU ; 1 sous SQLite, qui n'a qu'un ecrivain).",
+        )
+
+    def handle(self, *args, **options):
+        if options["count"] <= 0 or options["batch_size"] <= 0:
+            raise CommandError("count et --batch-size doivent etre positifs.")
+        if not 0 <= options["attachments"] <= CONTACT_MAX_FILES:
+            raise CommandError(f"--attachments : entre 0 et {CONTACT_MAX_FILES}.")
+        workers = options["workers"]
+        if workers is None:
+            workers = 1 if connection.vendor == "sqlite" else os.cpu_count() or 1
+        start = time.perf_counter()
+
+        def progress(totals, done, batches):
+            if options["verbosity"] > 1 or done == batches:
+                rate = totals.get("vehicules", 0) / max(time.perf_counter() - start, 1e-9)
+                self.stdout.write(f"lot {done}/{batches} : {totals.get('vehicules', 0)} vehicules, {rate:.0f}/s")
+
+        failed = []
+
+        def errors(index, message):
+            failed.append(index)
+            self.stderr.write(f"Lot {index} : {message}")
+
+        totals = synthetic.generate(
+            options["count"],
+            options["seed"],
+            options=options["options"],
+            images=options["images"],
+            documents=options["documents"],
+            contacts=options["contacts"],
+            attachments=options["attachments"],
+            batch_size=options["batch_size"],
+            workers=workers,
+            progress=progress,
+            errors=errors,
+        )
+        elapsed = time.perf_counter() - start
+        rows = sum(totals.values())
+        self.stdout.write(", ".join(f"{count} {table}" for table, count in totals.items()))
+        summary = f"{rows} lignes en {elapsed:.1f} s ({rows / max(elapsed, 1e-9):.0f} lignes/s, {workers} processus)"
+        if failed:
+            raise CommandError(f"{summary} ; {len(failed)} lot(s) en echec.")
+        self.stdout.write(self.style.SUCCESS(summary))
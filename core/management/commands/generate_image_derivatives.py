@@ -0,0 +1,61 @@
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from core.images import generate_derivatives_in_worker
+from core.models import ImageVehicule, Vehicule
+
+
+class Command(BaseCommand):
+    help = (
+        "Genere les declinaisons srcset (core.images) des images deja uploadees "
+        "(vehicules et galeries), en parallele dans un pool de processus."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+        parser.add_argument(
+            "--force", action="store_true", help="Regenere meme les declinaisons existantes."
+        )
+
+    def handle(self, *args, **options):
+        names = set(
+            Vehicule.objects.exclude(image_principale="")
+            .exclude(image_principale__isnull=True)
+            .values_list("image_principale", flat=True)
+        )
+        names.update(
+            ImageVehicule.objects.exclude(image="")
+            .exclude(image__isnull=True)
+            .values_list("image", flat=True)
+        )
+        if not names:
+            self.stdout.write("Aucune image uploadee.")
+            return
+        # Les processus fils ne doivent pas heriter de la connexion ouverte
+        connections.close_all()
+
+        start = time.perf_counter()
+        generated = errors = 0
+        with ProcessPoolExecutor(max_workers=options["workers"]) as pool:
+            futures = [
+                pool.submit(generate_derivatives_in_worker, name, options["force"])
+                for name in sorted(names)
+            ]
+            for future in as_completed(futures):
+                name, widths, error = future.result()
+                if error:
+                    errors += 1
+                    self.stderr.write(f"{name} : {error}")
+                elif widths and options["verbosity"] > 1:
+                    self.stdout.write(f"{name} : {', '.join(map(str, widths))} px")
+                generated += len(widths)
+
+        elapsed = time.perf_counter() - start
+        self.stdout.write(self.style.SUCCESS(
+            f"{len(names)} image(s) traitee(s), {generated} declinaison(s) creee(s), "
+            f"{errors} erreur(s) en {elapsed:.1f} s ({options['workers']} processus)."
+        ))
@@ -0,0 +1,47 @@
+import sys
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core import catalogue_io
+
+
+class Command(BaseCommand):
+    help = (
+        "Importe des vehicules (avec options et images) depuis un fichier JSON lines ou CSV, "
+        "en flux et par lots (bulk_create / bulk_update). Cle : colonne id (creation si absente)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="Fichier .jsonl / .csv, ou - pour l'entree standard.")
+        parser.add_argument("--format", choices=["jsonl", "csv"], help="Deduit de l'extension par defaut.")
+        parser.add_argument("--batch-size", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        path = options["path"]
+        fmt = options["format"] or ("csv" if path.endswith(".csv") else "jsonl")
+        reader = catalogue_io.read_csv if fmt == "csv" else catalogue_io.read_jsonl
+        start = time.perf_counter()
+
+        def progress(stats):
+            if options["verbosity"] > 1:
+                rate = stats.lignes / max(time.perf_counter() - start, 1e-9)
+                self.stdout.write(f"{stats.lignes} ligne(s), {rate:.0f} lignes/s")
+
+        try:
+            stream = sys.stdin if path == "-" else open(path, encoding="utf-8-sig", newline="")
+        except OSError as exc:
+            raise CommandError(str(exc))
+        with stream:
+            stats = catalogue_io.import_records(reader(stream), options["batch_size"], progress)
+
+        elapsed = time.perf_counter() - start
+        for number, error in stats.erreurs[:50]:
+            self.stderr.write(f"Ligne {number} : {error}")
+        if len(stats.erreurs) > 50:
+            self.stderr.write(f"… et {len(stats.erreurs) - 50} autre(s) erreur(s).")
+        self.stdout.write(self.style.SUCCESS(
+            f"{stats.crees} vehicule(s) cree(s), {stats.mis_a_jour} mis a jour, {stats.inchanges} inchange(s), "
+            f"{len(stats.erreurs)} ligne(s) rejetee(s) en {elapsed:.1f} s "
+            f"({stats.lignes / max(elapsed, 1e-9):.0f} lignes/s)."
+        ))
@@ -0,0 +1,39 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from core import mirror
+from core.models import ImageDistante
+
+
+class Command(BaseCommand):
+    help = (
+        "Copie localement les images externes du catalogue (image_url, placeholders) "
+        "et genere leurs declinaisons srcset. A lancer en cron."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--workers", type=int, default=None)
+        parser.add_argument("--limit", type=int, default=None)
+        parser.add_argument(
+            "--scan",
+            action="store_true",
+            help="Enregistre d'abord toutes les URL externes du catalogue.",
+        )
+        parser.add_argument(
+            "--retry-failed",
+            action="store_true",
+            help="Remet a zero le compteur de tentatives des copies en echec.",
+        )
+
+    def handle(self, *args, **options):
+        if options["scan"]:
+            mirror.register(mirror.catalogue_urls())
+        if options["retry_failed"]:
+            ImageDistante.objects.filter(statut="echec").update(tentatives=0)
+
+        start = time.perf_counter()
+        ok, failed = mirror.mirror_pending(workers=options["workers"], limit=options["limit"])
+        self.stdout.write(self.style.SUCCESS(
+            f"{ok} image(s) copiee(s), {failed} echec(s) en {time.perf_counter() - start:.1f} s."
+        ))
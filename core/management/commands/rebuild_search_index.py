@@ -0,0 +1,32 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from core import search
+
+
+class Command(BaseCommand):
+    help = (
+        "Recalcule l'index de recherche (core.search) de tous les vehicules : apres une "
+        "ecriture en masse hors signaux ou un changement de normalisation."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=1000)
+        parser.add_argument("--query", help="Recherche de controle apres reconstruction.")
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        count = search.rebuild(
+            batch_size=options["batch_size"],
+            progress=lambda done, total: self.stdout.write(f"  {done}/{total}"),
+        )
+        self.stdout.write(
+            self.style.SUCCESS(f"{count} vehicule(s) indexe(s) en {time.perf_counter() - started:.1f} s.")
+        )
+        if options["query"]:
+            started = time.perf_counter()
+            ids = search.search_ids(options["query"], limit=10)
+            elapsed = (time.perf_counter() - started) * 1000
+            moteur = "FULLTEXT" if search.uses_fulltext() else "index en memoire"
+            self.stdout.write(f"« {options['query']} » ({moteur}, {elapsed:.1f} ms) : {ids}")
@@ -0,0 +1,26 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from core import catalogue, read_model
+
+
+class Command(BaseCommand):
+    help = (
+        "Reconstruit la table de lecture VehiculeListing (cartes de la liste publique "
+        "et de l'accueil, core.read_model) depuis les vehicules."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        count = read_model.rebuild(
+            batch_size=options["batch_size"],
+            progress=lambda done, total: self.stdout.write(f"  {done}/{total}"),
+        )
+        catalogue.bump_version()
+        self.stdout.write(
+            self.style.SUCCESS(f"{count} carte(s) reconstruite(s) en {time.perf_counter() - started:.1f} s.")
+        )
@@ -0,0 +1,91 @@
+import os
+from collections import defaultdict
+
+from django.apps import apps
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import F, FileField, Sum
+
+from core.models import StoredBlob
+from core.storage import ContentAddressedStorage, file_sha256
+
+
+def _mo(size):
+    return f"{size / 1024 / 1024:.1f} Mo"
+
+
+class Command(BaseCommand):
+    help = (
+        "Gain de la deduplication (core.storage) : blobs existants, et economie possible "
+        "sur les fichiers anterieurs (noms uuid). --apply convertit ces derniers en blobs."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--apply",
+            action="store_true",
+            help="Deplace les fichiers anterieurs dans le stockage dedoublonne et met a jour les lignes.",
+        )
+
+    def _fields(self):
+        for model in apps.get_models():
+            for field in model._meta.get_fields():
+                if isinstance(field, FileField) and isinstance(field.storage, ContentAddressedStorage):
+                    yield model, field
+
+    def handle(self, *args, **options):
+        totals = StoredBlob.objects.aggregate(stocke=Sum("taille"), logique=Sum(F("taille") * F("references")))
+        stored, logical = totals["stocke"] or 0, totals["logique"] or 0
+        self.stdout.write(
+            f"Blobs : {StoredBlob.objects.count()} fichier(s), {_mo(stored)} sur disque "
+            f"pour {_mo(logical)} references ({_mo(logical - stored)} economises)."
+        )
+
+        # Fichiers anterieurs : nom -> lignes (modele, champ, pk), puis contenu -> noms
+        legacy = defaultdict(list)
+        for model, field in self._fields():
+            rows = model.objects.exclude(**{field.name: ""}).values_list("pk", field.name)
+            for pk, name in rows.iterator():
+                if not field.storage.is_blob(name):
+                    legacy[name].append((model, field, pk))
+        if not legacy:
+            self.stdout.write("Aucun fichier hors blobs.")
+            return
+
+        by_hash = defaultdict(list)
+        missing = 0
+        for name, refs in legacy.items():
+            storage = refs[0][1].storage
+            path = storage.path(name)
+            if not os.path.exists(path):
+                missing += 1
+                continue
+            by_hash[file_sha256(path)].append((name, os.path.getsize(path)))
+        total = sum(size for names in by_hash.values() for _, size in names)
+        unique = sum(names[0][1] for names in by_hash.values())
+        self.stdout.write(
+            f"Fichiers hors blobs : {sum(len(n) for n in by_hash.values())} ({_mo(total)}), "
+            f"{len(by_hash)} contenu(s) distinct(s) ({_mo(unique)}) : "
+            f"{_mo(total - unique)} economisables."
+        )
+        for sha256, names in sorted(by_hash.items(), key=lambda item: -len(item[1])):
+            if len(names) > 1:
+                self.stdout.write(f"  {sha256[:12]}  x{len(names)}  {_mo(names[0][1])}  {names[0][0]}")
+        if missing:
+            self.stdout.write(self.style.WARNING(f"{missing} fichier(s) reference(s) introuvable(s) sur disque."))
+
+        if not options["apply"]:
+            return
+        converted = 0
+        for sha256, names in by_hash.items():
+            for name, _ in names:
+                refs = legacy[name]
+                storage = refs[0][1].storage
+                with transaction.atomic():
+                    blob = storage.adopt(storage.path(name), sha256)
+                    if len(refs) > 1:
+                        StoredBlob.objects.filter(chemin=blob).update(references=F("references") + len(refs) - 1)
+                    for model, field, pk in refs:
+                        model.objects.filter(pk=pk).update(**{field.name: blob})
+                converted += len(refs)
+        self.stdout.write(self.style.SUCCESS(f"{converted} ligne(s) convertie(s) en blobs."))
@@ -0,0 +1,92 @@
+import multiprocessing
+import signal
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import DatabaseError, connections
+
+from core import jobs
+
+# Purge des taches terminees au plus une fois par heure
+PURGE_INTERVAL = 3600
+
+
+class Command(BaseCommand):
+    help = (
+        "Worker de la file de taches en base (core.jobs) : declinaisons d'images, "
+        "copie des images externes, analyse antivirus…"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--processes", type=int, default=1, help="Processus workers (defaut : 1).")
+        parser.add_argument("--sleep", type=float, default=2.0, help="Attente (s) quand la file est vide.")
+        parser.add_argument(
+            "--burst", action="store_true", help="S'arrete quand la file est vide (cron, tests)."
+        )
+        parser.add_argument(
+            "--max-jobs", type=int, default=0, help="Taches par processus avant sortie (0 : illimite)."
+        )
+
+    def handle(self, *args, **options):
+        jobs.discover()
+        self.stdout.write(f"Taches : {', '.join(sorted(jobs.REGISTRY))}")
+        if options["processes"] <= 1:
+            self.work(options)
+            return
+
+        # Les processus fils ne doivent pas heriter de la connexion ouverte
+        connections.close_all()
+        children = [
+            multiprocessing.Process(target=self.work, args=(options,), daemon=False)
+            for _ in range(options["processes"])
+        ]
+        for child in children:
+            child.start()
+
+        def forward(signum, frame):
+            for child in children:
+                if child.is_alive():
+                    child.terminate()  # SIGTERM : chaque fils termine sa tache en cours
+
+        signal.signal(signal.SIGTERM, forward)
+        signal.signal(signal.SIGINT, forward)
+        for child in children:
+            child.join()
+
+    def work(self, options):
+        stopping = []
+        signal.signal(signal.SIGTERM, lambda *a: stopping.append(True))
+        signal.signal(signal.SIGINT, lambda *a: stopping.append(True))
+        worker = jobs.worker_id()
+        done = failed = 0
+        last_purge = 0.0
+        while not stopping:
+            try:
+                if time.monotonic() - last_purge > PURGE_INTERVAL:
+                    jobs.purge_finished()
+                    last_purge = time.monotonic()
+                job = jobs.claim(worker)
+            except DatabaseError as exc:
+                # Base indisponible ou pas encore migree : nouvel essai plus tard
+                self.stderr.write(f"[{worker}] base indisponible : {exc}")
+                connections.close_all()
+                time.sleep(options["sleep"] * 5)
+                continue
+            if job is None:
+                if options["burst"]:
+                    break
+                for connection in connections.all(initialized_only=True):
+                    connection.close_if_unusable_or_obsolete()
+                time.sleep(options["sleep"])
+                continue
+            started = time.perf_counter()
+            ok = jobs.run(job, worker)
+            done += ok
+            failed += not ok
+            self.stdout.write(
+                f"[{worker}] {job.nom} #{job.pk} {'ok' if ok else 'echec'} "
+                f"({(time.perf_counter() - started) * 1000:.0f} ms)"
+            )
+            if options["max_jobs"] and done + failed >= options["max_jobs"]:
+                break
+        self.stdout.write(f"[{worker}] arret : {done} ok, {failed} echec(s).")
@@ -1,11 +1,17 @@
-"""Middleware : acces CMS/documents reserve aux IP Tailscale autorisees."""
+"""Middleware : acces CMS/documents reserve aux IP Tailscale autorisees, mesures
+de performance par requete."""
 
 import ipaddress
 import logging
+import threading
+import time
+from bisect import bisect_right
 from pathlib import Path
 from urllib.parse import urlparse
 
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
 from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
 from django.http import HttpResponseRedirect
 from django.utils.deprecation import MiddlewareMixin
 
@@ -27,20 +33,95 @@ def get_client_ip(request):
     return _parse_ip(request.META.get("REMOTE_ADDR", ""))
 
 
-def _load_allowed_client_ips() -> set[str]:
-    ips = set(getattr(settings, "TAILSCALE_ALLOWED_CLIENT_IPS", []))
+class AllowList:
+    """Liste blanche parsee : IP exactes et plages CIDR (ex. 100.64.0.0/10).
+
+    Les reseaux sont fusionnes puis tries par adresse de debut, ce qui permet
+    un test d'appartenance par bisection (O(log n)).
+    """
+
+    def __init__(self, entries):
+        networks = {4: [], 6: []}
+        for entry in entries:
+            try:
+                network = ipaddress.ip_network(entry, strict=False)
+            except ValueError:
+                logger.warning("Entree Tailscale invalide ignoree : %r", entry)
+                continue
+            networks[network.version].append(network)
+
+        self._ranges = {}
+        for version, nets in networks.items():
+            collapsed = list(ipaddress.collapse_addresses(nets))
+            self._ranges[version] = (
+                [int(net.network_address) for net in collapsed],
+                [int(net.broadcast_address) for net in collapsed],
+            )
+        self.size = sum(len(nets) for nets in networks.values())
+
+    def __contains__(self, ip) -> bool:
+        if ip is None:
+            return False
+        starts, ends = self._ranges[ip.version]
+        value = int(ip)
+        index = bisect_right(starts, value) - 1
+        return index >= 0 and value <= ends[index]
+
+    def __len__(self) -> int:
+        return self.size
+
+
+def _read_clients_file(path: Path) -> list[str]:
+    entries = []
+    for line in path.read_text(encoding="utf-8").splitlines():
+        line = line.split("#", 1)[0].strip()
+        if line:
+            entries.append(line)
+    return entries
+
+
+def _clients_file_signature(path: Path):
+    """(mtime, inode, taille) du fichier, ou None s'il n'existe pas."""
+    try:
+        stat = path.stat()
+    except OSError:
+        return None
+    return (stat.st_mtime_ns, stat.st_ino, stat.st_size)
+
+
+_allow_list_lock = threading.Lock()
+_allow_list_cache = {"key": None, "checked_at": 0.0, "allow_list": None}
 
-    clients_file = getattr(settings, "TAILSCALE_CLIENTS_FILE", "")
-    if clients_file:
-        path = Path(clients_file)
-        if path.is_file():
-            for line in path.read_text(encoding="utf-8").splitlines():
-                line = line.strip()
-                if not line or line.startswith("#"):
-                    continue
-                ips.add(line.split("#", 1)[0].strip())
 
-    return ips
+def get_allow_list() -> AllowList:
+    """Liste blanche du processus, rechargee seulement si le fichier change.
+
+    Le fichier n'est re-stat() qu'une fois par TAILSCALE_CLIENTS_CACHE_TTL
+    secondes ; il n'est relu que si son mtime/inode/taille a change.
+    """
+    ttl = getattr(settings, "TAILSCALE_CLIENTS_CACHE_TTL", 2.0)
+    now = time.monotonic()
+    cached = _allow_list_cache
+    if cached["allow_list"] is not None and now - cached["checked_at"] < ttl:
+        return cached["allow_list"]
+
+    static_ips = tuple(getattr(settings, "TAILSCALE_ALLOWED_CLIENT_IPS", []))
+    clients_file = getattr(settings, "TAILSCALE_CLIENTS_FILE", "")
+    path = Path(clients_file) if clients_file else None
+    key = (static_ips, clients_file, _clients_file_signature(path) if path else None)
+
+    with _allow_list_lock:
+        if cached["allow_list"] is None or cached["key"] != key:
+            entries = list(static_ips)
+            if key[2] is not None:
+                try:
+                    entries += _read_clients_file(path)
+                except OSError:
+                    logger.exception("Lecture impossible de %s", path)
+            cached["allow_list"] = AllowList(entries)
+            cached["key"] = key
+        cached["checked_at"] = now
+        return cached["allow_list"]
 
 
 def client_is_allowed(request) -> bool:
@@ -53,12 +134,12 @@ def client_is_allowed(request) -> bool:
     if not client_ip:
         return False
 
-    allowed = _load_allowed_client_ips()
+    allowed = get_allow_list()
     if not allowed:
         logger.warning("Liste blanche Tailscale vide — acces CMS/documents refuse.")
         return False
 
-    return str(client_ip) in allowed
+    return client_ip in allowed
 
 
 def public_site_redirect_url(request) -> str:
@@ -86,8 +167,84 @@ class TailscaleAdminMiddleware(MiddlewareMixin):
 
         client_ip = get_client_ip(request)
         logger.info(
-            "Acces CMS/documents refuse — IP cliente=%s, autorisees=%s",
+            "Acces CMS/documents refuse — IP cliente=%s, %d entree(s) autorisee(s)",
             client_ip,
-            sorted(_load_allowed_client_ips()),
+            len(get_allow_list()),
         )
         return HttpResponseRedirect(public_site_redirect_url(request))
+
+
+class PerfMiddleware:
+    """Duree, requetes SQL, rendu des templates et taille de chaque reponse (core.perf).
+
+    En tete de MIDDLEWARE pour mesurer aussi les autres middlewares. Ajoute
+    l'en-tete ``Server-Timing`` et journalise les requetes de plus de
+    PERF_SLOW_REQUEST_MS avec leurs requetes SQL les plus lentes.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not settings.PERF_ENABLED:
+            raise MiddlewareNotUsed
+        from . import perf
+
+        self.perf = perf
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+        perf.install_template_timer()
+        perf.install_sql_timer()
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        stats, token = self.perf.start()
+        try:
+            response = self.get_response(request)
+        finally:
+            self.perf.stop(token)
+        return self._record(request, response, stats)
+
+    async def __acall__(self, request):
+        stats, token = self.perf.start()
+        try:
+            response = await self.get_response(request)
+        finally:
+            self.perf.stop(token)
+        return self._record(request, response, stats)
+
+    def _record(self, request, response, stats):
+        duration_ms = stats.elapsed_ms
+        match = request.resolver_match
+        view = match.view_name if match else "(non resolue)"
+        if response.streaming:
+            size = int(response["Content-Length"]) if response.has_header("Content-Length") else None
+        else:
+            size = len(response.content)
+        self.perf.record(view, stats, duration_ms, size)
+
+        if settings.PERF_SERVER_TIMING:
+            response["Server-Timing"] = (
+                f"app;dur={duration_ms:.1f}, "
+                f'db;dur={stats.sql_ms:.1f};desc="{stats.queries} requete(s) SQL", '
+                f"tpl;dur={stats.template_ms:.1f}"
+            )
+        if duration_ms >= settings.PERF_SLOW_REQUEST_MS:
+            slowest = "\n".join(
+                f"  {ms:.1f} ms  {sql[:500]}" for ms, sql in sorted(stats.slowest, reverse=True)
+            )
+            logger.warning(
+                "Requete lente %s %s (%s, %s) : %.0f ms, %d requete(s) SQL en %.0f ms, templates %.0f ms\n%s",
+                request.method,
+                request.get_full_path(),
+                view,
+                response.status_code,
+                duration_ms,
+                stats.queries,
+                stats.sql_ms,
+                stats.template_ms,
+                slowest,
+            )
+        return response
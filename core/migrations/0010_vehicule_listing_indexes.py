@@ -0,0 +1,49 @@
+# Generated by Django 5.2.18 on 2026-10-18 09:22
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0009_alter_imagevehicule_id_alter_optionvehicule_id_and_more'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='vehicule',
+            index=models.Index(fields=['ordre_affichage', 'created_at'], name='vehicule_recent_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='vehicule',
+            index=models.Index(fields=['prix'], name='vehicule_prix_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='vehicule',
+            index=models.Index(fields=['annee'], name='vehicule_annee_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='vehicule',
+            index=models.Index(fields=['kilometrage'], name='vehicule_km_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='vehicule',
+            index=models.Index(fields=['marque', 'ordre_affichage', 'created_at'], name='vehicule_marque_recent_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='vehicule',
+            index=models.Index(fields=['marque', 'prix'], name='vehicule_marque_prix_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='vehicule',
+            index=models.Index(fields=['marque', 'annee'], name='vehicule_marque_annee_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='vehicule',
+            index=models.Index(fields=['marque', 'kilometrage'], name='vehicule_marque_km_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='vehicule',
+            index=models.Index(fields=['en_vedette', 'ordre_affichage', 'created_at'], name='vehicule_vedette_idx'),
+        ),
+    ]
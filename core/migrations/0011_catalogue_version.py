@@ -0,0 +1,30 @@
+# Generated by Django 5.2.18 on 2026-10-18 09:23
+
+from django.db import migrations, models
+
+
+def create_version_row(apps, schema_editor):
+    CatalogueVersion = apps.get_model("core", "CatalogueVersion")
+    CatalogueVersion.objects.get_or_create(pk=1)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0010_vehicule_listing_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CatalogueVersion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('version', models.PositiveBigIntegerField(default=1)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Version du catalogue',
+            },
+        ),
+        migrations.RunPython(create_version_row, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 5.2.18 on 2026-10-18 09:41
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0011_catalogue_version'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='imagevehicule',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, default=django.utils.timezone.now),
+            preserve_default=False,
+        ),
+        migrations.AddField(
+            model_name='optionvehicule',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, default=django.utils.timezone.now),
+            preserve_default=False,
+        ),
+    ]
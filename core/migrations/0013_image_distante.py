@@ -0,0 +1,32 @@
+# Generated by Django 5.2.18 on 2026-10-18 10:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0012_option_image_updated_at'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ImageDistante',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('url_hash', models.CharField(max_length=64, unique=True)),
+                ('url', models.URLField(max_length=500)),
+                ('fichier', models.ImageField(blank=True, upload_to='mirror/')),
+                ('statut', models.CharField(choices=[('en_attente', 'En attente'), ('ok', 'Copiée'), ('echec', 'Échec')], default='en_attente', max_length=20)),
+                ('tentatives', models.PositiveSmallIntegerField(default=0)),
+                ('erreur', models.CharField(blank=True, max_length=255)),
+                ('fetched_at', models.DateTimeField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'verbose_name': 'Image distante',
+                'verbose_name_plural': 'Images distantes',
+                'indexes': [models.Index(fields=['statut', 'tentatives'], name='imagedistante_statut_idx')],
+            },
+        ),
+    ]
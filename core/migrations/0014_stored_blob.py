@@ -0,0 +1,35 @@
+# Generated by Django 5.2.18 on 2026-10-18 11:05
+
+import core.models
+import core.storage
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0013_image_distante'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StoredBlob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('chemin', models.CharField(max_length=255, unique=True)),
+                ('sha256', models.CharField(db_index=True, max_length=64)),
+                ('taille', models.PositiveBigIntegerField()),
+                ('references', models.PositiveIntegerField(default=0)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'verbose_name': 'Fichier dédupliqué',
+                'verbose_name_plural': 'Fichiers dédupliqués',
+            },
+        ),
+        migrations.AlterField(
+            model_name='rendezvousfichier',
+            name='fichier',
+            field=models.FileField(storage=core.storage.blob_storage, upload_to=core.models.contact_upload_to),
+        ),
+    ]
@@ -0,0 +1,51 @@
+# Generated by Django 5.2.18 on 2026-10-18 12:20
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0014_stored_blob'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='storedblob',
+            name='analyse',
+            field=models.CharField(choices=[('non_analyse', 'Non analysé'), ('sain', 'Sain'), ('infecte', 'Infecté')], default='non_analyse', max_length=20),
+        ),
+        migrations.AddField(
+            model_name='storedblob',
+            name='analyse_detail',
+            field=models.CharField(blank=True, max_length=255),
+        ),
+        migrations.AddField(
+            model_name='storedblob',
+            name='analyse_le',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.CreateModel(
+            name='Job',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('nom', models.CharField(max_length=100)),
+                ('arguments', models.JSONField(blank=True, default=list)),
+                ('cle', models.CharField(blank=True, help_text='Empreinte des arguments (taches uniques).', max_length=40)),
+                ('statut', models.CharField(choices=[('en_attente', 'En attente'), ('en_cours', 'En cours'), ('termine', 'Terminée'), ('echec', 'Échec')], default='en_attente', max_length=20)),
+                ('tentatives', models.PositiveSmallIntegerField(default=0)),
+                ('disponible_le', models.DateTimeField(default=django.utils.timezone.now)),
+                ('verrou_expire_le', models.DateTimeField(blank=True, null=True)),
+                ('worker', models.CharField(blank=True, max_length=100)),
+                ('erreur', models.TextField(blank=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('termine_le', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'verbose_name': 'Tâche',
+                'verbose_name_plural': 'Tâches',
+                'indexes': [models.Index(fields=['statut', 'disponible_le'], name='job_statut_dispo_idx'), models.Index(fields=['nom', 'cle', 'statut'], name='job_nom_cle_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,89 @@
+# Generated by Django 5.2.18 on 2026-10-18 14:35
+
+import re
+import unicodedata
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+FULLTEXT_INDEXES = (
+    ("vehicule_recherche_entete_ft", "entete"),
+    ("vehicule_recherche_ft", "entete, corps"),
+)
+
+
+def create_fulltext_indexes(apps, schema_editor):
+    """Index FULLTEXT sous MySQL uniquement (ailleurs : index en memoire, core.search)."""
+    if schema_editor.connection.vendor != "mysql":
+        return
+    for name, columns in FULLTEXT_INDEXES:
+        schema_editor.execute(f"CREATE FULLTEXT INDEX {name} ON core_vehiculerecherche ({columns})")
+
+
+def drop_fulltext_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != "mysql":
+        return
+    for name, _ in FULLTEXT_INDEXES:
+        schema_editor.execute(f"DROP INDEX {name} ON core_vehiculerecherche")
+
+
+# Copie figee de core.search.build_texts (texte indexe a la date de la migration)
+STOPWORDS = frozenset(
+    "a au aux avec ce ces dans de des du en et est il la le les l d un une ou par pas "
+    "pour sur sa se son ses the of and".split()
+)
+TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+
+def tokenize(text):
+    text = unicodedata.normalize("NFKD", str(text or "")).casefold()
+    text = "".join(c for c in text if not unicodedata.combining(c))
+    return [token for token in TOKEN_RE.findall(text) if len(token) >= 2 and token not in STOPWORDS]
+
+
+def build_texts(titre, marque, modele, moteur, description, libelles):
+    entete = " ".join(tokenize(f"{titre} {marque} {modele}"))
+    corps = " ".join(tokenize(" ".join([moteur or "", description or "", *libelles])))
+    return entete, corps
+
+
+def fill_search_rows(apps, schema_editor):
+    Vehicule = apps.get_model("core", "Vehicule")
+    OptionVehicule = apps.get_model("core", "OptionVehicule")
+    VehiculeRecherche = apps.get_model("core", "VehiculeRecherche")
+    marques = dict(Vehicule._meta.get_field("marque").choices)
+    libelles = {}
+    for vehicule_id, libelle in OptionVehicule.objects.order_by("ordre", "pk").values_list("vehicule_id", "libelle"):
+        libelles.setdefault(vehicule_id, []).append(libelle)
+    rows = []
+    for pk, titre, marque, modele, moteur, description in Vehicule.objects.values_list(
+        "pk", "titre", "marque", "modele", "moteur", "description"
+    ).iterator():
+        entete, corps = build_texts(titre, marques.get(marque, marque), modele, moteur, description, libelles.get(pk, []))
+        rows.append(VehiculeRecherche(vehicule_id=pk, entete=entete, corps=corps))
+    VehiculeRecherche.objects.bulk_create(rows, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0015_job_queue'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='VehiculeRecherche',
+            fields=[
+                ('vehicule', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='recherche', serialize=False, to='core.vehicule')),
+                ('entete', models.TextField(help_text='Titre, marque et modele.')),
+                ('corps', models.TextField(blank=True, help_text='Moteur, description et options.')),
+                ('updated_at', models.DateTimeField(auto_now=True, db_index=True)),
+            ],
+            options={
+                'verbose_name': 'Index de recherche',
+                'verbose_name_plural': 'Index de recherche',
+            },
+        ),
+        migrations.RunPython(create_fulltext_indexes, drop_fulltext_indexes),
+        migrations.RunPython(fill_search_rows, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,63 @@
+# Generated by Django 5.2.18 on 2026-10-18 15:50
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+COPIED_FIELDS = (
+    "titre", "marque", "modele", "annee", "kilometrage", "prix", "puissance_ch",
+    "image_principale", "image_url", "en_vedette", "ordre_affichage", "created_at",
+)
+
+
+def fill_listing(apps, schema_editor):
+    Vehicule = apps.get_model("core", "Vehicule")
+    OptionVehicule = apps.get_model("core", "OptionVehicule")
+    VehiculeListing = apps.get_model("core", "VehiculeListing")
+    libelles = {}
+    for vehicule_id, libelle in OptionVehicule.objects.order_by("ordre", "pk").values_list("vehicule_id", "libelle"):
+        libelles.setdefault(vehicule_id, []).append(libelle)
+    rows = [
+        VehiculeListing(
+            vehicule_id=vehicule.pk,
+            option_libelles=libelles.get(vehicule.pk, []),
+            **{name: getattr(vehicule, name) for name in COPIED_FIELDS},
+        )
+        for vehicule in Vehicule.objects.only(*COPIED_FIELDS).iterator()
+    ]
+    VehiculeListing.objects.bulk_create(rows, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0016_vehicule_recherche'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='VehiculeListing',
+            fields=[
+                ('vehicule', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='listing', serialize=False, to='core.vehicule')),
+                ('titre', models.CharField(max_length=200)),
+                ('marque', models.CharField(choices=[('ferrari', 'Ferrari'), ('lamborghini', 'Lamborghini'), ('porsche', 'Porsche'), ('mclaren', 'McLaren'), ('bentley', 'Bentley'), ('aston_martin', 'Aston Martin'), ('rolls_royce', 'Rolls-Royce'), ('other', 'Autre')], max_length=50)),
+                ('modele', models.CharField(max_length=120)),
+                ('annee', models.PositiveIntegerField()),
+                ('kilometrage', models.PositiveIntegerField()),
+                ('prix', models.DecimalField(decimal_places=0, max_digits=12)),
+                ('puissance_ch', models.PositiveIntegerField(blank=True, null=True)),
+                ('image_principale', models.ImageField(blank=True, null=True, upload_to='vehicules/')),
+                ('image_url', models.URLField(blank=True, max_length=500)),
+                ('option_libelles', models.JSONField(blank=True, default=list)),
+                ('en_vedette', models.BooleanField(default=False)),
+                ('ordre_affichage', models.PositiveSmallIntegerField(default=0)),
+                ('created_at', models.DateTimeField()),
+                ('synced_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Carte véhicule (liste publique)',
+                'verbose_name_plural': 'Cartes véhicules (liste publique)',
+                'indexes': [models.Index(fields=['ordre_affichage', 'created_at'], name='listing_recent_idx'), models.Index(fields=['prix'], name='listing_prix_idx'), models.Index(fields=['annee'], name='listing_annee_idx'), models.Index(fields=['kilometrage'], name='listing_km_idx'), models.Index(fields=['marque', 'ordre_affichage', 'created_at'], name='listing_marque_recent_idx'), models.Index(fields=['marque', 'prix'], name='listing_marque_prix_idx'), models.Index(fields=['marque', 'annee'], name='listing_marque_annee_idx'), models.Index(fields=['marque', 'kilometrage'], name='listing_marque_km_idx'), models.Index(fields=['en_vedette', 'ordre_affichage', 'created_at'], name='listing_vedette_idx')],
+            },
+        ),
+        migrations.RunPython(fill_listing, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,214 @@
+"""Copie locale des images externes (image_url, placeholders) sous MEDIA_ROOT.
+
+Les URL sont enregistrees « en attente » a la sauvegarde des vehicules, puis
+telechargees en parallele par ``mirror_pending()`` (commande
+mirror_external_images), avec timeout et taille maximale. Chaque copie recoit
+les memes declinaisons srcset que les uploads (core.images). Les templates
+passent par ``local_name()`` (les vues chargent d'abord, en une requete, les
+copies des images de la page avec ``local_names()``) : tant qu'une image n'est
+pas copiee (ou si la copie a echoue), l'URL d'origine reste utilisee.
+"""
+
+import hashlib
+import http.client
+import logging
+import threading
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+from urllib.error import URLError
+from urllib.parse import quote, urlsplit
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db.models import Q
+from django.utils import timezone
+from PIL import Image, UnidentifiedImageError
+
+from . import catalogue, images, jobs
+from .models import ImageDistante, ImageVehicule, Vehicule
+
+logger = logging.getLogger(__name__)
+
+SCHEMES = ("http", "https")
+EXTENSIONS = {"JPEG": "jpg", "PNG": "png", "WEBP": "webp", "GIF": "gif", "AVIF": "avif"}
+PLACEHOLDER_URL = "https://placehold.co/{size}/2B2F34/BFC3C9?text={text}"
+
+
+class MirrorError(Exception):
+    pass
+
+
+def url_hash(url) -> str:
+    return hashlib.sha256(url.encode()).hexdigest()
+
+
+def _check_scheme(url):
+    scheme = urlsplit(url).scheme.lower()
+    if scheme not in SCHEMES:
+        raise MirrorError(f"schema {scheme or '(aucun)'} refuse : {url}"[:255])
+
+
+class _RedirectHandler(urllib.request.HTTPRedirectHandler):
+    """Redirections vers http / https uniquement (urllib accepte aussi ftp)."""
+
+    def redirect_request(self, req, fp, code, msg, headers, newurl):
+        _check_scheme(newurl)
+        return super().redirect_request(req, fp, code, msg, headers, newurl)
+
+
+def fetch(url, timeout=None, max_bytes=None, opener=None):
+    """Telecharge une image ; leve MirrorError si invalide, trop lourde ou injoignable.
+
+    Seules les URL http / https sont ouvertes (ni file:, ni ftp:, ni data:).
+    """
+    _check_scheme(url)
+    timeout = timeout or settings.MIRROR_FETCH_TIMEOUT
+    max_bytes = max_bytes or settings.MIRROR_MAX_BYTES
+    opener = opener or urllib.request.build_opener(_RedirectHandler)
+    request = urllib.request.Request(url, headers={"User-Agent": "luxora-mirror/1.0"})
+    try:
+        with opener.open(request, timeout=timeout) as response:
+            content_type = response.headers.get_content_type()
+            if not content_type.startswith("image/"):
+                raise MirrorError(f"type de contenu {content_type}")
+            length = response.headers.get("Content-Length")
+            if length and length.isdigit() and int(length) > max_bytes:
+                raise MirrorError(f"{length} octets > {max_bytes}")
+            data = response.read(max_bytes + 1)
+    except (URLError, OSError, ValueError, http.client.HTTPException) as exc:
+        # HTTPException : IncompleteRead (connexion coupee en cours de lecture)...
+        raise MirrorError(str(exc) or type(exc).__name__) from exc
+    if len(data) > max_bytes:
+        raise MirrorError(f"plus de {max_bytes} octets")
+    try:
+        with Image.open(BytesIO(data)) as image:
+            fmt = image.format
+            image.verify()
+    except (UnidentifiedImageError, OSError, SyntaxError, Image.DecompressionBombError) as exc:
+        # verify() leve SyntaxError sur un fichier tronque ; bombe : trop de pixels
+        raise MirrorError(f"image illisible ({exc})"[:255]) from exc
+    return data, EXTENSIONS.get(fmt, "img")
+
+
+def _download(entry):
+    """Execute dans un thread : reseau + stockage, sans acces a la base."""
+    try:
+        data, ext = fetch(entry.url)
+        name = f"mirror/{entry.url_hash[:2]}/{entry.url_hash}.{ext}"
+        if default_storage.exists(name):
+            default_storage.delete(name)
+        name = default_storage.save(name, ContentFile(data))
+    except MirrorError as exc:
+        return entry, None, str(exc)[:255]
+    except Exception as exc:  # une entree en erreur ne doit pas interrompre les autres
+        logger.exception("Copie impossible de %s", entry.url)
+        return entry, None, f"{type(exc).__name__}: {exc}"[:255]
+    try:
+        images.generate_derivatives(name)
+    except Exception:
+        logger.exception("Declinaisons impossibles pour %s", name)
+    return entry, name, ""
+
+
+def register(urls):
+    """Enregistre des URL externes a copier (ignore celles deja connues)."""
+    entries = {url_hash(url): url for url in urls if url}
+    known = set(
+        ImageDistante.objects.filter(url_hash__in=entries).values_list("url_hash", flat=True)
+    )
+    created = ImageDistante.objects.bulk_create(
+        [ImageDistante(url_hash=h, url=u) for h, u in entries.items() if h not in known],
+        ignore_conflicts=True,
+    )
+    if created:
+        jobs.enqueue("mirror.pending", unique=True)
+
+
+def vehicule_urls(vehicule):
+    """Images externes affichees pour un vehicule sans fichier uploade."""
+    if vehicule.image_principale:
+        return []
+    if vehicule.image_url:
+        return [vehicule.image_url]
+    return [placeholder_url(vehicule.modele, "600x375"), placeholder_url(vehicule.titre, "1200x800")]
+
+
+def catalogue_urls():
+    """Toutes les images externes affichees par le site public."""
+    urls = set()
+    for vehicule in Vehicule.objects.only("titre", "modele", "image_url", "image_principale").iterator():
+        urls.update(vehicule_urls(vehicule))
+    urls.update(
+        ImageVehicule.objects.filter(Q(image="") | Q(image__isnull=True))
+        .exclude(image_url="")
+        .values_list("image_url", flat=True)
+    )
+    return urls
+
+
+def mirror_pending(workers=None, limit=None):
+    """Telecharge les images en attente ; retourne (copiees, echecs)."""
+    queryset = ImageDistante.objects.exclude(statut="ok").filter(
+        tentatives__lt=settings.MIRROR_MAX_ATTEMPTS
+    ).order_by("created_at")
+    entries = list(queryset[:limit] if limit else queryset)
+    ok = failed = 0
+    with ThreadPoolExecutor(max_workers=workers or settings.MIRROR_WORKERS) as pool:
+        for entry, name, error in pool.map(_download, entries):
+            entry.tentatives += 1
+            if name:
+                entry.fichier.name = name
+                entry.statut = "ok"
+                entry.erreur = ""
+                entry.fetched_at = timezone.now()
+                ok += 1
+            else:
+                entry.statut = "echec"
+                entry.erreur = error
+                failed += 1
+                logger.warning("Copie impossible de %s : %s", entry.url, error)
+            entry.save(update_fields=["fichier", "statut", "erreur", "tentatives", "fetched_at"])
+    if ok:
+        # Les pages en cache pointent encore vers les URL externes
+        catalogue.bump_version()
+    return ok, failed
+
+
+# url_hash -> nom de la copie (None : pas de copie), pour la version courante du catalogue
+_local_names = {"version": None, "names": {}}
+_local_names_lock = threading.Lock()
+
+
+def local_names(urls):
+    """Charge en une requete les copies locales de ``urls`` (images de la page a afficher).
+
+    Seules les URL pas encore connues pour la version courante du catalogue
+    sont lues en base.
+    """
+    version = catalogue.get_version()
+    with _local_names_lock:
+        if _local_names["version"] != version:
+            _local_names.update(version=version, names={})
+        names = _local_names["names"]
+        missing = {url_hash(url) for url in urls if url} - names.keys()
+    if missing:
+        found = dict(
+            ImageDistante.objects.filter(statut="ok", url_hash__in=missing).values_list("url_hash", "fichier")
+        )
+        with _local_names_lock:
+            names.update({h: found.get(h) for h in missing})
+    return names
+
+
+def local_name(url):
+    """Nom de la copie locale de ``url`` dans le stockage, ou None si non copiee."""
+    if not url:
+        return None
+    return local_names([url]).get(url_hash(url))
+
+
+def placeholder_url(text, size):
+    """URL placehold.co affichee quand un vehicule n'a aucune image."""
+    return PLACEHOLDER_URL.format(size=size, text=quote(str(text or ""), safe=""))
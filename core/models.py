@@ -1,4 +1,7 @@
 from django.db import models
+from django.utils import timezone
+
+from .storage import blob_storage
 
 
 class Vehicule(models.Model):
@@ -40,10 +43,30 @@ class Vehicule(models.Model):
         ordering = ["-ordre_affichage", "-created_at"]
         verbose_name = "Véhicule"
         verbose_name_plural = "Véhicules"
+        # Un index par tri de la liste publique (core.listing.SORTS), seul ou
+        # precede de la marque pour les filtres marque__in. La cle primaire
+        # est incluse implicitement (InnoDB / rowid SQLite) : elle sert de
+        # departage au curseur.
+        indexes = [
+            models.Index(fields=["ordre_affichage", "created_at"], name="vehicule_recent_idx"),
+            models.Index(fields=["prix"], name="vehicule_prix_idx"),
+            models.Index(fields=["annee"], name="vehicule_annee_idx"),
+            models.Index(fields=["kilometrage"], name="vehicule_km_idx"),
+            models.Index(fields=["marque", "ordre_affichage", "created_at"], name="vehicule_marque_recent_idx"),
+            models.Index(fields=["marque", "prix"], name="vehicule_marque_prix_idx"),
+            models.Index(fields=["marque", "annee"], name="vehicule_marque_annee_idx"),
+            models.Index(fields=["marque", "kilometrage"], name="vehicule_marque_km_idx"),
+            models.Index(fields=["en_vedette", "ordre_affichage", "created_at"], name="vehicule_vedette_idx"),
+        ]
 
     def __str__(self):
         return f"{self.titre} ({self.annee})"
 
+    @property
+    def option_libelles(self):
+        """Libelles des options (cartes) ; meme attribut que VehiculeListing."""
+        return [option.libelle for option in self.options.all()]
+
 
 class OptionVehicule(models.Model):
     """Option / équipement du véhicule (liste libre, une entrée par ligne)."""
@@ -51,6 +74,7 @@ class OptionVehicule(models.Model):
     vehicule = models.ForeignKey(Vehicule, on_delete=models.CASCADE, related_name="options")
     libelle = models.CharField(max_length=200, verbose_name="Option")
     ordre = models.PositiveSmallIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         ordering = ["ordre"]
@@ -74,6 +98,7 @@ class ImageVehicule(models.Model):
     )
     legende = models.CharField(max_length=120, blank=True)
     ordre = models.PositiveSmallIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         ordering = ["ordre"]
@@ -131,7 +156,7 @@ class RendezVousFichier(models.Model):
     rendez_vous = models.ForeignKey(
         RendezVous, on_delete=models.CASCADE, related_name="fichiers"
     )
-    fichier = models.FileField(upload_to=contact_upload_to)
+    fichier = models.FileField(upload_to=contact_upload_to, storage=blob_storage)
 
     class Meta:
         verbose_name = "Pièce jointe"
@@ -139,3 +164,172 @@ class RendezVousFichier(models.Model):
 
     def __str__(self):
         return self.fichier.name
+
+
+class CatalogueVersion(models.Model):
+    """Compteur unique (pk=1) incremente a chaque modification du catalogue.
+
+    Partage par les 3 applications via la base : chacune prefixe ses caches
+    avec cette version, sans bus de diffusion entre processus.
+    """
+
+    version = models.PositiveBigIntegerField(default=1)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = "Version du catalogue"
+
+    def __str__(self):
+        return f"Catalogue v{self.version}"
+
+
+class ImageDistante(models.Model):
+    """Copie locale d'une image externe (image_url, placeholder), voir core.mirror."""
+
+    STATUT_CHOICES = [
+        ("en_attente", "En attente"),
+        ("ok", "Copiée"),
+        ("echec", "Échec"),
+    ]
+
+    url_hash = models.CharField(max_length=64, unique=True)
+    url = models.URLField(max_length=500)
+    fichier = models.ImageField(upload_to="mirror/", blank=True)
+    statut = models.CharField(max_length=20, choices=STATUT_CHOICES, default="en_attente")
+    tentatives = models.PositiveSmallIntegerField(default=0)
+    erreur = models.CharField(max_length=255, blank=True)
+    fetched_at = models.DateTimeField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        verbose_name = "Image distante"
+        verbose_name_plural = "Images distantes"
+        indexes = [models.Index(fields=["statut", "tentatives"], name="imagedistante_statut_idx")]
+
+    def __str__(self):
+        return self.url
+
+
+class StoredBlob(models.Model):
+    """Fichier stocke une seule fois par contenu (core.storage.ContentAddressedStorage)."""
+
+    ANALYSE_CHOICES = [
+        ("non_analyse", "Non analysé"),
+        ("sain", "Sain"),
+        ("infecte", "Infecté"),
+    ]
+
+    chemin = models.CharField(max_length=255, unique=True)
+    sha256 = models.CharField(max_length=64, db_index=True)
+    taille = models.PositiveBigIntegerField()
+    references = models.PositiveIntegerField(default=0)
+    analyse = models.CharField(max_length=20, choices=ANALYSE_CHOICES, default="non_analyse")
+    analyse_detail = models.CharField(max_length=255, blank=True)
+    analyse_le = models.DateTimeField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        verbose_name = "Fichier dédupliqué"
+        verbose_name_plural = "Fichiers dédupliqués"
+
+    def __str__(self):
+        return f"{self.chemin} ({self.references} ref.)"
+
+
+class Job(models.Model):
+    """Tache differee de la file en base (core.jobs), executee par ``run_jobs``."""
+
+    STATUT_CHOICES = [
+        ("en_attente", "En attente"),
+        ("en_cours", "En cours"),
+        ("termine", "Terminée"),
+        ("echec", "Échec"),
+    ]
+
+    nom = models.CharField(max_length=100)
+    arguments = models.JSONField(default=list, blank=True)
+    cle = models.CharField(max_length=40, blank=True, help_text="Empreinte des arguments (taches uniques).")
+    statut = models.CharField(max_length=20, choices=STATUT_CHOICES, default="en_attente")
+    tentatives = models.PositiveSmallIntegerField(default=0)
+    disponible_le = models.DateTimeField(default=timezone.now)
+    verrou_expire_le = models.DateTimeField(null=True, blank=True)
+    worker = models.CharField(max_length=100, blank=True)
+    erreur = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    termine_le = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        verbose_name = "Tâche"
+        verbose_name_plural = "Tâches"
+        indexes = [
+            models.Index(fields=["statut", "disponible_le"], name="job_statut_dispo_idx"),
+            models.Index(fields=["nom", "cle", "statut"], name="job_nom_cle_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.nom} #{self.pk} ({self.get_statut_display()})"
+
+
+class VehiculeRecherche(models.Model):
+    """Texte normalise (minuscules, sans accents) d'un vehicule, indexe pour la recherche
+    (core.search) : index FULLTEXT sous MySQL, index inverse en memoire sinon."""
+
+    vehicule = models.OneToOneField(
+        Vehicule, on_delete=models.CASCADE, primary_key=True, related_name="recherche"
+    )
+    entete = models.TextField(help_text="Titre, marque et modele.")
+    corps = models.TextField(blank=True, help_text="Moteur, description et options.")
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
+
+    class Meta:
+        verbose_name = "Index de recherche"
+        verbose_name_plural = "Index de recherche"
+
+    def __str__(self):
+        return self.entete
+
+
+class VehiculeListing(models.Model):
+    """Carte d'un vehicule telle qu'affichee par la liste publique et l'accueil
+    (core.read_model) : une ligne = une carte, sans jointure ni prefetch.
+
+    Copie de ``Vehicule`` tenue a jour par les signaux ; memes noms de champs
+    pour que les filtres, tris et curseurs de core.listing s'y appliquent tels quels.
+    """
+
+    vehicule = models.OneToOneField(
+        Vehicule, on_delete=models.CASCADE, primary_key=True, related_name="listing"
+    )
+    titre = models.CharField(max_length=200)
+    marque = models.CharField(max_length=50, choices=Vehicule.MARQUES)
+    modele = models.CharField(max_length=120)
+    annee = models.PositiveIntegerField()
+    kilometrage = models.PositiveIntegerField()
+    prix = models.DecimalField(max_digits=12, decimal_places=0)
+    puissance_ch = models.PositiveIntegerField(null=True, blank=True)
+    image_principale = models.ImageField(upload_to="vehicules/", blank=True, null=True)
+    image_url = models.URLField(max_length=500, blank=True)
+    option_libelles = models.JSONField(default=list, blank=True)
+    en_vedette = models.BooleanField(default=False)
+    ordre_affichage = models.PositiveSmallIntegerField(default=0)
+    created_at = models.DateTimeField()
+    synced_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = "Carte véhicule (liste publique)"
+        verbose_name_plural = "Cartes véhicules (liste publique)"
+        # Memes index que Vehicule (un par tri de core.listing.SORTS)
+        indexes = [
+            models.Index(fields=["ordre_affichage", "created_at"], name="listing_recent_idx"),
+            models.Index(fields=["prix"], name="listing_prix_idx"),
+            models.Index(fields=["annee"], name="listing_annee_idx"),
+            models.Index(fields=["kilometrage"], name="listing_km_idx"),
+            models.Index(fields=["marque", "ordre_affichage", "created_at"], name="listing_marque_recent_idx"),
+            models.Index(fields=["marque", "prix"], name="listing_marque_prix_idx"),
+            models.Index(fields=["marque", "annee"], name="listing_marque_annee_idx"),
+            models.Index(fields=["marque", "kilometrage"], name="listing_marque_km_idx"),
+            models.Index(fields=["en_vedette", "ordre_affichage", "created_at"], name="listing_vedette_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.titre} ({self.annee})"
@@ -0,0 +1,191 @@
+"""Mesures par requete (core.middleware.PerfMiddleware) et agregats par vue.
+
+Pour chaque requete : duree totale, requetes SQL (nombre, temps cumule via
+un ``execute_wrapper`` de chaque connexion, les plus lentes), temps de rendu des
+templates et taille de la reponse. Les mesures sont gardees par vue resolue
+(``vehicule_list``, ``cms_document_list``…) dans le processus, sur les
+PERF_SAMPLES dernieres requetes, et exposees en percentiles sur ``/_perf/``
+(liste blanche Tailscale). Chaque processus gunicorn a ses propres agregats.
+"""
+
+import contextvars
+import heapq
+import math
+import os
+import threading
+import time
+from collections import defaultdict, deque
+
+from django.conf import settings
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.http import JsonResponse
+from django.urls import path
+from django.utils import timezone
+from django.utils.decorators import decorator_from_middleware
+from django.views.decorators.cache import never_cache
+
+from .middleware import TailscaleAdminMiddleware
+
+METRICS = ("duree_ms", "sql_ms", "requetes", "templates_ms", "taille")
+PERCENTILES = (50, 90, 99)
+# Requetes SQL gardees pour le journal des requetes lentes
+SLOWEST_QUERIES = 5
+
+_current = contextvars.ContextVar("perf_request", default=None)
+
+
+class RequestStats:
+    """Compteurs d'une requete HTTP en cours."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.queries = 0
+        self.sql_ms = 0.0
+        self.slowest = []  # tas (ms, sql) des plus lentes
+        self.template_ms = 0.0
+        self.template_depth = 0
+
+    def record_query(self, sql, ms):
+        self.queries += 1
+        self.sql_ms += ms
+        item = (ms, sql)
+        if len(self.slowest) < SLOWEST_QUERIES:
+            heapq.heappush(self.slowest, item)
+        elif ms > self.slowest[0][0]:
+            heapq.heapreplace(self.slowest, item)
+
+    @property
+    def elapsed_ms(self):
+        return (time.perf_counter() - self.started) * 1000
+
+
+def start():
+    """Ouvre les compteurs de la requete courante ; retourne (stats, jeton pour stop())."""
+    stats = RequestStats()
+    return stats, _current.set(stats)
+
+
+def stop(token):
+    _current.reset(token)
+
+
+def sql_timer(execute, sql, params, many, context):
+    """``connection.execute_wrapper`` : chronometre chaque requete SQL."""
+    stats = _current.get()
+    if stats is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        stats.record_query(sql, (time.perf_counter() - started) * 1000)
+
+
+def _add_sql_timer(connection, **kwargs):
+    if sql_timer not in connection.execute_wrappers:
+        # En tete de liste : les ``with connection.execute_wrapper()`` retirent le dernier
+        connection.execute_wrappers.insert(0, sql_timer)
+
+
+def install_sql_timer():
+    """Ajoute sql_timer a chaque connexion, a sa creation (signal connection_created).
+
+    Les connexions sont propres a chaque thread : une vue asynchrone execute ses
+    requetes dans les threads de sync_to_async, ou la requete HTTP courante
+    (contextvar) est retrouvee.
+    """
+    connection_created.connect(_add_sql_timer, dispatch_uid="core.perf.sql_timer")
+    for connection in connections.all(initialized_only=True):
+        _add_sql_timer(connection)
+
+
+# ---------- rendu des templates ----------
+
+_template_timer_installed = False
+
+
+def install_template_timer():
+    """Chronometre Template.render (le niveau le plus externe seulement : les
+    {% include %} sont comptes dans le template qui les contient)."""
+    global _template_timer_installed
+    if _template_timer_installed:
+        return
+    from django.template.base import Template
+
+    render = Template.render
+
+    def timed_render(self, context):
+        stats = _current.get()
+        if stats is None:
+            return render(self, context)
+        stats.template_depth += 1
+        started = time.perf_counter()
+        try:
+            return render(self, context)
+        finally:
+            stats.template_depth -= 1
+            if stats.template_depth == 0:
+                stats.template_ms += (time.perf_counter() - started) * 1000
+
+    Template.render = timed_render
+    _template_timer_installed = True
+
+
+# ---------- agregats par vue ----------
+
+_samples = defaultdict(lambda: deque(maxlen=settings.PERF_SAMPLES))
+_samples_lock = threading.Lock()
+_since = timezone.now()
+
+
+def record(view, stats, duration_ms, size):
+    sample = (duration_ms, stats.sql_ms, stats.queries, stats.template_ms, size)
+    with _samples_lock:
+        _samples[view].append(sample)
+
+
+def percentile(values, p):
+    """Percentile au rang le plus proche d'une liste triee."""
+    if not values:
+        return None
+    rank = min(len(values), max(1, math.ceil(p / 100 * len(values)))) - 1
+    return values[rank]
+
+
+def snapshot():
+    """{vue: {"requetes_http": n, metrique: {"p50": …, "p90": …, "p99": …, "max": …}}}."""
+    with _samples_lock:
+        samples = {view: list(values) for view, values in _samples.items()}
+    result = {}
+    for view, values in sorted(samples.items()):
+        entry = {"requetes_http": len(values)}
+        for index, metric in enumerate(METRICS):
+            column = sorted(v[index] for v in values if v[index] is not None)
+            entry[metric] = {f"p{p}": _round(percentile(column, p)) for p in PERCENTILES}
+            entry[metric]["max"] = _round(column[-1]) if column else None
+        result[view] = entry
+    return result
+
+
+def reset():
+    with _samples_lock:
+        _samples.clear()
+
+
+def _round(value):
+    return round(value, 2) if isinstance(value, float) else value
+
+
+@never_cache
+@decorator_from_middleware(TailscaleAdminMiddleware)
+def stats_view(request):
+    """Percentiles par vue du processus qui repond (JSON)."""
+    return JsonResponse(
+        {"pid": os.getpid(), "depuis": _since.isoformat(), "echantillons": settings.PERF_SAMPLES, "vues": snapshot()},
+        json_dumps_params={"indent": 2},
+    )
+
+
+def urlpatterns():
+    return [path("_perf/", stats_view, name="perf_stats")]
@@ -0,0 +1,122 @@
+"""Table de lecture ``VehiculeListing`` : les cartes de la liste publique et de
+l'accueil, denormalisees (champs du vehicule + libelles des options).
+
+Tenue a jour par les signaux (core.signals) et l'import du catalogue ;
+``manage.py rebuild_vehicule_listing`` la reconstruit,
+``manage.py check_vehicule_listing`` la compare aux vehicules.
+"""
+
+from collections import defaultdict
+
+from django.db import connection, transaction
+
+from . import catalogue
+from .models import OptionVehicule, Vehicule, VehiculeListing
+
+# Champs recopies tels quels depuis Vehicule
+COPIED_FIELDS = (
+    "titre",
+    "marque",
+    "modele",
+    "annee",
+    "kilometrage",
+    "prix",
+    "puissance_ch",
+    "image_principale",
+    "image_url",
+    "en_vedette",
+    "ordre_affichage",
+    "created_at",
+)
+COMPARED_FIELDS = (*COPIED_FIELDS, "option_libelles")
+
+
+def _libelles(pks):
+    libelles = defaultdict(list)
+    rows = OptionVehicule.objects.filter(vehicule_id__in=pks).order_by("ordre", "pk")
+    for vehicule_id, libelle in rows.values_list("vehicule_id", "libelle"):
+        libelles[vehicule_id].append(libelle)
+    return libelles
+
+
+def build_rows(pks):
+    """Lignes attendues pour les vehicules ``pks`` (deux requetes)."""
+    libelles = _libelles(pks)
+    return [
+        VehiculeListing(
+            vehicule_id=vehicule.pk,
+            option_libelles=libelles[vehicule.pk],
+            **{name: getattr(vehicule, name) for name in COPIED_FIELDS},
+        )
+        for vehicule in Vehicule.objects.filter(pk__in=pks).only(*COPIED_FIELDS)
+    ]
+
+
+def refresh(pks):
+    """Recalcule les cartes des vehicules ``pks`` (les vehicules supprimes disparaissent).
+
+    Ecriture par upsert : la carte ne disparait jamais de la liste pendant le
+    recalcul, et deux recalculs simultanes du meme vehicule ne se heurtent pas
+    sur la cle primaire.
+    """
+    pks = set(pks)
+    if not pks:
+        return
+    rows = build_rows(pks)
+    conflicts = {"update_conflicts": True, "update_fields": [*COMPARED_FIELDS, "synced_at"]}
+    if connection.features.supports_update_conflicts_with_target:
+        conflicts["unique_fields"] = ["vehicule"]  # MySQL : ON DUPLICATE KEY, sans cible
+    with transaction.atomic():
+        VehiculeListing.objects.filter(vehicule_id__in=pks).exclude(
+            vehicule_id__in=[row.vehicule_id for row in rows]
+        ).delete()
+        VehiculeListing.objects.bulk_create(rows, **conflicts)
+
+
+def refresh_on_commit(pk):
+    """Apres commit : une suppression en cascade a alors fini d'effacer le vehicule.
+    Un seul recalcul par transaction, pour tous les vehicules modifies."""
+    catalogue.on_commit_batch("read_model.refresh", [pk], refresh)
+
+
+def _batches(batch_size):
+    ids = list(Vehicule.objects.order_by("pk").values_list("pk", flat=True))
+    for start in range(0, len(ids), batch_size):
+        yield ids[start : start + batch_size], len(ids)
+
+
+def rebuild(batch_size=1000, progress=None):
+    """Reconstruit toute la table ; retourne le nombre de cartes."""
+    count = 0
+    for pks, total in _batches(batch_size):
+        with transaction.atomic():
+            refresh(pks)
+        count += len(pks)
+        if progress:
+            progress(count, total)
+    return count
+
+
+def _value(row, name):
+    value = getattr(row, name)
+    if name == "image_principale":
+        return value.name or None
+    return value
+
+
+def check(batch_size=1000):
+    """Ecarts entre la table et les vehicules : (manquants, en trop, {pk: [champs]})."""
+    missing, stale = [], {}
+    for pks, _ in _batches(batch_size):
+        stored = VehiculeListing.objects.in_bulk(pks)
+        for expected in build_rows(pks):
+            row = stored.get(expected.pk)
+            if row is None:
+                missing.append(expected.pk)
+                continue
+            fields = [name for name in COMPARED_FIELDS if _value(row, name) != _value(expected, name)]
+            if fields:
+                stale[expected.pk] = fields
+    # Cascade en base : une carte sans vehicule ne devrait pas exister
+    extra = list(VehiculeListing.objects.exclude(vehicule__in=Vehicule.objects.all()).values_list("pk", flat=True))
+    return missing, extra, stale
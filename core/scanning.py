@@ -0,0 +1,63 @@
+"""Analyse antivirus des fichiers dedupliques (core.storage), en tache de fond.
+
+UPLOAD_SCANNER designe une fonction ``scanner(chemin_absolu)`` qui retourne
+None si le fichier est sain, ou le nom de la menace detectee ; une exception
+(scanner injoignable…) laisse la tache echouer pour etre reessayee.
+Un blob infecte n'est plus servi (core.serving).
+"""
+
+import socket
+import struct
+
+from django.conf import settings
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from .models import StoredBlob
+from .storage import blob_storage
+
+CLAMD_CHUNK_SIZE = 64 * 1024
+
+
+def scanner_enabled():
+    return bool(settings.UPLOAD_SCANNER)
+
+
+def scan_blob(chemin):
+    """Analyse le blob ``chemin`` et enregistre le resultat."""
+    blob = StoredBlob.objects.filter(chemin=chemin).first()
+    if blob is None or not scanner_enabled():
+        return  # supprime entre-temps, ou analyse desactivee
+    threat = import_string(settings.UPLOAD_SCANNER)(blob_storage().path(chemin))
+    StoredBlob.objects.filter(pk=blob.pk).update(
+        analyse="infecte" if threat else "sain",
+        analyse_detail=(threat or "")[:255],
+        analyse_le=timezone.now(),
+    )
+
+
+def is_infected(chemin):
+    return StoredBlob.objects.filter(chemin=chemin, analyse="infecte").exists()
+
+
+def clamd_scan(path):
+    """Scanner ClamAV (clamd, commande INSTREAM sur CLAMD_HOST:CLAMD_PORT)."""
+    with socket.create_connection((settings.CLAMD_HOST, settings.CLAMD_PORT), timeout=60) as sock:
+        sock.sendall(b"zINSTREAM\0")
+        with open(path, "rb") as fh:
+            for chunk in iter(lambda: fh.read(CLAMD_CHUNK_SIZE), b""):
+                sock.sendall(struct.pack("!L", len(chunk)) + chunk)
+        sock.sendall(struct.pack("!L", 0))
+        reply = b""
+        while not reply.endswith(b"\0"):
+            data = sock.recv(4096)
+            if not data:
+                break
+            reply += data
+    # "stream: OK" ou "stream: Eicar-Signature FOUND"
+    result = reply.rstrip(b"\0").decode(errors="replace").partition(": ")[2]
+    if result.endswith(" FOUND"):
+        return result[: -len(" FOUND")]
+    if result != "OK":
+        raise OSError(f"Reponse clamd inattendue : {result or reply!r}")
+    return None
@@ -0,0 +1,305 @@
+"""Recherche plein texte sur les vehicules (titre, marque, modele, moteur,
+description, options).
+
+Chaque vehicule a une ligne ``VehiculeRecherche`` : texte normalise en
+minuscules, sans accents (« Huracán » -> « huracan ») ni mots vides, mise a
+jour par les signaux (core.signals) ou ``manage.py rebuild_search_index``.
+
+- MySQL : index FULLTEXT (migration 0016), mode booleen, chaque mot en
+  prefixe (``+hura*``) ; le titre / modele compte double dans le score.
+- Autres moteurs (SQLite en developpement et tests) : index inverse en
+  memoire, meme normalisation et meme ponderation (tf-idf).
+
+L'autocompletion passe toujours par l'index en memoire (recherche
+dichotomique dans le vocabulaire trie) : quelques millisecondes, sans
+requete SQL tant que le catalogue ne change pas.
+"""
+
+import bisect
+import heapq
+import math
+import re
+import threading
+import unicodedata
+from collections import Counter, defaultdict
+from datetime import timedelta
+
+from django.db import connection, transaction
+from django.db.models.expressions import RawSQL
+from django.utils import timezone
+
+from . import catalogue
+from .models import OptionVehicule, Vehicule, VehiculeRecherche
+
+STOPWORDS = frozenset(
+    "a au aux avec ce ces dans de des du en et est il la le les l d un une ou par pas "
+    "pour sur sa se son ses the of and".split()
+)
+MIN_TOKEN_LENGTH = 2
+# Poids des mots du titre / modele / marque face a ceux du corps
+ENTETE_WEIGHT = 2
+# Mots du vocabulaire essayes pour le prefixe en cours de saisie
+MAX_PREFIX_EXPANSIONS = 50
+# Marge de relecture des lignes modifiees (transactions validees apres coup)
+SYNC_MARGIN = timedelta(seconds=5)
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+
+def normalize(text):
+    """Minuscules sans accents : « Huracán EVO » -> « huracan evo »."""
+    text = unicodedata.normalize("NFKD", str(text or "")).casefold()
+    return "".join(c for c in text if not unicodedata.combining(c))
+
+
+def tokenize(text):
+    return [
+        token
+        for token in _TOKEN_RE.findall(normalize(text))
+        if len(token) >= MIN_TOKEN_LENGTH and token not in STOPWORDS
+    ]
+
+
+def build_texts(titre, marque, modele, moteur, description, libelles):
+    """(entete, corps) normalises d'un vehicule ; ``marque`` est le libelle affiche."""
+    entete = " ".join(tokenize(f"{titre} {marque} {modele}"))
+    corps = " ".join(tokenize(" ".join([moteur or "", description or "", *libelles])))
+    return entete, corps
+
+
+# ---------- mise a jour ----------
+
+
+def reindex(pks):
+    """Recalcule la ligne de recherche des vehicules ``pks``."""
+    pks = set(pks)
+    if not pks:
+        return
+    libelles = defaultdict(list)
+    for vehicule_id, libelle in (
+        OptionVehicule.objects.filter(vehicule_id__in=pks).order_by("ordre", "pk").values_list("vehicule_id", "libelle")
+    ):
+        libelles[vehicule_id].append(libelle)
+    rows = []
+    for vehicule in Vehicule.objects.filter(pk__in=pks).only(
+        "titre", "marque", "modele", "moteur", "description"
+    ):
+        entete, corps = build_texts(
+            vehicule.titre,
+            vehicule.get_marque_display(),
+            vehicule.modele,
+            vehicule.moteur,
+            vehicule.description,
+            libelles[vehicule.pk],
+        )
+        rows.append(VehiculeRecherche(vehicule_id=vehicule.pk, entete=entete, corps=corps, updated_at=timezone.now()))
+    # Supprimer puis reinserer : bien plus rapide qu'un bulk_update (CASE WHEN par ligne)
+    with transaction.atomic():
+        VehiculeRecherche.objects.filter(vehicule_id__in=pks).delete()
+        VehiculeRecherche.objects.bulk_create(rows)
+
+
+def reindex_on_commit(pk):
+    """Apres commit : une suppression en cascade a alors fini d'effacer le vehicule.
+    Une seule reindexation par transaction, pour tous les vehicules modifies."""
+    catalogue.on_commit_batch("search.reindex", [pk], reindex)
+
+
+def rebuild(batch_size=1000, progress=None):
+    """Reconstruit toutes les lignes ; retourne le nombre de vehicules indexes."""
+    ids = list(Vehicule.objects.order_by("pk").values_list("pk", flat=True))
+    for start in range(0, len(ids), batch_size):
+        reindex(ids[start : start + batch_size])
+        if progress:
+            progress(min(start + batch_size, len(ids)), len(ids))
+    return len(ids)
+
+
+# ---------- index en memoire ----------
+
+
+class InvertedIndex:
+    """Mot -> {vehicule: poids}, vocabulaire trie pour les prefixes."""
+
+    def __init__(self):
+        self.postings = defaultdict(dict)
+        self.documents = {}  # pk -> (titre, mots)
+        self._vocabulary = None
+
+    def add(self, pk, titre, entete, corps):
+        self.remove(pk)
+        weights = Counter()
+        for token in entete.split():
+            weights[token] += ENTETE_WEIGHT
+        for token in corps.split():
+            weights[token] += 1
+        for token, weight in weights.items():
+            self.postings[token][pk] = weight
+        self.documents[pk] = (titre, tuple(weights))
+        self._vocabulary = None
+
+    def remove(self, pk):
+        document = self.documents.pop(pk, None)
+        if document is None:
+            return
+        for token in document[1]:
+            postings = self.postings.get(token)
+            if postings is not None:
+                postings.pop(pk, None)
+                if not postings:
+                    del self.postings[token]
+        self._vocabulary = None
+
+    def vocabulary(self):
+        if self._vocabulary is None:
+            self._vocabulary = sorted(self.postings)
+        return self._vocabulary
+
+    def expand(self, prefix):
+        vocabulary = self.vocabulary()
+        start = bisect.bisect_left(vocabulary, prefix)
+        terms = []
+        for term in vocabulary[start : start + MAX_PREFIX_EXPANSIONS]:
+            if not term.startswith(prefix):
+                break
+            terms.append(term)
+        return terms
+
+    def scores(self, tokens):
+        """Score tf-idf des vehicules contenant tous les mots (chacun en prefixe)."""
+        total = len(self.documents) or 1
+        result = None
+        for token in tokens:
+            matches = defaultdict(float)
+            for term in self.expand(token):
+                postings = self.postings[term]
+                idf = math.log(1 + total / len(postings))
+                # Mot exact prefere a un simple prefixe
+                boost = 1.0 if term == token else 0.5
+                for pk, weight in postings.items():
+                    matches[pk] += weight * idf * boost
+            if result is None:
+                result = matches
+            else:
+                result = {pk: score + matches[pk] for pk, score in result.items() if pk in matches}
+            if not result:
+                return {}
+        return result or {}
+
+
+_index = {"index": None, "version": None, "synced_at": None}
+_lock = threading.Lock()
+
+
+def _rows(qs):
+    return qs.values_list("vehicule_id", "vehicule__titre", "entete", "corps").iterator(chunk_size=2000)
+
+
+def memory_index():
+    """Index en memoire du processus, resynchronise quand la version du catalogue change.
+
+    La resynchronisation est incrementale : lignes modifiees depuis la derniere
+    lecture, et retrait des vehicules supprimes.
+    """
+    version = catalogue.get_version()
+    if _index["index"] is not None and _index["version"] == version:
+        return _index["index"]
+    with _lock:
+        if _index["index"] is not None and _index["version"] == version:
+            return _index["index"]
+        started = timezone.now()
+        index = _index["index"]
+        if index is None:
+            index = InvertedIndex()
+            rows = VehiculeRecherche.objects.all()
+        else:
+            current = set(VehiculeRecherche.objects.values_list("vehicule_id", flat=True))
+            for pk in set(index.documents) - current:
+                index.remove(pk)
+            rows = VehiculeRecherche.objects.filter(updated_at__gte=_index["synced_at"])
+        for pk, titre, entete, corps in _rows(rows):
+            index.add(pk, titre, entete, corps)
+        index.vocabulary()
+        _index.update(index=index, version=version, synced_at=started - SYNC_MARGIN)
+        return index
+
+
+# ---------- requetes ----------
+
+
+def uses_fulltext():
+    return connection.vendor == "mysql"
+
+
+def _boolean_query(tokens):
+    return " ".join(f"+{token}*" for token in tokens)
+
+
+def _fulltext_ids(tokens, limit):
+    table = connection.ops.quote_name(VehiculeRecherche._meta.db_table)
+    query = _boolean_query(tokens)
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"SELECT vehicule_id, "
+            f"MATCH(entete) AGAINST (%s IN BOOLEAN MODE) * {ENTETE_WEIGHT} "
+            f"+ MATCH(entete, corps) AGAINST (%s IN BOOLEAN MODE) AS score "
+            f"FROM {table} WHERE MATCH(entete, corps) AGAINST (%s IN BOOLEAN MODE) "
+            f"ORDER BY score DESC, vehicule_id DESC LIMIT %s",
+            [query, query, query, limit],
+        )
+        return [row[0] for row in cursor.fetchall()]
+
+
+def _best(scores, limit):
+    return heapq.nlargest(limit, scores, key=lambda pk: (scores[pk], pk))
+
+
+def search_ids(query, limit=100):
+    """Identifiants des vehicules correspondant a ``query``, du plus pertinent au moins pertinent."""
+    tokens = tokenize(query)
+    if not tokens:
+        return []
+    if uses_fulltext():
+        return _fulltext_ids(tokens, limit)
+    index = memory_index()
+    with _lock:
+        scores = index.scores(tokens)
+    return _best(scores, limit)
+
+
+def matching_ids(query):
+    """Tous les vehicules correspondant a ``query``, sans ordre ni limite (filtre ``pk__in``).
+
+    MySQL : sous-requete FULLTEXT evaluee par la base ; ailleurs : identifiants
+    trouves dans l'index en memoire.
+    """
+    tokens = tokenize(query)
+    if not tokens:
+        return []
+    if uses_fulltext():
+        table = connection.ops.quote_name(VehiculeRecherche._meta.db_table)
+        return RawSQL(
+            f"SELECT vehicule_id FROM {table} WHERE MATCH(entete, corps) AGAINST (%s IN BOOLEAN MODE)",
+            [_boolean_query(tokens)],
+        )
+    index = memory_index()
+    with _lock:
+        return list(index.scores(tokens))
+
+
+def search(query, limit=100):
+    """Vehicules classes par pertinence."""
+    ids = search_ids(query, limit)
+    vehicules = Vehicule.objects.in_bulk(ids)
+    return [vehicules[pk] for pk in ids if pk in vehicules]
+
+
+def suggest(query, limit=8):
+    """Autocompletion : [(pk, titre)] des meilleurs vehicules pour la saisie en cours."""
+    tokens = tokenize(query)
+    if not tokens:
+        return []
+    index = memory_index()
+    with _lock:  # l'index est mis a jour sur place lors d'une resynchronisation
+        scores = index.scores(tokens)
+        return [(pk, index.documents[pk][0]) for pk in _best(scores, limit)]
@@ -0,0 +1,330 @@
+"""Service des fichiers statiques et media par le processus Python (sans CDN ni nginx).
+
+- plages d'octets (``Range`` simple et multiple, ``If-Range``) : la video
+  d'accueil et les gros documents se reprennent / se parcourent sans tout
+  retelecharger ;
+- requetes conditionnelles (ETag, Last-Modified) ;
+- envoi zero-copie : une plage unique reste un fichier (``fileno()``), que
+  gunicorn transmet par ``sendfile`` ;
+- delegation optionnelle a un proxy frontal (FILE_OFFLOAD : X-Accel-Redirect
+  pour nginx, X-Sendfile pour Apache/lighttpd).
+
+Les fichiers statiques hashes (core.static_pipeline) sont servis avec
+``Cache-Control: immutable`` et un an de validite, en variante .br / .gz
+precompressee selon Accept-Encoding ; les autres avec un cache court.
+"""
+
+import functools
+import mimetypes
+import posixpath
+import re
+import secrets
+from pathlib import Path
+from urllib.parse import quote
+
+from django.conf import settings
+from django.contrib.staticfiles import finders
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.core.exceptions import PermissionDenied, SuspiciousFileOperation
+from django.core.files.storage import storages
+from django.http import FileResponse, Http404, HttpResponse, StreamingHttpResponse
+from django.urls import re_path
+from django.utils._os import safe_join
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, parse_http_date_safe
+from django.views.decorators.http import require_safe
+
+from . import scanning
+
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+# Ordre de preference des encodages precompresses
+ENCODINGS = (("br", ".br"), ("gzip", ".gz"))
+# Au-dela, l'en-tete Range est ignore (reponse complete) : evite les decoupages abusifs
+MAX_RANGES = 16
+CHUNK_SIZE = 64 * 1024
+
+
+class FileRange:
+    """Vue en lecture seule sur ``length`` octets d'un fichier a partir de ``start``.
+
+    Garde ``fileno()`` et la position du fichier sous-jacent : gunicorn peut
+    l'envoyer par sendfile (Content-Length borne la plage), les autres
+    serveurs la lisent par blocs sans depasser la fin de la plage.
+    """
+
+    def __init__(self, file, start, length):
+        self.file = file
+        self.start = start
+        self.length = length
+        self.name = file.name
+        file.seek(start)
+
+    def fileno(self):
+        return self.file.fileno()
+
+    def tell(self):
+        return self.file.tell() - self.start
+
+    def seek(self, offset, whence=0):
+        base = (0, self.tell(), self.length)[whence]
+        position = min(max(base + offset, 0), self.length)
+        self.file.seek(self.start + position)
+        return position
+
+    def read(self, size=-1):
+        remaining = self.length - self.tell()
+        if size is None or size < 0 or size > remaining:
+            size = remaining
+        return self.file.read(size) if size > 0 else b""
+
+    def close(self):
+        self.file.close()
+
+
+def parse_ranges(header, size):
+    """Plages [(debut, fin incluse)] triees et fusionnees.
+
+    None : en-tete absent, invalide ou trop fragmente (reponse complete) ;
+    liste vide : aucune plage satisfiable (416).
+    """
+    units, _, spec = (header or "").partition("=")
+    if units.strip().lower() != "bytes" or not spec.strip():
+        return None
+    ranges = []
+    for part in spec.split(","):
+        first, sep, last = part.strip().partition("-")
+        if not sep:
+            return None
+        try:
+            if not first:  # suffixe : les N derniers octets
+                suffix = int(last)
+                if suffix <= 0:
+                    continue
+                start, end = max(size - suffix, 0), size - 1
+            else:
+                start = int(first)
+                end = int(last) if last else size - 1
+                if last and end < start:
+                    return None
+                end = min(end, size - 1)
+        except ValueError:
+            return None
+        if start < size:
+            ranges.append((start, end))
+    if len(ranges) > MAX_RANGES:
+        return None
+    merged = []
+    for start, end in sorted(ranges):
+        if merged and start <= merged[-1][1] + 1:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((start, end))
+    return merged
+
+
+def _if_range_matches(request, etag, mtime):
+    """Sans If-Range, ou s'il correspond a la version courante, la plage s'applique."""
+    value = request.headers.get("If-Range")
+    if not value:
+        return True
+    if value.startswith(('"', 'W/"')):
+        return value == etag  # comparaison forte (RFC 9110)
+    return parse_http_date_safe(value) == int(mtime)
+
+
+def _accepted_encodings(request):
+    header = request.headers.get("Accept-Encoding", "")
+    accepted = set()
+    for part in header.split(","):
+        token, _, params = part.strip().partition(";")
+        if params.strip().replace(" ", "") in ("q=0", "q=0.0", "q=0.00", "q=0.000"):
+            continue
+        accepted.add(token.strip().lower())
+    return accepted
+
+
+def _multipart_ranges(path, ranges, size, content_type):
+    """(iterateur, longueur totale, boundary) d'une reponse multipart/byteranges."""
+    boundary = secrets.token_hex(12)
+    heads = [
+        (
+            f"--{boundary}\r\nContent-Type: {content_type}\r\n"
+            f"Content-Range: bytes {start}-{end}/{size}\r\n\r\n"
+        ).encode()
+        for start, end in ranges
+    ]
+    tail = f"\r\n--{boundary}--\r\n".encode()
+    length = sum(len(h) for h in heads) + sum(end - start + 1 for start, end in ranges)
+    length += 2 * (len(ranges) - 1) + len(tail)
+
+    def stream():
+        with open(path, "rb") as fh:
+            for i, ((start, end), head) in enumerate(zip(ranges, heads)):
+                yield (b"\r\n" if i else b"") + head
+                fh.seek(start)
+                remaining = end - start + 1
+                while remaining:
+                    chunk = fh.read(min(CHUNK_SIZE, remaining))
+                    if not chunk:
+                        return
+                    remaining -= len(chunk)
+                    yield chunk
+        yield tail
+
+    return stream(), length, boundary
+
+
+def _offload_response(kind, relative, path, content_type):
+    """Reponse vide : le proxy frontal envoie lui-meme le fichier (plages comprises)."""
+    response = HttpResponse(content_type=content_type)
+    if settings.FILE_OFFLOAD == "x-accel-redirect":
+        prefix = settings.FILE_OFFLOAD_PREFIX.rstrip("/")
+        response["X-Accel-Redirect"] = f"{prefix}/{kind}/{quote(relative)}"
+    else:
+        response["X-Sendfile"] = str(path)
+    return response
+
+
+def serve_file(request, path, *, cache_control, kind="", relative=None, encodings=False):
+    """Reponse pour le fichier ``path`` : complete, partielle (206/416) ou 304.
+
+    ``relative`` (chemin sous la racine ``kind``) autorise la delegation
+    FILE_OFFLOAD ; ``encodings`` active les variantes precompressees .br/.gz.
+    """
+    path = Path(path)
+    content_type, _ = mimetypes.guess_type(path.name)
+    content_type = content_type or "application/octet-stream"
+    range_header = request.headers.get("Range")
+
+    # Variante precompressee, sauf pour une requete de plage (les octets
+    # demandes sont ceux du fichier d'origine) ou une delegation au proxy
+    offload = bool(settings.FILE_OFFLOAD and relative is not None)
+    served, encoding = path, None
+    if encodings and not offload and not range_header and not path.name.endswith((".gz", ".br")):
+        accepted = _accepted_encodings(request)
+        for name, ext in ENCODINGS:
+            candidate = path.with_name(path.name + ext)
+            if name in accepted and candidate.is_file():
+                served, encoding = candidate, name
+                break
+
+    stat = served.stat()
+    size = stat.st_size
+    etag = f'"{stat.st_mtime_ns:x}-{size:x}{"-" + encoding if encoding else ""}"'
+    last_modified = http_date(stat.st_mtime)
+
+    def finalize(response):
+        response["ETag"] = etag
+        response["Last-Modified"] = last_modified
+        response["Accept-Ranges"] = "bytes"
+        response["Cache-Control"] = cache_control
+        if encodings:
+            response["Vary"] = "Accept-Encoding"
+        return response
+
+    conditional = get_conditional_response(request, etag=etag, last_modified=int(stat.st_mtime))
+    if conditional is not None:
+        return finalize(conditional)
+
+    if offload:
+        return finalize(_offload_response(kind, relative, path, content_type))
+
+    ranges = None
+    if range_header and _if_range_matches(request, etag, stat.st_mtime):
+        ranges = parse_ranges(range_header, size)
+
+    if ranges == []:
+        response = HttpResponse(status=416)
+        response["Content-Range"] = f"bytes */{size}"
+        return finalize(response)
+
+    if ranges and len(ranges) == 1:
+        start, end = ranges[0]
+        response = FileResponse(
+            FileRange(served.open("rb"), start, end - start + 1),
+            status=206,
+            content_type=content_type,
+        )
+        response["Content-Range"] = f"bytes {start}-{end}/{size}"
+        response["Content-Length"] = end - start + 1
+    elif ranges:
+        stream, length, boundary = _multipart_ranges(served, ranges, size, content_type)
+        response = StreamingHttpResponse(
+            stream, status=206, content_type=f"multipart/byteranges; boundary={boundary}"
+        )
+        response["Content-Length"] = length
+    else:
+        response = FileResponse(served.open("rb"), content_type=content_type)
+        if encoding:
+            response["Content-Encoding"] = encoding
+    return finalize(response)
+
+
+def _resolve(root, path):
+    try:
+        fullpath = Path(safe_join(root, path))
+    except (SuspiciousFileOperation, ValueError):  # tentative de sortie de la racine
+        raise Http404
+    if not fullpath.is_file():
+        raise Http404
+    return fullpath
+
+
+@functools.lru_cache(maxsize=1)
+def _hashed_names(manifest_hash):
+    """Noms haches du manifest : calcules une fois par manifest charge (donc par processus)."""
+    return frozenset(getattr(staticfiles_storage, "hashed_files", {}).values())
+
+
+@require_safe
+def serve_static(request, path):
+    path = posixpath.normpath(path).lstrip("/")
+    if settings.DEBUG:
+        # Sources (STATICFILES_DIRS, apps) sans collectstatic
+        found = None if path.startswith("..") else finders.find(path)
+        if not found:
+            raise Http404
+        return serve_file(request, found, cache_control="no-cache")
+
+    fullpath = _resolve(settings.STATIC_ROOT, path)
+    hashed = path in _hashed_names(getattr(staticfiles_storage, "manifest_hash", ""))
+    return serve_file(
+        request,
+        fullpath,
+        cache_control=(
+            IMMUTABLE_CACHE_CONTROL if hashed else f"public, max-age={settings.STATIC_UNHASHED_MAX_AGE}"
+        ),
+        kind="static",
+        relative=path,
+        encodings=True,
+    )
+
+
+@require_safe
+def serve_media(request, path):
+    path = posixpath.normpath(path).lstrip("/")
+    if path.startswith(tuple(getattr(settings, "MEDIA_PRIVATE_PREFIXES", ()))):
+        raise Http404
+    if storages["blobs"].is_blob(path) and scanning.is_infected(path):
+        raise PermissionDenied("Fichier bloque par l'analyse antivirus.")
+    fullpath = _resolve(settings.MEDIA_ROOT, path)
+    return serve_file(
+        request, fullpath, cache_control=settings.MEDIA_CACHE_CONTROL, kind="media", relative=path
+    )
+
+
+def _urlpatterns(url, view):
+    prefix = url.lstrip("/")
+    if not prefix or "://" in prefix:
+        return []  # URL externe (CDN) : rien a servir ici
+    return [re_path(r"^%s(?P<path>.*)$" % re.escape(prefix), view)]
+
+
+def static_urlpatterns():
+    """Route STATIC_URL -> serve_static."""
+    return _urlpatterns(settings.STATIC_URL, serve_static)
+
+
+def media_urlpatterns():
+    """Route MEDIA_URL -> serve_media."""
+    return _urlpatterns(settings.MEDIA_URL, serve_media)
@@ -0,0 +1,100 @@
+"""Invalidation des caches du catalogue public a chaque ecriture, tables de lecture
+(cartes, recherche), derivees d'images et references des fichiers dedupliques."""
+
+import threading
+from contextlib import contextmanager
+
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from . import jobs, mirror, read_model, search
+from .catalogue import bump_version_on_commit
+from .models import ImageVehicule, OptionVehicule, RendezVousFichier, Vehicule
+from .storage import release_on_commit, release_replaced_on_commit
+
+# Modeles dont le contenu apparait sur le site public. Les demandes de
+# rendez-vous (RendezVous, RendezVousFichier) n'y figurent pas et ne
+# doivent pas vider les caches.
+CATALOGUE_MODELS = (Vehicule, OptionVehicule, ImageVehicule)
+
+
+_muted = threading.local()
+
+
+@contextmanager
+def muted():
+    """Suspend l'invalidation par objet pendant une ecriture en masse (core.catalogue_io) ;
+    l'appelant incremente la version une fois a la fin."""
+    previous = getattr(_muted, "active", False)
+    _muted.active = True
+    try:
+        yield
+    finally:
+        _muted.active = previous
+
+
+def bump_catalogue_version(sender, **kwargs):
+    if not getattr(_muted, "active", False):
+        bump_version_on_commit()
+
+
+# Tables de lecture (cartes, index de recherche) : recepteurs connectes avant
+# l'increment de version ci-dessous, leurs callbacks on_commit passent donc avant
+# lui. Un processus qui voit la nouvelle version lit des tables deja a jour.
+@receiver(post_save, sender=Vehicule)
+@receiver(post_save, sender=OptionVehicule)
+@receiver(post_delete, sender=OptionVehicule)
+def update_read_models(sender, instance, **kwargs):
+    if getattr(_muted, "active", False):
+        return  # core.catalogue_io met a jour chaque lot lui-meme
+    pk = instance.pk if sender is Vehicule else instance.vehicule_id
+    read_model.refresh_on_commit(pk)
+    search.reindex_on_commit(pk)
+
+
+for model in CATALOGUE_MODELS:
+    post_save.connect(bump_catalogue_version, sender=model, dispatch_uid=f"catalogue_version_save_{model.__name__}")
+    post_delete.connect(bump_catalogue_version, sender=model, dispatch_uid=f"catalogue_version_delete_{model.__name__}")
+
+
+@receiver(post_delete, sender=OptionVehicule)
+@receiver(post_delete, sender=ImageVehicule)
+def touch_vehicule_on_child_delete(sender, instance, **kwargs):
+    """Une option/image supprimee ne laisse pas de date : on avance celle du vehicule
+    pour que l'ETag de la fiche change aussi."""
+    if getattr(_muted, "active", False):
+        return
+    Vehicule.objects.filter(pk=instance.vehicule_id).update(updated_at=timezone.now())
+
+
+@receiver(post_save, sender=Vehicule)
+def generate_vehicule_image_derivatives(sender, instance, **kwargs):
+    if instance.image_principale:
+        jobs.enqueue("images.derivatives", instance.image_principale.name, unique=True)
+
+
+@receiver(post_save, sender=ImageVehicule)
+def generate_gallery_image_derivatives(sender, instance, **kwargs):
+    if instance.image:
+        jobs.enqueue("images.derivatives", instance.image.name, unique=True)
+
+
+@receiver(post_save, sender=Vehicule)
+def register_vehicule_external_images(sender, instance, **kwargs):
+    mirror.register(mirror.vehicule_urls(instance))
+
+
+@receiver(post_save, sender=ImageVehicule)
+def register_gallery_external_image(sender, instance, **kwargs):
+    if instance.image_url and not instance.image:
+        mirror.register([instance.image_url])
+
+
+@receiver(post_delete, sender=RendezVousFichier)
+def release_contact_attachment(sender, instance, **kwargs):
+    """Piece jointe dedupliquee (core.storage) : une reference de moins."""
+    release_on_commit(instance.fichier)
+
+
+pre_save.connect(release_replaced_on_commit, sender=RendezVousFichier, dispatch_uid="release_replaced_contact_attachment")
@@ -0,0 +1,131 @@
+"""Pipeline collectstatic : bundles minifies, noms hashes (manifest), fichiers .gz / .br.
+
+A ``collectstatic``, chaque bundle de STATIC_BUNDLES est concatene depuis ses
+sources, minifie, puis hache comme les autres fichiers ; les fichiers texte
+haches recoivent ensuite des variantes precompressees servies par
+core.serving. Brotli est optionnel (``pip install brotli``).
+"""
+
+import gzip
+import logging
+import re
+
+from django.conf import settings
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+from django.core.files.base import ContentFile
+
+try:
+    import brotli
+except ImportError:  # optionnel : seules les variantes .gz sont produites
+    brotli = None
+
+logger = logging.getLogger(__name__)
+
+COMPRESSIBLE_EXTENSIONS = (".css", ".js", ".svg", ".json", ".txt", ".html", ".map", ".ico")
+COMPRESS_MIN_SIZE = 256
+
+# Lus de gauche a droite : un « /* » dans une chaine ou un url() n'ouvre pas de
+# commentaire, une apostrophe dans un commentaire n'ouvre pas de chaine
+_CSS_TOKENS = re.compile(
+    r"""(/\*.*?\*/|"(?:\\.|[^"\\])*"|'(?:\\.|[^'\\])*'|url\([^)"']*\))""", re.S | re.I
+)
+_CSS_SPACES = re.compile(r"\s+")
+_CSS_PUNCTUATION = re.compile(r"\s*([{};,>])\s*")
+
+
+def _strip_comment(match):
+    token = match.group()
+    return "" if token.startswith("/*") and not token.startswith("/*!") else token
+
+
+def minify_css(source):
+    """Minification prudente : commentaires, blancs et ';' final (chaines et url() preservees)."""
+    parts = _CSS_TOKENS.split(_CSS_TOKENS.sub(_strip_comment, source))
+    for i in range(0, len(parts), 2):  # indices pairs : hors chaines, url() et commentaires /*! */
+        chunk = _CSS_SPACES.sub(" ", parts[i])
+        chunk = _CSS_PUNCTUATION.sub(r"\1", chunk)
+        parts[i] = chunk.replace(";}", "}")
+    return "".join(parts).strip()
+
+
+def minify_js(source):
+    """Sans analyseur JS : indentation, lignes vides et commentaires « // » en debut de ligne."""
+    lines = []
+    for line in source.splitlines():
+        stripped = line.strip()
+        if stripped and not stripped.startswith("//"):
+            lines.append(stripped)
+    return "\n".join(lines) + "\n"
+
+
+MINIFIERS = {".css": minify_css, ".js": minify_js}
+
+
+def compress(data):
+    """Variantes {extension: contenu} plus petites que l'original."""
+    variants = {".gz": gzip.compress(data, compresslevel=9, mtime=0)}
+    if brotli is not None:
+        variants[".br"] = brotli.compress(data, quality=11)
+    return {ext: blob for ext, blob in variants.items() if len(blob) < len(data)}
+
+
+class BundledManifestStaticFilesStorage(ManifestStaticFilesStorage):
+    # Un fichier absent du manifest garde son nom (pas d'erreur 500 sans collectstatic)
+    manifest_strict = False
+
+    def stored_name(self, name):
+        try:
+            return super().stored_name(name)
+        except ValueError:  # collectstatic pas encore lance
+            return name
+
+    def post_process(self, paths, dry_run=False, **options):
+        if dry_run:
+            return
+        for name, sources in getattr(settings, "STATIC_BUNDLES", {}).items():
+            missing = [src for src in sources if not self.exists(src)]
+            if missing:
+                yield name, None, ValueError(f"Bundle {name} : fichier(s) introuvable(s) {missing}")
+                continue
+            self._save_bundle(name, sources)
+            paths[name] = (self, name)
+
+        yield from super().post_process(paths, dry_run, **options)
+
+        for hashed in set(self.hashed_files.values()):
+            if hashed.endswith(COMPRESSIBLE_EXTENSIONS) and self.exists(hashed):
+                self._save_compressed(hashed)
+
+    def _save_bundle(self, name, sources):
+        minify = next((fn for ext, fn in MINIFIERS.items() if name.endswith(ext)), None)
+        chunks = []
+        for src in sources:
+            with self.open(src) as fh:
+                text = fh.read().decode("utf-8")
+            chunks.append(minify(text) if minify else text)
+        if self.exists(name):
+            self.delete(name)
+        self._save(name, ContentFile("\n".join(chunks).encode("utf-8")))
+
+    def _save_compressed(self, name):
+        with self.open(name) as fh:
+            data = fh.read()
+        if len(data) < COMPRESS_MIN_SIZE:
+            return
+        for ext, blob in compress(data).items():
+            if self.exists(name + ext):
+                self.delete(name + ext)
+            self._save(name + ext, ContentFile(blob))
+
+    def url_converter(self, name, hashed_files, template=None):
+        converter = super().url_converter(name, hashed_files, template)
+
+        def tolerant_converter(matchobj):
+            # url() vers un fichier absent (ex. polices non fournies) : laisse tel quel
+            try:
+                return converter(matchobj)
+            except ValueError:
+                logger.warning("%s : url(%s) introuvable, laissee telle quelle", name, matchobj["url"])
+                return matchobj["matched"]
+
+        return tolerant_converter
@@ -0,0 +1,150 @@
+"""Stockage adresse par contenu (deduplication) des pieces jointes et documents.
+
+Chaque fichier est stocke une seule fois sous ``blobs/ab/cd/<sha256><ext>`` :
+le SHA-256 est calcule pendant la copie du flux d'upload (un seul passage),
+puis le fichier rejoint le blob existant ou en cree un. Le nombre de
+references est tenu par ``core.StoredBlob`` ; ``delete()`` ne supprime le
+fichier qu'a la disparition de la derniere reference. Les lignes liberent leur
+reference a la suppression (post_delete) et au remplacement du fichier
+(pre_save, ``release_replaced_on_commit``).
+
+Les noms qui ne sont pas des blobs (fichiers anterieurs, uuid) restent geres
+comme par FileSystemStorage ; ``manage.py report_media_dedup --apply`` les
+convertit.
+"""
+
+import hashlib
+import os
+import tempfile
+
+from django.apps import apps
+from django.core.files.storage import FileSystemStorage, storages
+from django.db import transaction
+from django.db.models import F, FileField
+
+BLOB_PREFIX = "blobs"
+
+
+def blob_storage():
+    """Stockage des champs ``fichier`` (FileField(storage=blob_storage))."""
+    return storages["blobs"]
+
+
+def release_on_commit(fieldfile):
+    """Libere la reference du fichier apres commit (signal post_delete)."""
+    if fieldfile:
+        name, storage = fieldfile.name, fieldfile.storage
+        transaction.on_commit(lambda: storage.delete(name))
+
+
+def release_replaced_on_commit(sender, instance, raw=False, **kwargs):
+    """pre_save : fichier deduplique remplace sur une ligne existante (admin, CMS) ->
+    l'ancien perd sa reference apres commit, comme a la suppression de la ligne."""
+    fields = [
+        field
+        for field in sender._meta.concrete_fields
+        if isinstance(field, FileField) and isinstance(field.storage, ContentAddressedStorage)
+    ]
+    if raw or instance.pk is None or not fields:
+        return
+    previous = sender._default_manager.filter(pk=instance.pk).values(*[f.attname for f in fields]).first()
+    for field in fields if previous else ():
+        name = previous[field.attname]
+        if name and name != getattr(instance, field.attname).name:
+            transaction.on_commit(lambda storage=field.storage, name=name: storage.delete(name))
+
+
+def file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as fh:
+        for block in iter(lambda: fh.read(1024 * 1024), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class ContentAddressedStorage(FileSystemStorage):
+    def __init__(self, prefix=BLOB_PREFIX, **kwargs):
+        self.prefix = prefix.strip("/")
+        super().__init__(**kwargs)
+
+    def blob_name(self, sha256, ext=""):
+        return f"{self.prefix}/{sha256[:2]}/{sha256[2:4]}/{sha256}{ext.lower()}"
+
+    def is_blob(self, name):
+        return bool(name) and name.startswith(self.prefix + "/")
+
+    def _tmp_dir(self):
+        path = self.path(f"{self.prefix}/tmp")
+        os.makedirs(path, exist_ok=True)
+        return path
+
+    def temporary_file(self):
+        """(descripteur, chemin) d'un fichier temporaire sur le disque des blobs, pour adopt()."""
+        return tempfile.mkstemp(dir=self._tmp_dir())
+
+    def _save(self, name, content):
+        # ``name`` (upload_to) ne sert qu'a l'extension : le contenu fait le nom
+        ext = os.path.splitext(name)[1]
+        digest = hashlib.sha256()
+        size = 0
+        fd, tmp = self.temporary_file()
+        try:
+            with os.fdopen(fd, "wb") as out:
+                if hasattr(content, "seek"):
+                    content.seek(0)
+                for chunk in content.chunks():
+                    digest.update(chunk)
+                    out.write(chunk)
+                    size += len(chunk)
+            return self._acquire(tmp, digest.hexdigest(), size, ext)
+        finally:
+            if os.path.exists(tmp):
+                os.unlink(tmp)
+
+    def adopt(self, path, sha256=None, ext=None):
+        """Integre un fichier deja ecrit sur disque (deplace, ou supprime si doublon).
+
+        ``sha256`` evite de relire le fichier quand l'appelant l'a deja verifie.
+        """
+        if ext is None:
+            ext = os.path.splitext(path)[1]
+        sha256 = sha256 or file_sha256(path)
+        name = self._acquire(path, sha256, os.path.getsize(path), ext)
+        if os.path.exists(path):
+            os.unlink(path)
+        return name
+
+    def _acquire(self, source, sha256, size, ext):
+        """+1 reference sur le blob ; ``source`` y est deplace s'il n'existe pas encore."""
+        StoredBlob = apps.get_model("core", "StoredBlob")
+        name = self.blob_name(sha256, ext)
+        with transaction.atomic():
+            # Verrou sur la ligne : pas de suppression concurrente du fichier
+            blob, created = StoredBlob.objects.select_for_update().get_or_create(
+                chemin=name, defaults={"sha256": sha256, "taille": size, "references": 0}
+            )
+            StoredBlob.objects.filter(pk=blob.pk).update(references=F("references") + 1)
+            full = self.path(name)
+            if not os.path.exists(full):
+                os.makedirs(os.path.dirname(full), exist_ok=True)
+                os.chmod(source, self.file_permissions_mode or 0o644)
+                os.replace(source, full)
+            if created:
+                from . import jobs, scanning
+
+                if scanning.scanner_enabled():
+                    jobs.enqueue("blobs.scan", name)
+        return name
+
+    def delete(self, name):
+        if not self.is_blob(name):
+            return super().delete(name)
+        StoredBlob = apps.get_model("core", "StoredBlob")
+        with transaction.atomic():
+            blob = StoredBlob.objects.select_for_update().filter(chemin=name).first()
+            if blob is not None and blob.references > 1:
+                StoredBlob.objects.filter(pk=blob.pk).update(references=F("references") - 1)
+                return
+            if blob is not None:
+                blob.delete()
+            super().delete(name)
@@ -0,0 +1,458 @@
+"""Catalogue synthetique pour les tests de charge (``manage.py generate_catalogue``).
+
+Vehicules de toutes les marques (annee, prix, kilometrage, puissance
+plausibles pour le modele), options, images (URL externes), documents de tous
+les types et demandes de contact avec pieces jointes.
+
+La generation est decoupee en lots de ``batch_size`` vehicules : un lot =
+une transaction, ``bulk_create`` de chaque table, cartes (core.read_model) et
+index de recherche (core.search) des vehicules du lot. Les cles sont
+attribuees par la base (relues par cle naturelle sous MySQL) et chaque lot
+tire ses valeurs d'un generateur initialise par (graine, numero du lot) : le
+contenu est identique quel que soit le nombre de processus, et les lots
+peuvent etre ecrits en parallele, y compris pendant l'utilisation du CMS.
+
+Les fichiers (documents, pieces jointes) sont quelques blobs partages
+(core.storage), avec leur nombre de references tenu a jour.
+"""
+
+import hashlib
+import math
+import random
+import unicodedata
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass
+from datetime import date, timedelta
+from io import BytesIO
+
+from django.apps import apps
+from django.core.files.base import ContentFile
+from django.db import connections, transaction
+from django.db.models import F
+
+from . import catalogue, catalogue_io, read_model, search, signals
+from .models import ImageVehicule, OptionVehicule, RendezVous, RendezVousFichier, StoredBlob, Vehicule
+from .storage import blob_storage
+
+# Annee de reference fixe : une graine donne le meme catalogue d'une annee a l'autre
+CURRENT_YEAR = 2026
+
+# Relecture des cles (MySQL) : URL et e-mail portent la graine et le numero de la ligne
+VEHICULE_KEY = ("image_url", "created_at")
+CONTACT_KEY = ("email", "created_at")
+
+# Part de chaque marque dans le stock
+MARQUE_WEIGHTS = {
+    "porsche": 28,
+    "ferrari": 18,
+    "lamborghini": 12,
+    "bentley": 10,
+    "aston_martin": 10,
+    "mclaren": 8,
+    "rolls_royce": 6,
+    "other": 8,
+}
+
+# marque -> [(modele, moteur, puissance min, puissance max, prix neuf)]
+MODELES = {
+    "ferrari": [
+        ("Roma", "V8 3.9 L biturbo", 612, 620, 215000),
+        ("296 GTB", "V6 3.0 L hybride rechargeable", 818, 830, 270000),
+        ("F8 Tributo", "V8 3.9 L biturbo", 710, 720, 240000),
+        ("812 Superfast", "V12 6.5 L atmospherique", 789, 800, 340000),
+        ("Testarossa", "Flat-12 4.9 L", 380, 390, 120000),
+    ],
+    "lamborghini": [
+        ("Huracan EVO", "V10 5.2 L atmospherique", 610, 640, 230000),
+        ("Urus", "V8 4.0 L biturbo", 650, 666, 240000),
+        ("Aventador S", "V12 6.5 L atmospherique", 740, 770, 400000),
+        ("Countach LP400", "V12 4.0 L", 370, 375, 150000),
+    ],
+    "porsche": [
+        ("911 Carrera S", "Flat-6 3.0 L biturbo", 420, 450, 150000),
+        ("911 Turbo S", "Flat-6 3.7 L biturbo", 580, 650, 240000),
+        ("911 GT3 RS", "Flat-6 4.0 L atmospherique", 500, 525, 230000),
+        ("718 Cayman GT4", "Flat-6 4.0 L atmospherique", 420, 500, 110000),
+        ("Taycan Turbo S", "Electrique bi-moteur", 625, 761, 190000),
+        ("Cayenne Turbo GT", "V8 4.0 L biturbo", 640, 660, 200000),
+    ],
+    "mclaren": [
+        ("720S", "V8 4.0 L biturbo", 710, 720, 250000),
+        ("Artura", "V6 3.0 L hybride rechargeable", 680, 700, 240000),
+        ("GT", "V8 4.0 L biturbo", 612, 620, 210000),
+    ],
+    "bentley": [
+        ("Continental GT", "W12 6.0 L biturbo", 600, 659, 230000),
+        ("Bentayga", "V8 4.0 L biturbo", 542, 550, 210000),
+        ("Flying Spur", "V8 4.0 L biturbo", 542, 550, 220000),
+    ],
+    "aston_martin": [
+        ("DB11", "V8 4.0 L biturbo", 510, 535, 200000),
+        ("Vantage", "V8 4.0 L biturbo", 503, 665, 170000),
+        ("DBS Superleggera", "V12 5.2 L biturbo", 715, 725, 320000),
+        ("DB5", "6 cylindres 4.0 L", 282, 290, 90000),
+    ],
+    "rolls_royce": [
+        ("Ghost", "V12 6.75 L biturbo", 563, 571, 320000),
+        ("Cullinan", "V12 6.75 L biturbo", 563, 600, 380000),
+        ("Phantom", "V12 6.75 L biturbo", 563, 571, 480000),
+    ],
+    "other": [
+        ("Mercedes-AMG GT R", "V8 4.0 L biturbo", 585, 585, 180000),
+        ("Audi R8 V10", "V10 5.2 L atmospherique", 570, 620, 190000),
+        ("Maserati MC20", "V6 3.0 L biturbo", 630, 630, 230000),
+        ("Bugatti Chiron", "W16 8.0 L quadriturbo", 1500, 1600, 3000000),
+    ],
+}
+
+OPTIONS = [
+    "Toit ouvrant panoramique",
+    "Pack carbone exterieur",
+    "Echappement sport",
+    "Sieges baquets carbone",
+    "Camera 360",
+    "Freins carbone-ceramique",
+    "Systeme de levage de l'essieu avant",
+    "Jantes forgees 21 pouces",
+    "Sellerie cuir etendue",
+    "Son haut de gamme",
+    "Affichage tete haute",
+    "Regulateur adaptatif",
+    "Vision de nuit",
+    "Sieges ventiles et massants",
+    "Pack Chrono",
+    "Suspension pilotee",
+    "Roues arriere directrices",
+    "Peinture speciale",
+    "Ciel de toit etoile",
+    "Historique d'entretien complet",
+]
+FINITIONS = ["", "Coupe", "Spider", "Cabriolet", "Launch Edition", "Performance"]
+PRENOMS = ["Camille", "Louis", "Lea", "Hugo", "Chloe", "Arthur", "Manon", "Jules", "Ines", "Gabriel"]
+NOMS = ["Martin", "Bernard", "Dubois", "Durand", "Lefebvre", "Moreau", "Laurent", "Simon", "Michel", "Garcia"]
+MESSAGES = [
+    "Je souhaite faire estimer mon vehicule.",
+    "Le vehicule est-il toujours disponible ? Je peux passer cette semaine.",
+    "Pouvez-vous m'envoyer l'historique d'entretien ?",
+    "",
+]
+
+
+class BatchError(Exception):
+    """Lot en echec (sans callback ``errors``) : le catalogue serait incomplet."""
+
+
+def _documents_installed():
+    return apps.is_installed("documents")
+
+
+@dataclass(frozen=True)
+class Plan:
+    """Parametres d'une generation, transmis tels quels aux processus."""
+
+    seed: object  # entier ou chaine
+    count: int
+    options: int
+    images: int
+    documents: int
+    contacts: int
+    attachments: int
+    batch_size: int
+    document_files: tuple  # (type, nom du blob)
+    attachment_files: tuple  # noms des blobs
+
+    @property
+    def batches(self):
+        return math.ceil(self.count / self.batch_size)
+
+    @property
+    def tag(self):
+        """Marque de la graine dans les URL d'images (cle de relecture des vehicules)."""
+        return hashlib.sha1(str(self.seed).encode()).hexdigest()[:8]
+
+    def vehicule_numbers(self, index):
+        start = index * self.batch_size
+        return range(start, min(start + self.batch_size, self.count))
+
+    def contact_numbers(self, index):
+        # Demandes reparties uniformement entre les lots
+        return range(index * self.contacts // self.batches, (index + 1) * self.contacts // self.batches)
+
+
+# ---------- valeurs ----------
+
+
+def _vehicule(rng, tag, number):
+    marque = rng.choices(list(MARQUE_WEIGHTS), weights=list(MARQUE_WEIGHTS.values()))[0]
+    modele, moteur, ch_min, ch_max, prix_neuf = rng.choice(MODELES[marque])
+    # Stock surtout recent, avec une traine de vehicules de collection
+    age = min(int(rng.expovariate(1 / 6)), 60)
+    annee = CURRENT_YEAR - age
+    if age == 0:
+        kilometrage = rng.randint(5, 3000)
+    else:
+        kilometrage = int(age * max(300, rng.gauss(5000, 2500)))
+    # Decote annuelle de 7 % puis cote de collection au-dela de 25 ans
+    prix = prix_neuf * 0.93 ** min(age, 20) * rng.lognormvariate(0, 0.15)
+    if age > 25:
+        prix *= 1 + (age - 25) * 0.06
+    prix *= max(0.5, 1 - kilometrage / 400000)
+    prix = max(15000, int(prix / 100) * 100)
+    finition = rng.choice(FINITIONS)
+    libelle = dict(Vehicule.MARQUES)[marque]
+    titre = f"{modele} {finition}".strip() if marque == "other" else f"{libelle} {modele} {finition}".strip()
+    en_vedette = rng.random() < 0.02
+    km = f"{kilometrage:,}".replace(",", " ")  # separateur de milliers : espace
+    return Vehicule(
+        titre=titre,
+        marque=marque,
+        modele=f"{modele} {finition}".strip(),
+        annee=annee,
+        kilometrage=kilometrage,
+        prix=prix,
+        puissance_ch=rng.randint(ch_min, ch_max),
+        moteur=moteur,
+        description=(
+            f"{titre} de {annee}, {km} km"
+            + f". {moteur}, {rng.choice(['premiere main', 'deuxieme main', 'origine France', 'importation'])}."
+        ),
+        image_url=f"https://picsum.photos/seed/luxora-{tag}-{number}/1200/800",
+        en_vedette=en_vedette,
+        ordre_affichage=rng.randint(1, 10) if en_vedette else 0,
+    )
+
+
+def _ascii(text):
+    return unicodedata.normalize("NFKD", text).encode("ascii", "ignore").decode().lower()
+
+
+def _contact(rng, tag, number):
+    prenom, nom = rng.choice(PRENOMS), rng.choice(NOMS)
+    return RendezVous(
+        nom=nom,
+        prenom=prenom,
+        email=f"{_ascii(prenom)}.{_ascii(nom)}.{tag}-{number}@example.com",
+        telephone=f"06{rng.randint(0, 99999999):08d}",
+        raison=rng.choice([value for value, _ in RendezVous.RAISON_CHOICES]),
+        message=rng.choice(MESSAGES),
+    )
+
+
+# ---------- lots ----------
+
+
+def generate_batch(plan, index):
+    """Ecrit le lot ``index`` ; retourne {table: lignes creees}."""
+    rng = random.Random(f"{plan.seed}:{index}")
+    if plan.documents:
+        from documents.models import DocumentVehicule
+    vehicules = [_vehicule(rng, plan.tag, number) for number in plan.vehicule_numbers(index)]
+    options, images, documents = [], [], []
+    blobs = Counter()
+    for vehicule in vehicules:
+        for ordre, libelle in enumerate(rng.sample(OPTIONS, min(plan.options, len(OPTIONS)))):
+            options.append(OptionVehicule(vehicule=vehicule, libelle=libelle, ordre=ordre))
+        for ordre in range(plan.images):
+            images.append(ImageVehicule(
+                vehicule=vehicule,
+                image_url=vehicule.image_url.replace("/1200/800", f"-{ordre}/1200/800"),
+                ordre=ordre,
+            ))
+        for n in range(plan.documents):
+            # Tous les types, dans l'ordre, avant d'en repeter un
+            type_document, name = plan.document_files[n % len(plan.document_files)]
+            documents.append(DocumentVehicule(
+                vehicule=vehicule,
+                type_document=type_document,
+                titre=f"{dict(DocumentVehicule.TYPE_CHOICES)[type_document]} {vehicule.annee + n // len(plan.document_files)}",
+                fichier=name,
+                date_document=date(vehicule.annee, 1, 1) + timedelta(days=rng.randint(0, 364)),
+            ))
+            blobs[name] += 1
+    contacts = [_contact(rng, plan.tag, number) for number in plan.contact_numbers(index)]
+    fichiers = []
+    for contact in contacts:
+        for _ in range(rng.randint(0, plan.attachments) if plan.attachment_files else 0):
+            name = rng.choice(plan.attachment_files)
+            fichiers.append(RendezVousFichier(rendez_vous=contact, fichier=name))
+            blobs[name] += 1
+
+    with transaction.atomic(), signals.muted():
+        # Cles attribuees par la base (MySQL : relues par cle naturelle), puis enfants
+        catalogue_io.bulk_create_with_keys(Vehicule, vehicules, VEHICULE_KEY, plan.batch_size)
+        OptionVehicule.objects.bulk_create(options, batch_size=plan.batch_size)
+        ImageVehicule.objects.bulk_create(images, batch_size=plan.batch_size)
+        if documents:
+            DocumentVehicule.objects.bulk_create(documents, batch_size=plan.batch_size)
+        catalogue_io.bulk_create_with_keys(RendezVous, contacts, CONTACT_KEY, plan.batch_size)
+        RendezVousFichier.objects.bulk_create(fichiers, batch_size=plan.batch_size)
+        for name, references in blobs.items():
+            StoredBlob.objects.filter(chemin=name).update(references=F("references") + references)
+        pks = [vehicule.pk for vehicule in vehicules]
+        read_model.refresh(pks)
+        search.reindex(pks)
+    return {
+        "vehicules": len(vehicules),
+        "options": len(options),
+        "images": len(images),
+        "documents": len(documents),
+        "demandes": len(contacts),
+        "pieces_jointes": len(fichiers),
+    }
+
+
+def generate_batch_in_worker(plan, index):
+    """Point d'entree pour un pool de processus (initialise Django si besoin)."""
+    import django
+
+    if not apps.ready:
+        django.setup()
+    try:
+        return index, generate_batch(plan, index), None
+    except Exception as exc:  # remonte l'erreur au processus parent
+        return index, {}, str(exc)
+
+
+# ---------- fichiers partages ----------
+
+
+def _pdf(title):
+    """PDF d'une page (texte seul) : assez pour les apercus et le telechargement."""
+    text = title.encode("latin-1", "replace")
+    stream = b"BT /F1 18 Tf 72 720 Td (" + text + b") Tj ET"
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        b"<< /Type /Pages /Kids [3 0 R] /Count 1 >>",
+        b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] /Contents 4 0 R "
+        b"/Resources << /Font << /F1 5 0 R >> >> >>",
+        b"<< /Length %d >>\nstream\n" % len(stream) + stream + b"\nendstream",
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+    ]
+    out = BytesIO()
+    out.write(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(out.tell())
+        out.write(b"%d 0 obj\n" % number + body + b"\nendobj\n")
+    xref = out.tell()
+    out.write(b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1))
+    for offset in offsets:
+        out.write(b"%010d 00000 n \n" % offset)
+    out.write(b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref))
+    return out.getvalue()
+
+
+def _jpeg():
+    from PIL import Image
+
+    out = BytesIO()
+    Image.new("RGB", (640, 480), (24, 24, 27)).save(out, format="JPEG", quality=80)
+    return out.getvalue()
+
+
+def _shared_files(documents, contacts):
+    """Blobs references par les lignes generees (une reference chacun, rendue par release())."""
+    storage = blob_storage()
+    document_files = ()
+    if documents:
+        from documents.models import DocumentVehicule
+
+        document_files = tuple(
+            (value, storage.save(f"{value}.pdf", ContentFile(_pdf(f"Luxora Motors - {label}"))))
+            for value, label in DocumentVehicule.TYPE_CHOICES
+        )
+    attachment_files = ()
+    if contacts:
+        attachment_files = (
+            storage.save("piece_jointe.pdf", ContentFile(_pdf("Luxora Motors - piece jointe"))),
+            storage.save("photo.jpg", ContentFile(_jpeg())),
+        )
+    return document_files, attachment_files
+
+
+def _release(plan):
+    storage = blob_storage()
+    for name in [name for _, name in plan.document_files] + list(plan.attachment_files):
+        storage.delete(name)
+
+
+# ---------- generation ----------
+
+
+def generate(
+    count,
+    seed=0,
+    *,
+    options=4,
+    images=3,
+    documents=None,
+    contacts=0,
+    attachments=2,
+    batch_size=1000,
+    workers=1,
+    progress=None,
+    errors=None,
+):
+    """Ajoute ``count`` vehicules synthetiques (et ``contacts`` demandes de contact) ;
+    retourne {table: lignes creees}.
+
+    ``documents`` : documents par vehicule (defaut : un de chaque type, 0 sans
+    l'application documents). ``progress(totaux, lots faits, lots)`` est appele
+    apres chaque lot, ``errors(numero du lot, message)`` en cas d'echec d'un lot ;
+    sans ``errors``, le premier lot en echec leve BatchError.
+    """
+    if not _documents_installed():
+        documents = 0
+    elif documents is None:
+        from documents.models import DocumentVehicule
+
+        documents = len(DocumentVehicule.TYPE_CHOICES)
+    document_files, attachment_files = _shared_files(documents, contacts and attachments)
+    plan = Plan(
+        seed=seed,
+        count=count,
+        options=options,
+        images=images,
+        documents=documents,
+        contacts=contacts,
+        attachments=attachments,
+        batch_size=batch_size,
+        document_files=document_files,
+        attachment_files=attachment_files,
+    )
+    totals = Counter()
+    done = 0
+
+    def collect(index, counts, error):
+        nonlocal done
+        done += 1
+        if error:
+            if errors is None:
+                raise BatchError(f"Lot {index} : {error}")
+            errors(index, error)
+        totals.update(counts)
+        if progress:
+            progress(totals, done, plan.batches)
+
+    try:
+        if workers > 1 and plan.batches > 1:
+            # Les processus fils ne doivent pas heriter de la connexion ouverte
+            connections.close_all()
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                futures = [pool.submit(generate_batch_in_worker, plan, index) for index in range(plan.batches)]
+                try:
+                    for future in as_completed(futures):
+                        collect(*future.result())
+                except BaseException:
+                    for future in futures:
+                        future.cancel()
+                    raise
+        else:
+            for index in range(plan.batches):
+                collect(index, generate_batch(plan, index), None)
+    finally:
+        _release(plan)
+        if totals:
+            catalogue.bump_version()
+    return dict(totals)
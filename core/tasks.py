@@ -0,0 +1,26 @@
+"""Taches de fond de core (file core.jobs, worker `manage.py run_jobs`)."""
+
+from . import catalogue, contact, images, jobs, mirror, scanning
+
+
+@jobs.task("images.derivatives")
+def generate_image_derivatives(name, force=False):
+    if images.generate_derivatives(name, force=force):
+        # Cartes et fiches mises en cache avant les declinaisons : sans srcset
+        catalogue.bump_version()
+
+
+@jobs.task("mirror.pending", max_attempts=1)
+def mirror_pending_images():
+    # Les echecs sont deja retentes par entree (MIRROR_MAX_ATTEMPTS)
+    mirror.mirror_pending()
+
+
+@jobs.task("blobs.scan", max_attempts=10)
+def scan_blob(chemin):
+    scanning.scan_blob(chemin)
+
+
+@jobs.task("contact.notify")
+def notify_contact_request(pk):
+    contact.notify_staff(pk)
@@ -1,5 +1,14 @@
-"""Filtres template personnalisés (format nombre avec espaces pour milliers)."""
+"""Filtres template personnalisés (format nombre avec espaces pour milliers, images responsives, bundles statiques)."""
 from django import template
+from django.conf import settings
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.core.files.storage import default_storage
+from django.forms.utils import flatatt
+from django.templatetags.static import static
+from django.utils.html import format_html, format_html_join
+
+from core import mirror
+from core.images import available_derivatives
 
 register = template.Library()
 
@@ -27,3 +36,67 @@ def intspace(value):
     if s:
         parts.append(s)
     return sign + " ".join(reversed(parts))
+
+
+def _image_source(image):
+    """(nom dans le stockage ou None, stockage, URL) d'un ImageField ou d'une URL externe.
+
+    Une URL externe copiee localement (core.mirror) est remplacee par sa copie.
+    """
+    if isinstance(image, str):
+        name = mirror.local_name(image)
+        if name:
+            return name, default_storage, default_storage.url(name)
+        return None, None, image
+    return image.name, image.storage, image.url
+
+
+@register.simple_tag
+def responsive_img(image, alt="", sizes="100vw", **attrs):
+    """<img> d'un ImageField ou d'une URL externe, avec srcset/sizes vers ses déclinaisons.
+
+    Usage : {% responsive_img v.image_principale v.titre sizes="33vw" loading="lazy" %}
+    """
+    if not image:
+        return ""
+    name, storage, url = _image_source(image)
+    derivatives = available_derivatives(name, storage) if name else []
+    if derivatives:
+        attrs["srcset"] = ", ".join(f"{url} {width}w" for width, url in derivatives)
+        attrs["sizes"] = sizes
+    return format_html('<img src="{}" alt="{}"{}>', url, alt, flatatt(attrs))
+
+
+@register.filter
+def derivative_url(image, width):
+    """URL de la plus petite déclinaison d'au moins ``width`` px, sinon de l'original."""
+    if not image:
+        return ""
+    name, storage, url = _image_source(image)
+    if name:
+        for w, derivative in available_derivatives(name, storage):
+            if w >= int(width):
+                return derivative
+    return url
+
+
+@register.filter
+def placeholder_url(text, size):
+    """Image de remplacement (copiée localement comme les autres images externes)."""
+    return mirror.placeholder_url(text, size)
+
+
+@register.simple_tag
+def static_bundle(name):
+    """Balises <link>/<script> d'un bundle de STATIC_BUNDLES.
+
+    Apres collectstatic (hors DEBUG) : le fichier unique, minifie et hache ;
+    sinon ses fichiers sources un par un.
+    """
+    built = not settings.DEBUG and name in getattr(staticfiles_storage, "hashed_files", {})
+    urls = [static(name)] if built else [static(src) for src in settings.STATIC_BUNDLES[name]]
+    if name.endswith(".css"):
+        html = '<link rel="stylesheet" href="{}">'
+    else:
+        html = '<script src="{}"></script>'
+    return format_html_join("\n  ", html, ((url,) for url in urls))
@@ -0,0 +1,37 @@
+"""Import du catalogue : ids du fichier et doublons dans un lot."""
+
+from django.test import TestCase
+
+from . import catalogue_io
+from .models import Vehicule
+
+VEHICULE = {
+    "titre": "Roma", "marque": "ferrari", "modele": "Roma", "annee": 2022, "kilometrage": 1000,
+    "prix": 200000, "puissance_ch": 620, "moteur": "V8",
+}
+
+
+class ImportIdsTests(TestCase):
+    def test_duplicate_id_in_batch_reported_as_row_error(self):
+        records = [
+            (1, {**VEHICULE, "id": 900}),
+            (2, {**VEHICULE, "id": 900, "titre": "Roma Spider"}),
+            (3, {**VEHICULE, "id": 901, "annee": "abc"}),  # invalide : l'id reste libre
+            (4, {**VEHICULE, "id": 901}),
+            (5, VEHICULE),
+        ]
+        stats = catalogue_io.import_records(records, batch_size=10)
+
+        self.assertEqual(stats.crees, 3)
+        self.assertEqual([number for number, _ in sorted(stats.erreurs)], [2, 3])
+        self.assertIn("id 900 en double", dict(stats.erreurs)[2])
+        self.assertEqual(Vehicule.objects.get(pk=900).titre, "Roma")
+        self.assertTrue(Vehicule.objects.filter(pk=901).exists())
+        self.assertEqual(Vehicule.objects.count(), 3)
+
+    def test_duplicate_id_in_later_batch_updates(self):
+        records = [(1, {**VEHICULE, "id": 900}), (2, {**VEHICULE, "id": 900, "titre": "Roma Spider"})]
+        stats = catalogue_io.import_records(records, batch_size=1)
+
+        self.assertEqual((stats.crees, stats.mis_a_jour, stats.erreurs), (1, 1, []))
+        self.assertEqual(Vehicule.objects.get(pk=900).titre, "Roma Spider")
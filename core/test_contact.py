@@ -0,0 +1,81 @@
+"""Vue contact asynchrone : pieces jointes et verification CSRF."""
+
+import asyncio
+import shutil
+import tempfile
+from unittest import mock
+
+from django.conf import settings
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import AsyncClient, TestCase, override_settings
+from django.urls import reverse
+
+from .contact import AttachmentUploadHandler
+from .models import Job, RendezVous, RendezVousFichier, StoredBlob
+
+
+@override_settings(
+    ROOT_URLCONF="core.urls_public",
+    TAILSCALE_ADMIN_REQUIRED=False,
+    CSRF_COOKIE_NAME="csrftoken",
+    JOBS_EAGER=False,
+)
+class ContactViewTests(TestCase):
+    def setUp(self):
+        self.media = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media, ignore_errors=True)
+        settings_override = override_settings(MEDIA_ROOT=self.media)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+    async def test_post_with_attachments_and_csrf(self):
+        client = AsyncClient(enforce_csrf_checks=True)
+        url = reverse("contact")
+        await client.get(url)
+        token = client.cookies[settings.CSRF_COOKIE_NAME].value
+
+        loops = []
+        receive = AttachmentUploadHandler.receive_data_chunk
+
+        def spy(handler, raw_data, start):
+            try:
+                loops.append(asyncio.get_running_loop())
+            except RuntimeError:
+                loops.append(None)
+            return receive(handler, raw_data, start)
+
+        data = {
+            "csrfmiddlewaretoken": token,
+            "nom": "Durand",
+            "prenom": "Lea",
+            "email": "lea@example.com",
+            "telephone": "0600000000",
+            "raison": "vendre",
+            "message": "Estimation",
+            "fichiers": [
+                SimpleUploadedFile("devis.pdf", b"%PDF-1.4 devis"),
+                SimpleUploadedFile("photo.jpg", b"\xff\xd8\xff photo"),
+            ],
+        }
+        with mock.patch.object(AttachmentUploadHandler, "receive_data_chunk", spy):
+            response = await client.post(url, data)
+
+        self.assertEqual(response.status_code, 302)
+        # Analyse du corps (et ecriture des fichiers) hors de la boucle d'evenements
+        self.assertTrue(loops)
+        self.assertEqual(set(loops), {None})
+
+        rdv = await RendezVous.objects.aget(email="lea@example.com")
+        fichiers = [f async for f in RendezVousFichier.objects.filter(rendez_vous=rdv)]
+        self.assertEqual(len(fichiers), 2)
+        self.assertEqual(await StoredBlob.objects.acount(), 2)
+        self.assertTrue(await Job.objects.filter(nom="contact.notify", arguments=[rdv.pk]).aexists())
+
+    async def test_post_without_csrf_token(self):
+        client = AsyncClient(enforce_csrf_checks=True)
+        response = await client.post(
+            reverse("contact"),
+            {"nom": "Durand", "fichiers": [SimpleUploadedFile("devis.pdf", b"%PDF")]},
+        )
+        self.assertEqual(response.status_code, 403)
+        self.assertFalse(await RendezVous.objects.aexists())
@@ -0,0 +1,85 @@
+"""File de taches en base : reservation, nouveaux essais, delai de visibilite."""
+
+from datetime import timedelta
+
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from . import jobs
+from .models import Job
+
+calls = []
+
+
+def _failing(*args):
+    calls.append(args)
+    raise RuntimeError("echec voulu")
+
+
+@override_settings(JOBS_EAGER=False, JOBS_RETRY_DELAY=10, JOBS_VISIBILITY_TIMEOUT=60)
+class JobQueueTests(TestCase):
+    def setUp(self):
+        calls.clear()
+        jobs.task("test.ok")(calls.append)
+        jobs.task("test.failing", max_attempts=3)(_failing)
+        self.addCleanup(jobs.REGISTRY.pop, "test.ok", None)
+        self.addCleanup(jobs.REGISTRY.pop, "test.failing", None)
+
+    def make_available(self, job):
+        Job.objects.filter(pk=job.pk).update(disponible_le=timezone.now() - timedelta(seconds=1))
+
+    def test_unique_enqueue(self):
+        self.assertIsNotNone(jobs.enqueue("test.ok", 1, unique=True))
+        self.assertIsNone(jobs.enqueue("test.ok", 1, unique=True))
+        self.assertIsNotNone(jobs.enqueue("test.ok", 2, unique=True))
+        self.assertEqual(Job.objects.count(), 2)
+
+    def test_job_claimed_once(self):
+        jobs.enqueue("test.ok", 1)
+        job = jobs.claim("worker-a")
+        self.assertEqual((job.statut, job.worker, job.tentatives), ("en_cours", "worker-a", 1))
+        self.assertIsNone(jobs.claim("worker-b"))
+
+        self.assertTrue(jobs.run(job, "worker-a"))
+        self.assertEqual(calls, [1])
+        self.assertEqual(Job.objects.get(pk=job.pk).statut, "termine")
+
+    def test_retry_with_doubled_delay_then_failed(self):
+        with self.assertLogs("core.jobs", "ERROR"):
+            job = jobs.enqueue("test.failing", "x")
+            for attempt, delay in ((1, 10), (2, 20)):
+                self.make_available(job)
+                claimed = jobs.claim("worker-a")
+                self.assertEqual(claimed.tentatives, attempt)
+                before = timezone.now()
+                self.assertFalse(jobs.run(claimed, "worker-a"))
+                job.refresh_from_db()
+                self.assertEqual(job.statut, "en_attente")
+                self.assertIn("echec voulu", job.erreur)
+                wait = (job.disponible_le - before).total_seconds()
+                self.assertAlmostEqual(wait, delay, delta=1)
+                # Pas disponible avant la fin de l'attente
+                self.assertIsNone(jobs.claim("worker-a"))
+
+            self.make_available(job)
+            self.assertFalse(jobs.run(jobs.claim("worker-a"), "worker-a"))
+            job.refresh_from_db()
+            self.assertEqual((job.statut, job.tentatives), ("echec", 3))
+            self.assertEqual(len(calls), 3)
+            self.make_available(job)
+            self.assertIsNone(jobs.claim("worker-a"))
+
+    def test_expired_lock_makes_job_claimable(self):
+        jobs.enqueue("test.ok", 1)
+        lost = jobs.claim("worker-a")
+        self.assertIsNone(jobs.claim("worker-b"))
+
+        Job.objects.filter(pk=lost.pk).update(verrou_expire_le=timezone.now() - timedelta(seconds=1))
+        job = jobs.claim("worker-b")
+        self.assertEqual((job.pk, job.worker, job.tentatives), (lost.pk, "worker-b", 2))
+
+        # Le worker disparu ne peut plus ecrire le resultat
+        self.assertTrue(jobs.run(lost, "worker-a"))
+        self.assertEqual(Job.objects.get(pk=job.pk).statut, "en_cours")
+        self.assertTrue(jobs.run(job, "worker-b"))
+        self.assertEqual(Job.objects.get(pk=job.pk).statut, "termine")
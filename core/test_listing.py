@@ -0,0 +1,93 @@
+"""Pagination par curseur (keyset) de la liste : encodage, egalites sur la cle
+de tri d'une page a l'autre, curseurs alteres ou invalides."""
+
+import base64
+import json
+from datetime import timedelta
+from decimal import Decimal
+
+from django.test import TestCase
+from django.utils import timezone
+
+from . import listing
+from .listing import ListingFilters
+from .models import Vehicule
+
+
+def _token(values):
+    return base64.urlsafe_b64encode(json.dumps(values).encode()).decode().rstrip("=")
+
+
+class CursorTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        # Beaucoup d'egalites : 3 prix, 2 annees, meme ordre d'affichage et meme date par paire
+        vehicules = Vehicule.objects.bulk_create(
+            Vehicule(
+                titre=f"Vehicule {n}", marque="ferrari", modele="Roma", annee=2020 + n % 2,
+                kilometrage=1000 * (n % 4), prix=Decimal(100000 * (1 + n % 3)), puissance_ch=620,
+                moteur="V8", ordre_affichage=n % 2,
+            )
+            for n in range(11)
+        )
+        now = timezone.now().replace(microsecond=123456)
+        for n, vehicule in enumerate(vehicules):  # created_at : auto_now_add a la creation
+            Vehicule.objects.filter(pk=vehicule.pk).update(created_at=now - timedelta(days=n // 2))
+
+    def pages(self, tri, size=3):
+        filters = ListingFilters(tri=tri)
+        qs = filters.apply(Vehicule.objects.all())
+        seen, cursor = [], None
+        for _ in range(20):
+            items, cursor = listing.get_page(qs, filters, cursor, size=size)
+            seen.extend(item.pk for item in items)
+            if cursor is None:
+                return seen, list(qs.values_list("pk", flat=True))
+        self.fail(f"{tri} : pagination sans fin")
+
+    def test_encode_decode_round_trip(self):
+        vehicule = Vehicule.objects.first()
+        for tri, ordering in listing.SORTS.items():
+            with self.subTest(tri=tri):
+                values = listing.decode_cursor(listing.encode_cursor(vehicule, ordering), ordering)
+                self.assertEqual(values, [getattr(vehicule, field.lstrip("-")) for field in ordering])
+
+    def test_ties_across_pages(self):
+        for tri in listing.SORTS:
+            for size in (1, 3, 4):
+                with self.subTest(tri=tri, size=size):
+                    seen, expected = self.pages(tri, size)
+                    self.assertEqual(seen, expected)  # ni doublon ni trou
+
+    def test_invalid_cursors_ignored(self):
+        ordering = listing.SORTS["prix_asc"]
+        for token in (
+            "",
+            "pas-du-base64!",
+            base64.urlsafe_b64encode(b"pas du json").decode(),
+            _token({"prix": 1}),  # pas une liste
+            _token(["100000"]),  # nombre de valeurs
+            _token(["100000", 3, 4]),
+            _token(["cent mille", 3]),
+            _token(["100000", "3.5"]),
+            _token(["100000", None]),
+            _token([["100000"], 3]),
+        ):
+            with self.subTest(token=token):
+                self.assertIsNone(listing.decode_cursor(token, ordering))
+        self.assertIsNone(listing.decode_cursor(_token([0, "2024-13-45T00:00:00", 1]), listing.SORTS["recent"]))
+
+    def test_invalid_cursor_restarts_at_first_page(self):
+        filters = ListingFilters(tri="prix_asc")
+        qs = filters.apply(Vehicule.objects.all())
+        first = listing.get_page(qs, filters, None, size=3)
+        self.assertEqual(listing.get_page(qs, filters, "x" * 40, size=3), first)
+
+    def test_tampered_cursor_stays_on_sort_key(self):
+        """Un curseur modifie a la main (valeurs valides) reprend juste apres ces valeurs."""
+        filters = ListingFilters(tri="prix_asc")
+        qs = filters.apply(Vehicule.objects.all())
+        items, _ = listing.get_page(qs, filters, _token(["200000", 0]), size=20)
+        self.assertTrue(items)
+        self.assertTrue(all(item.prix >= 200000 for item in items))
+        self.assertEqual([item.pk for item in items], list(qs.filter(prix__gte=200000).values_list("pk", flat=True)))
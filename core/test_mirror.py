@@ -0,0 +1,49 @@
+"""Copie des images externes : schemas acceptes et lecture des copies d'une page."""
+
+from unittest import mock
+
+from django.test import TestCase
+
+from . import catalogue, mirror
+from .models import ImageDistante
+
+
+class FetchSchemeTests(TestCase):
+    def test_non_http_schemes_refused_before_opening(self):
+        opener = mock.Mock()
+        for url in ("file:///etc/passwd", "ftp://example.com/a.jpg", "data:image/png;base64,AA==", "/media/a.jpg"):
+            with self.subTest(url=url), self.assertRaises(mirror.MirrorError):
+                mirror.fetch(url, opener=opener)
+        opener.open.assert_not_called()
+
+    def test_redirect_to_other_scheme_refused(self):
+        handler = mirror._RedirectHandler()
+        request = mock.Mock(full_url="https://example.com/a.jpg")
+        with self.assertRaises(mirror.MirrorError):
+            handler.redirect_request(request, None, 302, "Found", {}, "file:///etc/passwd")
+
+
+class LocalNamesTests(TestCase):
+    def setUp(self):
+        mirror._local_names.update(version=None, names={})
+        patcher = mock.patch.object(catalogue, "get_version", return_value=1)  # hors mesure
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.copied = [f"https://example.com/{n}.jpg" for n in range(3)]
+        ImageDistante.objects.bulk_create(
+            ImageDistante(url_hash=mirror.url_hash(url), url=url, statut="ok", fichier=f"mirror/{n}.jpg")
+            for n, url in enumerate(self.copied)
+        )
+        ImageDistante.objects.create(url_hash=mirror.url_hash("https://example.com/x.jpg"), url="https://example.com/x.jpg")
+
+    def test_page_urls_loaded_in_one_query(self):
+        urls = [*self.copied[:2], "https://example.com/x.jpg", "https://example.com/inconnue.jpg"]
+        with self.assertNumQueries(1):
+            mirror.local_names(urls)
+        with self.assertNumQueries(0):
+            self.assertEqual(mirror.local_name(self.copied[0]), "mirror/0.jpg")
+            self.assertIsNone(mirror.local_name("https://example.com/x.jpg"))
+            self.assertIsNone(mirror.local_name("https://example.com/inconnue.jpg"))
+        # Hors page : seule cette URL est lue
+        with self.assertNumQueries(1):
+            self.assertEqual(mirror.local_name(self.copied[2]), "mirror/2.jpg")
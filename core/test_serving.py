@@ -0,0 +1,98 @@
+"""Service des media : plages d'octets (suffixe, 416, multipart) et If-Range."""
+
+import shutil
+import tempfile
+from pathlib import Path
+
+from django.test import SimpleTestCase, override_settings
+
+from . import serving
+
+urlpatterns = serving.media_urlpatterns()
+
+CONTENT = bytes(range(256)) * 4
+SIZE = len(CONTENT)
+URL = "/media/videos/accueil.mp4"
+
+
+@override_settings(ROOT_URLCONF=__name__, TAILSCALE_ADMIN_REQUIRED=False, FILE_OFFLOAD="", MEDIA_URL="/media/")
+class MediaRangeTests(SimpleTestCase):
+    def setUp(self):
+        root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, root, ignore_errors=True)
+        path = Path(root, "videos", "accueil.mp4")
+        path.parent.mkdir()
+        path.write_bytes(CONTENT)
+        settings_override = override_settings(MEDIA_ROOT=root)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+    def get(self, **headers):
+        response = self.client.get(URL, headers=headers)
+        body = b"".join(response.streaming_content) if response.streaming else response.content
+        return response, body
+
+    def test_suffix_range(self):
+        response, body = self.get(Range="bytes=-100")
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(response["Content-Range"], f"bytes {SIZE - 100}-{SIZE - 1}/{SIZE}")
+        self.assertEqual(response["Content-Length"], "100")
+        self.assertEqual(body, CONTENT[-100:])
+
+    def test_suffix_longer_than_file(self):
+        response, body = self.get(Range=f"bytes=-{SIZE * 2}")
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(response["Content-Range"], f"bytes 0-{SIZE - 1}/{SIZE}")
+        self.assertEqual(body, CONTENT)
+
+    def test_unsatisfiable_range(self):
+        response, body = self.get(Range=f"bytes={SIZE}-")
+        self.assertEqual(response.status_code, 416)
+        self.assertEqual(response["Content-Range"], f"bytes */{SIZE}")
+        self.assertEqual(body, b"")
+
+    def test_invalid_range_serves_whole_file(self):
+        response, body = self.get(Range="bytes=20-10")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(body, CONTENT)
+
+    def test_overlapping_ranges_merged(self):
+        response, body = self.get(Range="bytes=0-9,5-19")
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(response["Content-Range"], f"bytes 0-19/{SIZE}")
+        self.assertEqual(body, CONTENT[:20])
+
+    def test_multiple_ranges(self):
+        response, body = self.get(Range="bytes=0-9,100-109,-5")
+        self.assertEqual(response.status_code, 206)
+        content_type, _, boundary = response["Content-Type"].partition("; boundary=")
+        self.assertEqual(content_type, "multipart/byteranges")
+        self.assertEqual(int(response["Content-Length"]), len(body))
+
+        parts = body.split(f"--{boundary}".encode())
+        self.assertEqual(parts[0], b"")
+        self.assertEqual(parts[-1], b"--\r\n")
+        expected = [(0, 9), (100, 109), (SIZE - 5, SIZE - 1)]
+        self.assertEqual(len(parts[1:-1]), len(expected))
+        for part, (start, end) in zip(parts[1:-1], expected):
+            head, _, data = part.partition(b"\r\n\r\n")
+            self.assertIn(f"Content-Range: bytes {start}-{end}/{SIZE}".encode(), head)
+            self.assertIn(b"Content-Type: video/mp4", head)
+            self.assertEqual(data, CONTENT[start : end + 1] + b"\r\n")
+
+    def test_if_range_matching_etag(self):
+        etag = self.get()[0]["ETag"]
+        response, body = self.get(Range="bytes=0-9", If_Range=etag)
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(body, CONTENT[:10])
+
+    def test_if_range_mismatch_serves_whole_file(self):
+        response, body = self.get(Range="bytes=0-9", If_Range='"autre-version"')
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn("Content-Range", response)
+        self.assertEqual(body, CONTENT)
+
+    def test_if_range_outdated_date_serves_whole_file(self):
+        response, body = self.get(Range="bytes=0-9", If_Range="Mon, 01 Jan 2001 00:00:00 GMT")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(body, CONTENT)
@@ -0,0 +1,22 @@
+"""Minification CSS des bundles : chaines, url() et commentaires."""
+
+from django.test import SimpleTestCase
+
+from .static_pipeline import minify_css
+
+
+class MinifyCssTests(SimpleTestCase):
+    def test_comment_markers_inside_strings_and_urls_kept(self):
+        self.assertEqual(
+            minify_css('.a::before { content: "/* pas un commentaire */" ; }\n.b { background: url(/img/a/*b.png) ; }'),
+            '.a::before{content: "/* pas un commentaire */"}.b{background: url(/img/a/*b.png)}',
+        )
+
+    def test_quote_inside_comment_does_not_open_string(self):
+        self.assertEqual(minify_css("/* it's */ .c { color : red ; }\n\n.d { margin: 0 }"), ".c{color : red}.d{margin: 0}")
+
+    def test_strings_and_license_comments_preserved(self):
+        self.assertEqual(
+            minify_css("/*! licence */\n.e { font-family: 'Open  Sans' , sans-serif; }"),
+            "/*! licence */ .e{font-family: 'Open  Sans',sans-serif}",
+        )
@@ -0,0 +1,105 @@
+"""Stockage adresse par contenu : nombre de references et suppression physique."""
+
+import os
+import shutil
+import tempfile
+
+from django.apps import apps
+from django.core.files.base import ContentFile
+from django.test import TestCase, override_settings
+
+from .models import RendezVous, RendezVousFichier, StoredBlob, Vehicule
+from .storage import ContentAddressedStorage, blob_storage, file_sha256
+
+
+class ContentAddressedStorageTests(TestCase):
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.root, ignore_errors=True)
+        self.storage = ContentAddressedStorage(location=self.root)
+
+    def test_same_content_shares_one_file(self):
+        first = self.storage.save("devis.pdf", ContentFile(b"meme contenu"))
+        second = self.storage.save("autre.pdf", ContentFile(b"meme contenu"))
+        self.assertEqual(first, second)
+        self.assertEqual(StoredBlob.objects.get(chemin=first).references, 2)
+        blob_dir = os.path.dirname(self.storage.path(first))
+        self.assertEqual(os.listdir(blob_dir), [os.path.basename(first)])
+
+    def test_file_deleted_with_last_reference(self):
+        name = self.storage.save("devis.pdf", ContentFile(b"meme contenu"))
+        self.storage.save("devis.pdf", ContentFile(b"meme contenu"))
+
+        self.storage.delete(name)
+        self.assertTrue(self.storage.exists(name))
+        self.assertEqual(StoredBlob.objects.get(chemin=name).references, 1)
+
+        self.storage.delete(name)
+        self.assertFalse(self.storage.exists(name))
+        self.assertFalse(StoredBlob.objects.filter(chemin=name).exists())
+
+    def test_adopt_known_content_discards_temporary_file(self):
+        name = self.storage.save("photo.jpg", ContentFile(b"image"))
+        fd, tmp = self.storage.temporary_file()
+        with os.fdopen(fd, "wb") as out:
+            out.write(b"image")
+
+        adopted = self.storage.adopt(tmp, sha256=file_sha256(tmp), ext=".jpg")
+
+        self.assertEqual(adopted, name)
+        self.assertFalse(os.path.exists(tmp))
+        self.assertEqual(StoredBlob.objects.get(chemin=name).references, 2)
+        with self.storage.open(name) as fh:
+            self.assertEqual(fh.read(), b"image")
+
+
+class ReplacedFileTests(TestCase):
+    """Fichier remplace sur une ligne existante : l'ancien blob perd sa reference."""
+
+    def setUp(self):
+        root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, root, ignore_errors=True)
+        settings_override = override_settings(MEDIA_ROOT=root)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+    def assertReplaced(self, row, field="fichier"):
+        other = blob_storage().save("autre.pdf", ContentFile(b"ancien"))  # reference partagee
+        with self.captureOnCommitCallbacks(execute=True):
+            setattr(row, field, ContentFile(b"ancien", name="ancien.pdf"))
+            row.save()
+        old = getattr(row, field).name
+        self.assertEqual(old, other)
+        self.assertEqual(StoredBlob.objects.get(chemin=old).references, 2)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            setattr(row, field, ContentFile(b"nouveau", name="nouveau.pdf"))
+            row.save()
+        new = getattr(row, field).name
+        self.assertEqual(StoredBlob.objects.get(chemin=old).references, 1)
+        self.assertEqual(StoredBlob.objects.get(chemin=new).references, 1)
+
+        # Enregistrement sans changement de fichier : references inchangees
+        with self.captureOnCommitCallbacks(execute=True):
+            row.save()
+        self.assertEqual(StoredBlob.objects.get(chemin=new).references, 1)
+
+        blob_storage().delete(old)
+        self.assertFalse(blob_storage().exists(old))
+
+    def test_contact_attachment(self):
+        rdv = RendezVous.objects.create(
+            nom="Durand", prenom="Lea", email="lea@example.com", telephone="0600000000", raison="autre"
+        )
+        self.assertReplaced(RendezVousFichier(rendez_vous=rdv))
+
+    def test_vehicule_document(self):
+        if not apps.is_installed("documents"):
+            self.skipTest("application documents non installee")
+        from documents.models import DocumentVehicule
+
+        vehicule = Vehicule.objects.create(
+            titre="Roma", marque="ferrari", modele="Roma", annee=2022, kilometrage=1000,
+            prix=200000, puissance_ch=620, moteur="V8",
+        )
+        self.assertReplaced(DocumentVehicule(vehicule=vehicule, type_document="facture", titre="Facture"))
@@ -1,3 +1,260 @@
-from django.test import TestCase
+"""Garde-fou N+1 : le nombre de requetes SQL de chaque vue ne doit pas
+dependre du nombre de vehicules.
 
-# Create your tests here.
+Le catalogue est rempli a 1, 10 puis 200 vehicules (options, images,
+documents) ; chaque vue est appelee a chaque taille, caches vides. En cas
+d'ecart, le rapport indique la ligne de template (ou de code) qui emet les
+requetes en trop, par exemple ::
+
+    cms_vehicule_list : 4 requetes (N=1) -> 203 requetes (N=200)
+      +199  cms/vehicule_list.html:38 {{ v.options.count }}
+            SELECT COUNT(*) AS "__count" FROM "core_optionvehicule" WHERE ...
+
+Lancement : ``python manage.py test core`` depuis app-documents (qui installe
+les trois applications) ; sans l'application documents ou sans l'admin (projet
+public), les vues correspondantes sont ignorees.
+"""
+
+import os
+import sys
+from collections import Counter
+from datetime import timedelta
+
+from django.apps import apps
+from django.contrib import admin
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.template.base import Node
+from django.test import TestCase, override_settings
+from django.urls import include, path, reverse
+from django.utils import timezone
+
+from . import catalogue, read_model, search
+from .models import ImageVehicule, OptionVehicule, Vehicule
+
+ADMIN_INSTALLED = apps.is_installed("django.contrib.admin")
+DOCUMENTS_INSTALLED = apps.is_installed("documents")
+
+# Urls des trois projets reunies pour le test (CMS : projets avec l'admin)
+urlpatterns = [path("", include("core.urls_public"))]
+if ADMIN_INSTALLED:
+    urlpatterns += [path("admin/", admin.site.urls), path("", include("core.urls_cms"))]
+if DOCUMENTS_INSTALLED:
+    urlpatterns.append(path("documents/", include("documents.urls")))
+
+SIZES = (1, 10, 200)
+OPTIONS_PAR_VEHICULE = 3
+IMAGES_PAR_VEHICULE = 2
+DOCUMENTS_PAR_VEHICULE = 2
+
+# (libelle, nom d'url, arguments (fonction du premier vehicule), GET, en-tetes)
+PUBLIC_VIEWS = [
+    ("home", "home", None, {}, {}),
+    ("vehicule_list", "vehicule_list", None, {}, {}),
+    ("vehicule_list (ajax)", "vehicule_list", None, {"ajax": "1", "page": "1"}, {"HTTP_X_REQUESTED_WITH": "XMLHttpRequest"}),
+    ("vehicule_list (filtres)", "vehicule_list", None, {"marque": "ferrari", "tri": "prix_asc"}, {}),
+    ("vehicule_list_page", "vehicule_list_page", None, {}, {}),
+    ("vehicule_detail", "vehicule_detail", lambda v: [v.pk], {}, {}),
+    ("recherche", "recherche", None, {"q": "ferrari"}, {}),
+    ("recherche_suggestions", "recherche_suggestions", None, {"q": "fer"}, {}),
+    ("contact", "contact", None, {}, {}),
+]
+CMS_VIEWS = [
+    ("cms_vehicule_list", "cms_vehicule_list", None, {}, {}),
+    ("cms_vehicule_create", "cms_vehicule_create", None, {}, {}),
+    ("cms_vehicule_edit", "cms_vehicule_edit", lambda v: [v.pk], {}, {}),
+    ("cms_vehicule_delete", "cms_vehicule_delete", lambda v: [v.pk], {}, {}),
+    ("admin vehicules", "admin:core_vehicule_changelist", None, {}, {}),
+    ("admin vehicules (recherche)", "admin:core_vehicule_changelist", None, {"q": "ferrari"}, {}),
+]
+DOCUMENTS_VIEWS = [
+    ("cms_document_vehicule_list", "cms_document_vehicule_list", None, {}, {}),
+    ("cms_document_list", "cms_document_list", lambda v: [v.pk], {}, {}),
+    ("cms_document_create", "cms_document_create", lambda v: [v.pk], {}, {}),
+    ("cms_document_batch", "cms_document_batch", lambda v: [v.pk], {}, {}),
+]
+
+MARQUES = [value for value, _ in Vehicule.MARQUES]
+TYPES_DOCUMENT = ["controle_technique", "facture", "carte_grise"]
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _origin():
+    """Ligne de template (noeud le plus profond en cours de rendu) ou, a defaut,
+    premiere ligne du projet qui a emis la requete."""
+    code_line = None
+    frame = sys._getframe(2)
+    while frame is not None:
+        node = frame.f_locals.get("self")
+        if frame.f_code.co_name == "render_annotated" and isinstance(node, Node):
+            token = getattr(node, "token", None)
+            origin = getattr(node, "origin", None)
+            if token is not None and origin is not None:
+                contents = token.contents
+                if token.token_type.name == "VAR":
+                    contents = f"{{{{ {contents} }}}}"
+                elif token.token_type.name == "BLOCK":
+                    contents = f"{{% {contents} %}}"
+                return f"{origin.template_name}:{token.lineno} {contents}"
+        filename = frame.f_code.co_filename
+        if (
+            code_line is None
+            and filename.startswith(PROJECT_ROOT)
+            and filename != __file__
+            and "site-packages" not in filename
+        ):
+            code_line = f"{os.path.relpath(filename, PROJECT_ROOT)}:{frame.f_lineno} ({frame.f_code.co_name})"
+        frame = frame.f_back
+    return code_line or "(hors projet)"
+
+
+class QueryRecorder:
+    """``connection.execute_wrapper`` : chaque requete avec son origine."""
+
+    def __init__(self):
+        self.queries = []
+
+    def __call__(self, execute, sql, params, many, context):
+        self.queries.append((_origin(), sql))
+        return execute(sql, params, many, context)
+
+    def by_origin(self):
+        return Counter(origin for origin, _ in self.queries)
+
+    def example(self, origin):
+        return next(sql for o, sql in self.queries if o == origin)
+
+
+def _report(label, smallest, largest):
+    """Origines dont le nombre de requetes augmente entre la plus petite et la plus grande taille."""
+    (n_min, rec_min), (n_max, rec_max) = smallest, largest
+    lines = [
+        f"{label} : {len(rec_min.queries)} requetes (N={n_min}) -> "
+        f"{len(rec_max.queries)} requetes (N={n_max})"
+    ]
+    before, after = rec_min.by_origin(), rec_max.by_origin()
+    for origin in sorted(set(before) | set(after), key=lambda o: before[o] - after[o]):
+        delta = after[origin] - before[origin]
+        if delta:
+            recorder = rec_max if after[origin] else rec_min
+            lines.append(f"  {delta:+d}  {origin}")
+            lines.append(f"        {recorder.example(origin)[:200]}")
+    return "\n".join(lines)
+
+
+@override_settings(
+    ROOT_URLCONF=__name__,
+    TAILSCALE_ADMIN_REQUIRED=False,
+    # Version du catalogue memorisee jusqu'au prochain bump_version() (seed) :
+    # aucune relecture selon l'horloge pendant les mesures
+    CATALOGUE_VERSION_TTL=3600,
+    JOBS_EAGER=False,
+)
+class QueryCountTests(TestCase):
+    """Nombre de requetes constant par rapport au nombre de vehicules."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.staff = get_user_model().objects.create_user(
+            "staff", password="x", is_staff=True, is_superuser=True
+        )
+
+    def setUp(self):
+        self.client.force_login(self.staff)
+        self.seeded = 0
+
+    def seed(self, total):
+        """Complete le catalogue jusqu'a ``total`` vehicules (insertion en masse)."""
+        now = timezone.now()
+        vehicules = [
+            Vehicule(
+                titre=f"Vehicule {i}",
+                marque=MARQUES[i % len(MARQUES)],
+                modele=f"Modele {i}",
+                annee=2000 + i % 25,
+                kilometrage=1000 * i,
+                prix=50000 + 1000 * i,
+                puissance_ch=300 + i,
+                moteur="V8",
+                description=f"Description du vehicule {i}",
+                image_url=f"https://example.com/vehicules/{i}.jpg",
+                en_vedette=i % 3 == 0,
+                ordre_affichage=i % 5,
+                created_at=now - timedelta(minutes=i),
+            )
+            for i in range(self.seeded, total)
+        ]
+        Vehicule.objects.bulk_create(vehicules)
+        created = list(Vehicule.objects.order_by("pk")[self.seeded : total])
+        OptionVehicule.objects.bulk_create(
+            OptionVehicule(vehicule=v, libelle=f"Option {o}", ordre=o)
+            for v in created
+            for o in range(OPTIONS_PAR_VEHICULE)
+        )
+        ImageVehicule.objects.bulk_create(
+            ImageVehicule(vehicule=v, image_url=f"https://example.com/vehicules/{v.pk}-{o}.jpg", ordre=o)
+            for v in created
+            for o in range(IMAGES_PAR_VEHICULE)
+        )
+        if DOCUMENTS_INSTALLED:
+            from documents.models import DocumentVehicule
+
+            DocumentVehicule.objects.bulk_create(
+                DocumentVehicule(
+                    vehicule=v,
+                    type_document=TYPES_DOCUMENT[d % len(TYPES_DOCUMENT)],
+                    titre=f"Document {d}",
+                    fichier=f"blobs/00/00/{v.pk:064d}.pdf",
+                    uploaded_by=self.staff,
+                )
+                for v in created
+                for d in range(DOCUMENTS_PAR_VEHICULE)
+            )
+        # Ce que font les signaux / l'import pour les insertions en masse
+        read_model.refresh([v.pk for v in created])
+        search.reindex([v.pk for v in created])
+        catalogue.bump_version()
+        self.seeded = total
+
+    def measure(self, views):
+        """{libelle: QueryRecorder} pour la taille actuelle du catalogue."""
+        first = Vehicule.objects.order_by("pk").first()
+        results = {}
+        for label, name, args, params, headers in views:
+            url = reverse(name, args=args(first) if args else None)
+            # Premier appel : index de recherche et autres etats du processus a jour
+            self.client.get(url, params, **headers)
+            cache.clear()
+            recorder = QueryRecorder()
+            with connection.execute_wrapper(recorder):
+                response = self.client.get(url, params, **headers)
+            self.assertLess(response.status_code, 400, f"{label} : HTTP {response.status_code}")
+            results[label] = recorder
+        return results
+
+    def assertConstantQueries(self, views):
+        measures = {}
+        for size in SIZES:
+            self.seed(size)
+            measures[size] = self.measure(views)
+        for label, *_ in views:
+            counts = [len(measures[size][label].queries) for size in SIZES]
+            with self.subTest(view=label):
+                if len(set(counts)) > 1:
+                    self.fail(
+                        "\n" + _report(label, (SIZES[0], measures[SIZES[0]][label]), (SIZES[-1], measures[SIZES[-1]][label]))
+                    )
+
+    def test_public_views(self):
+        self.assertConstantQueries(PUBLIC_VIEWS)
+
+    def test_cms_views(self):
+        if not ADMIN_INSTALLED:
+            self.skipTest("django.contrib.admin non installe (projet public)")
+        self.assertConstantQueries(CMS_VIEWS)
+
+    def test_documents_views(self):
+        if not DOCUMENTS_INSTALLED:
+            self.skipTest("application documents non installee")
+        self.assertConstantQueries(DOCUMENTS_VIEWS)
@@ -5,6 +5,9 @@ from . import views
 urlpatterns = [
     path("", views.home, name="home"),
     path("vehicules/", views.vehicule_list, name="vehicule_list"),
+    path("vehicules/page/", views.vehicule_list_page, name="vehicule_list_page"),
     path("vehicules/<int:pk>/", views.vehicule_detail, name="vehicule_detail"),
+    path("recherche/", views.recherche, name="recherche"),
+    path("recherche/suggestions/", views.recherche_suggestions, name="recherche_suggestions"),
     path("contact/", views.contact, name="contact"),
 ]
@@ -1,148 +1,278 @@
+import functools
+import hashlib
 import json
-import os
+from asgiref.sync import sync_to_async
+from django.conf import settings
 from django.contrib.auth.decorators import login_required, user_passes_test
+from django.core.cache import cache
+from django.db.models import OuterRef, Subquery
+from django.http import HttpResponse, JsonResponse
 from django.shortcuts import render, get_object_or_404, redirect
 from django.contrib import messages
+from django.template.loader import render_to_string
+from django.urls import reverse
+from django.utils.cache import get_conditional_response, patch_cache_control, patch_vary_headers
+from django.utils.http import quote_etag
+from django.views.decorators.cache import cache_control
+from django.views.decorators.csrf import csrf_exempt, csrf_protect
+from django.views.decorators.http import condition
 
-from .models import Vehicule, RendezVous, RendezVousFichier
+from . import catalogue, listing, mirror, search
+from .contact import AttachmentUploadHandler, save_request
+from .listing import ListingFilters
+from .models import Vehicule, VehiculeListing, OptionVehicule, ImageVehicule
 from .forms import (
     VehiculeForm,
     OptionVehiculeFormSet,
     ImageVehiculeFormSet,
     RendezVousForm,
-    CONTACT_ALLOWED_EXTENSIONS,
-    CONTACT_MAX_FILE_SIZE,
-    CONTACT_MAX_FILES,
 )
 
 
+def _load_local_images(vehicules, images=()):
+    """Copies locales (core.mirror) des images externes de la page : une requete au plus."""
+    urls = [url for vehicule in vehicules for url in mirror.vehicule_urls(vehicule)]
+    urls += [image.image_url for image in images if not image.image]
+    mirror.local_names(urls)
+
+
 def home(request):
     """Landing page avec véhicules en vedette."""
-    vedettes = Vehicule.objects.filter(en_vedette=True).prefetch_related("options")[:3]
+    vedettes = cache.get_or_set(
+        catalogue.cache_key("home", "vedettes"),
+        lambda: list(VehiculeListing.objects.filter(en_vedette=True).order_by(*listing.SORTS["recent"])[:3]),
+        settings.CATALOGUE_PARTIAL_CACHE_TTL,
+    )
+    _load_local_images(vedettes)
     return render(request, "core/home.html", {"vedettes": vedettes})
 
 
-def vehicule_list(request):
-    """Liste des véhicules avec filtres (marque, année, prix, kilométrage, tri)."""
-    qs = Vehicule.objects.all().prefetch_related("options")
-
-    # Filtres GET
-    marque = request.GET.getlist("marque")  # plusieurs marques possibles
-    annee_min = request.GET.get("annee_min", "").strip()
-    annee_max = request.GET.get("annee_max", "").strip()
-    prix_min = request.GET.get("prix_min", "").strip()
-    prix_max = request.GET.get("prix_max", "").strip()
-    km_min = request.GET.get("km_min", "").strip()
-    km_max = request.GET.get("km_max", "").strip()
-    tri = request.GET.get("tri", "recent")
-
-    if marque:
-        qs = qs.filter(marque__in=marque)
-    def _parse_int(s):
-        if not s or not isinstance(s, str):
-            return None
-        s = s.strip().replace(" ", "").replace(",", ".").replace("\u202f", "")
-        if not s:
-            return None
-        try:
-            return int(float(s))
-        except (ValueError, TypeError):
-            return None
+def _vehicule_list_cards(request, filters, cursor):
+    """HTML des cartes d'une page + total, en cache par signature de filtres et curseur."""
+    key = listing.cache_key("partial", filters, cursor)
+    cached = cache.get(key)
+    if cached is None:
+        # Table de lecture (core.read_model) : une ligne par carte, sans prefetch
+        qs = filters.apply(VehiculeListing.objects.all())
+        vehicules, next_cursor = listing.get_page(qs, filters, cursor)
+        _load_local_images(vehicules)
+        next_url = None
+        if next_cursor:
+            next_url = f"{reverse('vehicule_list_page')}?{filters.urlencode(after=next_cursor)}"
+        html = render_to_string(
+            "core/vehicule_list_partial.html",
+            {"vehicules": vehicules, "next_url": next_url, "is_next_page": bool(cursor)},
+            request,
+        )
+        cached = (html, listing.cached_count(qs, filters))
+        cache.set(key, cached, settings.CATALOGUE_PARTIAL_CACHE_TTL)
+    return cached
 
-    if annee_min:
-        val = _parse_int(annee_min)
-        if val is not None:
-            qs = qs.filter(annee__gte=val)
-    if annee_max:
-        val = _parse_int(annee_max)
-        if val is not None:
-            qs = qs.filter(annee__lte=val)
-    if prix_min:
-        val = _parse_int(prix_min)
-        if val is not None:
-            qs = qs.filter(prix__gte=val)
-    if prix_max:
-        val = _parse_int(prix_max)
-        if val is not None:
-            qs = qs.filter(prix__lte=val)
-    if km_min:
-        val = _parse_int(km_min)
-        if val is not None:
-            qs = qs.filter(kilometrage__gte=val)
-    if km_max:
-        val = _parse_int(km_max)
-        if val is not None:
-            qs = qs.filter(kilometrage__lte=val)
-
-    if tri == "prix_asc":
-        qs = qs.order_by("prix")
-    elif tri == "prix_desc":
-        qs = qs.order_by("-prix")
-    elif tri == "annee_desc":
-        qs = qs.order_by("-annee")
-    elif tri == "annee_asc":
-        qs = qs.order_by("annee")
-    elif tri == "km_asc":
-        qs = qs.order_by("kilometrage")
-    else:
-        qs = qs.order_by("-ordre_affichage", "-created_at")
 
-    context = {
-        "vehicules": qs,
-        "marques": Vehicule.MARQUES,
-        "filters": {
-            "marque": marque,
-            "annee_min": annee_min,
-            "annee_max": annee_max,
-            "prix_min": prix_min,
-            "prix_max": prix_max,
-            "km_min": km_min,
-            "km_max": km_max,
-            "tri": tri,
-        },
-    }
+def _vehicule_facets(filters):
+    return listing.cached_facets(
+        VehiculeListing.objects.all(), filters, [value for value, _ in Vehicule.MARQUES]
+    )
+
+
+def _vehicule_list_partial_response(request):
+    """Fragment AJAX de la liste, avec ETag : 304 si le navigateur a deja la version courante.
+
+    La premiere page porte aussi les facettes (en-tete X-Facets, JSON).
+    """
+    filters = ListingFilters.from_querydict(request.GET)
+    cursor = request.GET.get("after", "")
+    etag = quote_etag(hashlib.sha1(listing.cache_key("partial", filters, cursor).encode()).hexdigest())
+    response = get_conditional_response(request, etag=etag)
+    if response is None:
+        html, total = _vehicule_list_cards(request, filters, cursor)
+        response = HttpResponse(html)
+        response["X-Total-Count"] = str(total)
+        if not cursor:
+            response["X-Facets"] = json.dumps(_vehicule_facets(filters), separators=(",", ":"))
+    response["ETag"] = etag
+    patch_cache_control(response, no_cache=True)
+    patch_vary_headers(response, ["X-Requested-With"])
+    return response
+
+
+def vehicule_list(request):
+    """Liste des véhicules avec filtres (marque, année, prix, kilométrage, tri), paginée par curseur."""
     is_ajax = (
         request.GET.get("ajax") == "1"
         or request.headers.get("X-Requested-With") == "XMLHttpRequest"
     )
     if is_ajax:
-        return render(request, "core/vehicule_list_partial.html", context)
-    return render(request, "core/vehicule_list.html", context)
+        return _vehicule_list_partial_response(request)
+
+    filters = ListingFilters.from_querydict(request.GET)
+    cards_html, total = _vehicule_list_cards(request, filters, request.GET.get("after", ""))
+    facets = _vehicule_facets(filters)
+    context = {
+        "cards_html": cards_html,
+        "total": total,
+        "marques": [(value, label, facets["marque"][value]) for value, label in Vehicule.MARQUES],
+        "facet_bands": {
+            facet: [
+                (label, low, high, facets[facet][listing.band_key(low, high)])
+                for label, low, high in bands
+            ]
+            for facet, (_, bands) in listing.FACET_BANDS.items()
+        },
+        "filters": {
+            "marque": request.GET.getlist("marque"),
+            "annee_min": request.GET.get("annee_min", "").strip(),
+            "annee_max": request.GET.get("annee_max", "").strip(),
+            "prix_min": request.GET.get("prix_min", "").strip(),
+            "prix_max": request.GET.get("prix_max", "").strip(),
+            "km_min": request.GET.get("km_min", "").strip(),
+            "km_max": request.GET.get("km_max", "").strip(),
+            "tri": request.GET.get("tri", "recent"),
+        },
+    }
+    response = render(request, "core/vehicule_list.html", context)
+    patch_vary_headers(response, ["X-Requested-With"])
+    return response
+
+
+def vehicule_list_page(request):
+    """Page suivante de la liste (défilement infini) : cartes + sentinelle vers la suivante."""
+    return _vehicule_list_partial_response(request)
+
+
+def _vehicule_last_modified(request, pk):
+    """Dernière modification de la fiche : véhicule, ses options et ses images."""
+    key = catalogue.cache_key("vehicule_detail", pk, "last_modified")
+    last_modified = cache.get(key)
+    if last_modified is None:
+        row = (
+            Vehicule.objects.filter(pk=pk)
+            .annotate(
+                options_updated_at=Subquery(
+                    OptionVehicule.objects.filter(vehicule=OuterRef("pk"))
+                    .order_by("-updated_at").values("updated_at")[:1]
+                ),
+                images_updated_at=Subquery(
+                    ImageVehicule.objects.filter(vehicule=OuterRef("pk"))
+                    .order_by("-updated_at").values("updated_at")[:1]
+                ),
+            )
+            .values_list("updated_at", "options_updated_at", "images_updated_at")
+            .first()
+        )
+        if row is None:
+            return None
+        last_modified = max(d for d in row if d is not None)
+        cache.set(key, last_modified, settings.CATALOGUE_PARTIAL_CACHE_TTL)
+    return last_modified
+
+
+@functools.cache
+def _release_token():
+    """Deploiement en cours : RELEASE_ID et hash du manifest des static (fige par processus)."""
+    from django.contrib.staticfiles.storage import staticfiles_storage
+
+    manifest = getattr(staticfiles_storage, "manifest_hash", "")
+    return hashlib.sha1(f"{settings.RELEASE_ID}:{manifest}".encode()).hexdigest()[:12]
+
 
+def _vehicule_etag(request, pk):
+    """Dates du vehicule, version du catalogue et deploiement : tout ce qui change la fiche."""
+    last_modified = _vehicule_last_modified(request, pk)
+    if last_modified is None:
+        return None
+    return f"vehicule-{pk}-{last_modified.timestamp():.6f}-v{catalogue.get_version()}-{_release_token()}"
 
+
+@cache_control(
+    public=True,
+    max_age=settings.VEHICULE_DETAIL_MAX_AGE,
+    s_maxage=settings.VEHICULE_DETAIL_SHARED_MAX_AGE,
+)
+# Pas de Last-Modified : une date ne voit ni la version du catalogue ni un deploiement
+@condition(etag_func=_vehicule_etag)
 def vehicule_detail(request, pk):
-    """Détail d'un véhicule (pas de bouton achat, contact/RDV uniquement)."""
+    """Détail d'un véhicule (pas de bouton achat, contact/RDV uniquement), page entière en cache."""
     from django.templatetags.static import static
 
-    vehicule = get_object_or_404(
-        Vehicule.objects.prefetch_related("options", "images"),
-        pk=pk,
+    key = catalogue.cache_key("vehicule_detail", pk, "html", _vehicule_etag(request, pk))
+    html = cache.get(key)
+    if html is None:
+        vehicule = get_object_or_404(
+            Vehicule.objects.prefetch_related("options", "images"),
+            pk=pk,
+        )
+        marque_image_url = static("img/marque/%s.png" % vehicule.marque)
+        _load_local_images([vehicule], vehicule.images.all())
+        html = render_to_string(
+            "core/vehicule_detail.html",
+            {"vehicule": vehicule, "marque_image_url": marque_image_url},
+            request,
+        )
+        cache.set(key, html, settings.CATALOGUE_PARTIAL_CACHE_TTL)
+    return HttpResponse(html)
+
+
+def recherche(request):
+    """Recherche plein texte (titre, modèle, moteur, description, options), classée par pertinence."""
+    q = request.GET.get("q", "").strip()[: settings.SEARCH_QUERY_MAX_LENGTH]
+    tokens = search.tokenize(q)
+    vehicules = []
+    if tokens:
+        ids = cache.get_or_set(
+            catalogue.cache_key("recherche", " ".join(tokens)),
+            lambda: search.search_ids(q, settings.SEARCH_RESULTS_LIMIT),
+            settings.CATALOGUE_PARTIAL_CACHE_TTL,
+        )
+        by_pk = VehiculeListing.objects.in_bulk(ids)
+        vehicules = [by_pk[pk] for pk in ids if pk in by_pk]
+        _load_local_images(vehicules)
+    cards_html = render_to_string(
+        "core/vehicule_list_partial.html",
+        {"vehicules": vehicules, "next_url": None, "is_next_page": False},
+        request,
     )
-    marque_image_url = static("img/marque/%s.png" % vehicule.marque)
     return render(
         request,
-        "core/vehicule_detail.html",
-        {"vehicule": vehicule, "marque_image_url": marque_image_url},
+        "core/recherche.html",
+        {"q": q, "cards_html": cards_html, "total": len(vehicules), "searched": bool(tokens)},
     )
 
 
-def contact(request):
-    """Page contact avec formulaire de prise de rendez-vous (nom, prénom, mail, tél, raison, message, pièces jointes)."""
+def recherche_suggestions(request):
+    """Autocomplétion (JSON) : véhicules correspondant à la saisie en cours."""
+    q = request.GET.get("q", "").strip()[: settings.SEARCH_QUERY_MAX_LENGTH]
+    suggestions = [
+        {"titre": titre, "url": reverse("vehicule_detail", args=[pk])}
+        for pk, titre in search.suggest(q, settings.SEARCH_SUGGESTIONS_LIMIT)
+    ]
+    response = JsonResponse({"suggestions": suggestions})
+    patch_cache_control(response, public=True, max_age=60)
+    return response
+
+
+@csrf_exempt
+async def contact(request):
+    """Page contact avec formulaire de prise de rendez-vous (nom, prénom, mail, tél, raison, message, pièces jointes).
+
+    Vue asynchrone : les pieces jointes sont ecrites sur disque pendant la lecture
+    de la requete (core.contact), hors de la boucle d'evenements, avant la
+    verification CSRF qui lit alors le formulaire deja analyse.
+    """
+    if request.method == "POST":
+        request.upload_handlers = [AttachmentUploadHandler(request)]
+        await sync_to_async(request._load_post_and_files)()
+    return await _contact(request)
+
+
+@csrf_protect
+async def _contact(request):
     form = RendezVousForm(request.POST or None, request.FILES or None, request=request)
-    if request.method == "POST" and form.is_valid():
-        rdv = form.save()
-        # Enregistrer les pièces jointes (validation déjà faite dans le form)
-        count = 0
-        for f in request.FILES.getlist("fichiers"):
-            if count >= CONTACT_MAX_FILES:
-                break
-            ext = os.path.splitext(getattr(f, "name", "") or "")[1].lower()
-            if ext in CONTACT_ALLOWED_EXTENSIONS and f.size <= CONTACT_MAX_FILE_SIZE:
-                RendezVousFichier.objects.create(rendez_vous=rdv, fichier=f)
-                count += 1
+    if request.method == "POST" and await sync_to_async(form.is_valid)():
+        await sync_to_async(save_request)(form, request.FILES.getlist("fichiers"))
         messages.success(request, "Votre demande de rendez-vous a bien été envoyée. Nous vous recontacterons rapidement.")
         return redirect("contact")
-    return render(request, "core/contact.html", {"form": form})
+    return await sync_to_async(render)(request, "core/contact.html", {"form": form})
 
 
 # ---------- cms (réservé aux utilisateurs staff, connexion via /admin/) ----------
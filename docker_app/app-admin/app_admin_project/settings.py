@@ -16,6 +16,9 @@ LOGIN_REDIRECT_URL = "/cms/"
 SESSION_COOKIE_NAME = "luxora_admin_sessionid"
 CSRF_COOKIE_NAME = "luxora_admin_csrftoken"
 
+# Media servis derriere Tailscale (documents, pieces jointes) : pas de cache partage
+MEDIA_CACHE_CONTROL = "private, no-cache"
+
 TAILSCALE_ADMIN_REQUIRED = os.getenv("TAILSCALE_ADMIN_REQUIRED", "1") in {"1", "true", "True"}
 TAILSCALE_ALLOW_LOCALHOST = os.getenv("TAILSCALE_ALLOW_LOCALHOST", "0") in {"1", "true", "True"}
 TRUST_X_FORWARDED_FOR = os.getenv("TRUST_X_FORWARDED_FOR", "0") in {"1", "true", "True"}
@@ -27,12 +30,15 @@ TAILSCALE_ALLOWED_CLIENT_IPS = [
 TAILSCALE_CLIENTS_FILE = os.getenv(
     "TAILSCALE_CLIENTS_FILE", "/shared/config/allowed_tailscale_ips.txt"
 )
+# Intervalle (s) entre deux verifications du mtime du fichier de liste blanche.
+TAILSCALE_CLIENTS_CACHE_TTL = float(os.getenv("TAILSCALE_CLIENTS_CACHE_TTL", "2"))
 PUBLIC_SITE_URL = os.getenv("PUBLIC_SITE_URL", "http://127.0.0.1:8000")
 PUBLIC_SITE_PORT = os.getenv("PUBLIC_SITE_PORT", "8000")
 PUBLIC_SITE_USE_REQUEST_HOST = os.getenv("PUBLIC_SITE_USE_REQUEST_HOST", "1") in {"1", "true", "True"}
 
 MIDDLEWARE = [
+    "core.middleware.PerfMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "core.middleware.TailscaleAdminMiddleware",
-    *MIDDLEWARE[1:],  # noqa: F405
+    *MIDDLEWARE[2:],  # noqa: F405
 ]
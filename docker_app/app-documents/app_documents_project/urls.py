@@ -1,12 +1,19 @@
 from django.conf import settings
-from django.conf.urls.static import static
 from django.contrib import admin
 from django.urls import include, path
 
+from core import perf, serving
+
 urlpatterns = [
     path("admin/", admin.site.urls),
     path("", include("documents.urls")),
 ]
 
-if settings.DEBUG:
-    urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
+# Percentiles par vue de ce processus (liste blanche Tailscale) : core.perf
+urlpatterns += perf.urlpatterns()
+
+# Statiques et media (plages d'octets, cache, sendfile) : core.serving
+if settings.DEBUG or settings.STATIC_SERVE:
+    urlpatterns += serving.static_urlpatterns()
+if settings.DEBUG or settings.MEDIA_SERVE:
+    urlpatterns += serving.media_urlpatterns()
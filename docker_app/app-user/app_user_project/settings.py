@@ -12,3 +12,7 @@ LOGIN_REDIRECT_URL = "/"
 # Evite les collisions de cookies entre app_user (8000) et app_admin (8001)
 SESSION_COOKIE_NAME = "luxora_user_sessionid"
 CSRF_COOKIE_NAME = "luxora_user_csrftoken"
+
+# Fichiers prives (documents vehicules, pieces jointes du formulaire de contact) :
+# jamais servis par le site public, seulement par admin/documents (Tailscale).
+MEDIA_PRIVATE_PREFIXES = ("vehicules/documents/", "contact_uploads/", "blobs/")
@@ -0,0 +1,53 @@
+"""Configuration gunicorn commune aux 3 apps (mode SERVER_MODE=gunicorn|asgi de serve.sh).
+
+Tout est reglable par variables d'environnement ; les valeurs par defaut
+dimensionnent les workers sur le nombre de CPU du conteneur.
+Rechargement sans coupure : ``docker compose kill -s HUP <service>``.
+"""
+
+import multiprocessing
+import os
+
+
+def _int(name, default):
+    return int(os.getenv(name, default))
+
+
+def _cpu_count():
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return multiprocessing.cpu_count()
+
+
+# Le code partage (config, core, documents) est monte sur /shared
+pythonpath = os.getenv("SHARED_PROJECT_ROOT", "/shared")
+
+bind = os.getenv("GUNICORN_BIND", f"0.0.0.0:{os.getenv('PORT', '8000')}")
+
+# Workers : processus (CPU) ; threads : requetes concurrentes par processus
+# (attente MySQL / disque). gthread garde les connexions keep-alive ouvertes.
+workers = _int("GUNICORN_WORKERS", _cpu_count() * 2 + 1)
+threads = _int("GUNICORN_THREADS", 4)
+worker_class = os.getenv("GUNICORN_WORKER_CLASS", "gthread")
+
+# Une requete bloquee plus de `timeout` s secondes fait redemarrer son worker ;
+# `graceful_timeout` laisse finir les requetes en cours lors d'un HUP/TERM.
+timeout = _int("GUNICORN_TIMEOUT", 30)
+graceful_timeout = _int("GUNICORN_GRACEFUL_TIMEOUT", 30)
+keepalive = _int("GUNICORN_KEEPALIVE", 5)
+
+# Recyclage periodique des workers (fuites memoire), decale pour eviter
+# qu'ils redemarrent tous en meme temps.
+max_requests = _int("GUNICORN_MAX_REQUESTS", 1000)
+max_requests_jitter = _int("GUNICORN_MAX_REQUESTS_JITTER", 100)
+
+# Pas de preload : un HUP recharge alors le code applicatif dans les nouveaux workers.
+preload_app = False
+
+accesslog = os.getenv("GUNICORN_ACCESS_LOG", "-") or None
+errorlog = "-"
+loglevel = os.getenv("GUNICORN_LOG_LEVEL", "info")
+# X-Forwarded-* d'un reverse proxy eventuel ; l'IP cliente reste lue par
+# core.middleware (REMOTE_ADDR), comme sous runserver.
+forwarded_allow_ips = os.getenv("GUNICORN_FORWARDED_ALLOW_IPS", "127.0.0.1")
@@ -0,0 +1,141 @@
+#!/usr/bin/env python
+"""Test de charge minimal (bibliotheque standard uniquement) sur la liste des vehicules.
+
+Exemples :
+    python docker_app/loadtest.py http://127.0.0.1:8000/vehicules/
+    python docker_app/loadtest.py http://127.0.0.1:8000/vehicules/ --xhr -c 32 -n 2000
+    python docker_app/loadtest.py http://127.0.0.1:8000/vehicules/ --compare http://127.0.0.1:9000/vehicules/
+
+Chaque client garde sa connexion ouverte (keep-alive) et enchaine les requetes ;
+le rapport donne debit, latences p50/p95/p99 et erreurs.
+"""
+
+import argparse
+import http.client
+import statistics
+import threading
+import time
+from urllib.parse import urlsplit
+
+
+def _connect(parts, timeout):
+    cls = http.client.HTTPSConnection if parts.scheme == "https" else http.client.HTTPConnection
+    return cls(parts.hostname, parts.port, timeout=timeout)
+
+
+def run(url, concurrency, total, headers, timeout=30.0, warmup=10):
+    parts = urlsplit(url)
+    path = parts.path or "/"
+    if parts.query:
+        path += "?" + parts.query
+
+    latencies = []
+    errors = []
+    lock = threading.Lock()
+    remaining = [total]
+
+    def take():
+        with lock:
+            if remaining[0] <= 0:
+                return False
+            remaining[0] -= 1
+            return True
+
+    def client():
+        conn = _connect(parts, timeout)
+        local = []
+        while take():
+            start = time.perf_counter()
+            try:
+                conn.request("GET", path, headers=headers)
+                response = conn.getresponse()
+                response.read()
+                if response.status >= 400:
+                    errors.append(f"HTTP {response.status}")
+                    continue
+                if response.getheader("Connection", "").lower() == "close":
+                    conn.close()
+                    conn = _connect(parts, timeout)
+            except (OSError, http.client.HTTPException) as exc:
+                errors.append(type(exc).__name__)
+                conn.close()
+                conn = _connect(parts, timeout)
+                continue
+            local.append(time.perf_counter() - start)
+        conn.close()
+        with lock:
+            latencies.extend(local)
+
+    # Chauffe : caches applicatifs, connexions MySQL, workers
+    for _ in range(warmup):
+        conn = _connect(parts, timeout)
+        try:
+            conn.request("GET", path, headers=headers)
+            conn.getresponse().read()
+        except (OSError, http.client.HTTPException):
+            pass
+        finally:
+            conn.close()
+
+    threads = [threading.Thread(target=client) for _ in range(concurrency)]
+    start = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - start
+    return latencies, errors, elapsed
+
+
+def _percentile(values, q):
+    if not values:
+        return 0.0
+    if len(values) == 1:
+        return values[0]
+    return statistics.quantiles(values, n=100, method="inclusive")[q - 1]
+
+
+def report(url, latencies, errors, elapsed):
+    ok = len(latencies)
+    print(url)
+    print(f"  requetes ok   : {ok}  erreurs : {len(errors)}  duree : {elapsed:.2f} s")
+    print(f"  debit         : {ok / elapsed:.1f} req/s")
+    if latencies:
+        print(
+            "  latence (ms)  : "
+            f"p50 {_percentile(latencies, 50) * 1e3:.1f}  "
+            f"p95 {_percentile(latencies, 95) * 1e3:.1f}  "
+            f"p99 {_percentile(latencies, 99) * 1e3:.1f}  "
+            f"max {max(latencies) * 1e3:.1f}"
+        )
+    if errors:
+        print(f"  premieres erreurs : {', '.join(sorted(set(errors))[:5])}")
+    return ok / elapsed if elapsed else 0.0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n", 1)[0])
+    parser.add_argument("url")
+    parser.add_argument("--compare", metavar="URL", help="Seconde cible (ex. runserver vs gunicorn).")
+    parser.add_argument("-c", "--concurrency", type=int, default=16)
+    parser.add_argument("-n", "--requests", type=int, default=1000)
+    parser.add_argument("--xhr", action="store_true", help="Requete AJAX (fragment de liste filtre).")
+    parser.add_argument("--timeout", type=float, default=30.0)
+    args = parser.parse_args()
+
+    headers = {"User-Agent": "luxora-loadtest/1.0"}
+    if args.xhr:
+        headers["X-Requested-With"] = "XMLHttpRequest"
+
+    print(f"{args.requests} requetes, {args.concurrency} clients concurrents\n")
+    results = []
+    for url in filter(None, (args.url, args.compare)):
+        latencies, errors, elapsed = run(url, args.concurrency, args.requests, headers, args.timeout)
+        results.append(report(url, latencies, errors, elapsed))
+        print()
+    if len(results) == 2 and results[0]:
+        print(f"Rapport de debit (2e / 1re cible) : x{results[1] / results[0]:.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,38 @@
+#!/bin/sh
+# Demarrage d'une app Django : migrations puis serveur HTTP.
+# Usage : sh /shared/docker_app/serve.sh <port>
+#
+# SERVER_MODE :
+#   runserver (defaut) : serveur de developpement, rechargement auto du code
+#   gunicorn           : production WSGI (docker_app/gunicorn.conf.py)
+#   asgi               : production ASGI, gunicorn + workers uvicorn (pip install uvicorn)
+set -e
+
+PORT="${1:-${PORT:-8000}}"
+export PORT
+PROJECT="${DJANGO_SETTINGS_MODULE%.settings}"
+CONF="$(dirname "$0")/gunicorn.conf.py"
+
+python manage.py migrate
+
+# Bundles haches + .gz/.br (core.static_pipeline) ; une seule app le fait, STATIC_ROOT est partage
+if [ "${COLLECTSTATIC:-0}" = "1" ]; then
+  python manage.py collectstatic --noinput -v0
+fi
+
+case "${SERVER_MODE:-runserver}" in
+  gunicorn)
+    exec gunicorn -c "$CONF" "$PROJECT.wsgi:application"
+    ;;
+  asgi)
+    exec gunicorn -c "$CONF" -k uvicorn.workers.UvicornWorker "$PROJECT.asgi:application"
+    ;;
+  runserver)
+    # --nostatic : /static/ passe par core.serving (plages d'octets) comme en production
+    exec python manage.py runserver --nostatic "0.0.0.0:$PORT"
+    ;;
+  *)
+    echo "SERVER_MODE inconnu : $SERVER_MODE (runserver, gunicorn, asgi)" >&2
+    exit 1
+    ;;
+esac
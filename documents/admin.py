@@ -1,6 +1,6 @@
 from django.contrib import admin
 
-from .models import DocumentVehicule
+from .models import DocumentVehicule, UploadSession
 
 
 @admin.register(DocumentVehicule)
@@ -15,3 +15,12 @@ class DocumentVehiculeAdmin(admin.ModelAdmin):
         if not change or not obj.uploaded_by_id:
             obj.uploaded_by = request.user
         super().save_model(request, obj, form, change)
+
+
+@admin.register(UploadSession)
+class UploadSessionAdmin(admin.ModelAdmin):
+    list_display = ("nom_original", "vehicule", "statut", "taille", "created_by", "updated_at")
+    list_filter = ("statut",)
+    search_fields = ("nom_original", "vehicule__titre")
+    readonly_fields = ("id", "lot", "sha256", "chemin", "document", "created_at", "updated_at")
+    raw_id_fields = ("vehicule",)
@@ -5,3 +5,6 @@ class DocumentsConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "documents"
     verbose_name = "Documents véhicules"
+
+    def ready(self):
+        from . import signals  # noqa: F401
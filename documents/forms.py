@@ -40,12 +40,39 @@ class DocumentVehiculeForm(forms.ModelForm):
             raise forms.ValidationError("Un fichier est requis.")
         if not fichier:
             return fichier
-        ext = os.path.splitext(getattr(fichier, "name", "") or "")[1].lower()
-        if ext not in DOCUMENT_ALLOWED_EXTENSIONS:
-            raise forms.ValidationError(
-                f"Type non autorise ({ext or 'inconnu'}). "
-                "Autorises : PDF, DOC, DOCX, XLS, XLSX, JPG, PNG, GIF, WEBP."
-            )
-        if fichier.size > DOCUMENT_MAX_FILE_SIZE:
-            raise forms.ValidationError("Fichier trop volumineux (max 25 Mo).")
+        validate_document_file(getattr(fichier, "name", ""), fichier.size)
         return fichier
+
+
+def validate_document_file(name, size):
+    """Extension autorisee et taille maximale (formulaire classique et envoi par morceaux)."""
+    ext = os.path.splitext(name or "")[1].lower()
+    if ext not in DOCUMENT_ALLOWED_EXTENSIONS:
+        raise forms.ValidationError(
+            f"Type non autorise ({ext or 'inconnu'}). "
+            "Autorises : PDF, DOC, DOCX, XLS, XLSX, JPG, PNG, GIF, WEBP."
+        )
+    if size > DOCUMENT_MAX_FILE_SIZE:
+        raise forms.ValidationError("Fichier trop volumineux (max 25 Mo).")
+
+
+class UploadInitForm(forms.Form):
+    """Metadonnees d'un document envoye par morceaux (documents.uploads)."""
+
+    nom = forms.CharField(max_length=255)
+    taille = forms.IntegerField(min_value=1)
+    sha256 = forms.RegexField(regex=r"^[0-9a-fA-F]{64}$")
+    type_document = forms.ChoiceField(choices=DocumentVehicule.TYPE_CHOICES)
+    titre = forms.CharField(max_length=200, required=False)
+    date_document = forms.DateField(required=False)
+    notes = forms.CharField(required=False)
+    lot = forms.UUIDField(required=False)
+
+    def clean_sha256(self):
+        return self.cleaned_data["sha256"].lower()
+
+    def clean(self):
+        cleaned = super().clean()
+        if "nom" in cleaned and "taille" in cleaned:
+            validate_document_file(cleaned["nom"], cleaned["taille"])
+        return cleaned
@@ -0,0 +1,54 @@
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from documents.models import DocumentVehicule
+from documents.previews import generate_preview_in_worker, preview_name, supported
+
+
+class Command(BaseCommand):
+    help = (
+        "Genere les apercus (documents.previews) de tous les documents qui n'en ont "
+        "pas d'a jour, en parallele dans un pool de processus."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+        parser.add_argument("--force", action="store_true", help="Regenere meme les apercus a jour.")
+
+    def handle(self, *args, **options):
+        pks = [
+            pk
+            for pk, name, apercu in DocumentVehicule.objects.exclude(fichier="")
+            .values_list("pk", "fichier", "apercu")
+            .iterator()
+            if supported(name) and (options["force"] or apercu != preview_name(name))
+        ]
+        if not pks:
+            self.stdout.write("Aucun apercu a generer.")
+            return
+        # Les processus fils ne doivent pas heriter de la connexion ouverte
+        connections.close_all()
+
+        start = time.perf_counter()
+        generated = missing = errors = 0
+        with ProcessPoolExecutor(max_workers=options["workers"]) as pool:
+            futures = [pool.submit(generate_preview_in_worker, pk, options["force"]) for pk in pks]
+            for future in as_completed(futures):
+                pk, name, error = future.result()
+                if error:
+                    errors += 1
+                    self.stderr.write(f"Document {pk} : {error}")
+                elif name:
+                    generated += 1
+                else:
+                    missing += 1
+
+        elapsed = time.perf_counter() - start
+        self.stdout.write(self.style.SUCCESS(
+            f"{len(pks)} document(s) traite(s) : {generated} apercu(s), {missing} sans rendu possible, "
+            f"{errors} erreur(s) en {elapsed:.1f} s ({options['workers']} processus)."
+        ))
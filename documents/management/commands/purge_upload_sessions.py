@@ -0,0 +1,21 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+
+from documents.uploads import purge_stale
+
+
+class Command(BaseCommand):
+    help = (
+        "Supprime les envois par morceaux abandonnes (sessions inactives et "
+        "fichiers partiels). A lancer periodiquement (cron)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--hours", type=int, default=48, help="Inactivite minimale avant suppression (defaut : 48 h)."
+        )
+
+    def handle(self, *args, **options):
+        count = purge_stale(timedelta(hours=options["hours"]))
+        self.stdout.write(self.style.SUCCESS(f"{count} envoi(s) abandonne(s) supprime(s)."))
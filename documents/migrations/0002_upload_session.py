@@ -0,0 +1,68 @@
+# Generated by Django 5.2.18 on 2026-10-18 09:36
+
+import django.db.models.deletion
+import uuid
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0013_image_distante'),
+        ('documents', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UploadSession',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('lot', models.UUIDField(blank=True, db_index=True, help_text='Envoi groupe de plusieurs documents.', null=True)),
+                ('type_document', models.CharField(choices=[('controle_technique', 'Contrôle technique'), ('rapport_entretien', "Rapport d'entretien"), ('carte_grise', 'Carte grise'), ('carte_grise_ancienne', 'Ancienne carte grise'), ('facture', 'Facture'), ('garantie', 'Garantie'), ('contrat', 'Contrat / cession'), ('expertise', "Rapport d'expertise"), ('autre', 'Autre')], max_length=40)),
+                ('titre', models.CharField(blank=True, max_length=200)),
+                ('date_document', models.DateField(blank=True, null=True)),
+                ('notes', models.TextField(blank=True)),
+                ('nom_original', models.CharField(max_length=255)),
+                ('taille', models.PositiveBigIntegerField()),
+                ('taille_morceau', models.PositiveIntegerField()),
+                ('sha256', models.CharField(max_length=64)),
+                ('chemin', models.CharField(max_length=255)),
+                ('statut', models.CharField(choices=[('en_cours', 'En cours'), ('termine', 'Terminé'), ('echec', 'Échec')], default='en_cours', max_length=20)),
+                ('erreur', models.CharField(blank=True, max_length=255)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('created_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL)),
+                ('document', models.OneToOneField(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='upload_session', to='documents.documentvehicule')),
+                ('vehicule', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='upload_sessions', to='core.vehicule')),
+            ],
+            options={
+                'verbose_name': 'Envoi par morceaux',
+                'verbose_name_plural': 'Envois par morceaux',
+                'ordering': ['-created_at'],
+            },
+        ),
+        migrations.CreateModel(
+            name='UploadChunk',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('index', models.PositiveIntegerField()),
+                ('taille', models.PositiveIntegerField()),
+                ('sha256', models.CharField(blank=True, max_length=64)),
+                ('received_at', models.DateTimeField(auto_now=True)),
+                ('session', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='morceaux', to='documents.uploadsession')),
+            ],
+            options={
+                'ordering': ['index'],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='uploadsession',
+            index=models.Index(fields=['statut', 'updated_at'], name='uploadsession_statut_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='uploadchunk',
+            constraint=models.UniqueConstraint(fields=('session', 'index'), name='uploadchunk_session_index_uniq'),
+        ),
+    ]
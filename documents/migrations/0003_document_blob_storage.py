@@ -0,0 +1,20 @@
+# Generated by Django 5.2.18 on 2026-10-18 11:05
+
+import core.storage
+import documents.models
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('documents', '0002_upload_session'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='documentvehicule',
+            name='fichier',
+            field=models.FileField(storage=core.storage.blob_storage, upload_to=documents.models.document_upload_to),
+        ),
+    ]
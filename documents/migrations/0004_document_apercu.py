@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 13:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('documents', '0003_document_blob_storage'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='documentvehicule',
+            name='apercu',
+            field=models.CharField(blank=True, editable=False, help_text="Image d'apercu (documents.previews).", max_length=255),
+        ),
+    ]
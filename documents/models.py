@@ -5,6 +5,7 @@ from django.conf import settings
 from django.db import models
 
 from core.models import Vehicule
+from core.storage import blob_storage
 
 
 def document_upload_to(instance, filename):
@@ -37,7 +38,10 @@ class DocumentVehicule(models.Model):
         blank=True,
         help_text="Libelle libre (ex. CT 2024, révision 15 000 km).",
     )
-    fichier = models.FileField(upload_to=document_upload_to)
+    fichier = models.FileField(upload_to=document_upload_to, storage=blob_storage)
+    apercu = models.CharField(
+        max_length=255, blank=True, editable=False, help_text="Image d'apercu (documents.previews)."
+    )
     date_document = models.DateField(
         null=True,
         blank=True,
@@ -70,3 +74,79 @@ class DocumentVehicule(models.Model):
     @property
     def extension(self):
         return os.path.splitext(self.fichier.name)[1].lower()
+
+    @property
+    def apercu_url(self):
+        return self.fichier.storage.url(self.apercu) if self.apercu else ""
+
+
+class UploadSession(models.Model):
+    """Envoi d'un document par morceaux (reprise possible apres coupure).
+
+    Les morceaux sont ecrits directement a leur position dans ``chemin``
+    (emplacement final du fichier) ; la finalisation verifie le SHA-256 puis
+    cree le DocumentVehicule.
+    """
+
+    STATUT_CHOICES = [
+        ("en_cours", "En cours"),
+        ("termine", "Terminé"),
+        ("echec", "Échec"),
+    ]
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    lot = models.UUIDField(null=True, blank=True, db_index=True, help_text="Envoi groupe de plusieurs documents.")
+    vehicule = models.ForeignKey(Vehicule, on_delete=models.CASCADE, related_name="upload_sessions")
+    type_document = models.CharField(max_length=40, choices=DocumentVehicule.TYPE_CHOICES)
+    titre = models.CharField(max_length=200, blank=True)
+    date_document = models.DateField(null=True, blank=True)
+    notes = models.TextField(blank=True)
+    nom_original = models.CharField(max_length=255)
+    taille = models.PositiveBigIntegerField()
+    taille_morceau = models.PositiveIntegerField()
+    sha256 = models.CharField(max_length=64)
+    chemin = models.CharField(max_length=255)
+    statut = models.CharField(max_length=20, choices=STATUT_CHOICES, default="en_cours")
+    erreur = models.CharField(max_length=255, blank=True)
+    document = models.OneToOneField(
+        DocumentVehicule, on_delete=models.SET_NULL, null=True, blank=True, related_name="upload_session"
+    )
+    created_by = models.ForeignKey(
+        settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, blank=True, related_name="+"
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ["-created_at"]
+        verbose_name = "Envoi par morceaux"
+        verbose_name_plural = "Envois par morceaux"
+        indexes = [models.Index(fields=["statut", "updated_at"], name="uploadsession_statut_idx")]
+
+    def __str__(self):
+        return f"{self.nom_original} ({self.get_statut_display()})"
+
+    @property
+    def nb_morceaux(self):
+        return max(1, -(-self.taille // self.taille_morceau))
+
+    def taille_attendue(self, index):
+        """Taille du morceau ``index`` (le dernier peut etre plus court)."""
+        debut = index * self.taille_morceau
+        return max(0, min(self.taille_morceau, self.taille - debut))
+
+
+class UploadChunk(models.Model):
+    """Morceau recu (une ligne par index : ecritures paralleles sans conflit)."""
+
+    session = models.ForeignKey(UploadSession, on_delete=models.CASCADE, related_name="morceaux")
+    index = models.PositiveIntegerField()
+    taille = models.PositiveIntegerField()
+    sha256 = models.CharField(max_length=64, blank=True)
+    received_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ["index"]
+        constraints = [
+            models.UniqueConstraint(fields=["session", "index"], name="uploadchunk_session_index_uniq")
+        ]
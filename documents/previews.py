@@ -0,0 +1,125 @@
+"""Apercus des documents (1re page des PDF, images reduites) pour la grille du CMS.
+
+L'apercu est stocke a cote du fichier : ``blobs/ab/cd/<sha256>__apercu.webp``.
+Le nom du fichier dependant de son contenu (core.storage), un apercu existant
+est toujours a jour ; il n'est regenere que si le fichier change, et partage
+par tous les documents qui referencent le meme fichier.
+
+Rendu des PDF : PyMuPDF (``pip install pymupdf``) s'il est installe, sinon
+``pdftoppm`` (poppler-utils) ; sans l'un ni l'autre, pas d'apercu (icone).
+"""
+
+import logging
+import os
+import shutil
+import subprocess
+import tempfile
+
+from PIL import Image, ImageOps, UnidentifiedImageError
+
+from core.images import FORMATS, derivative_format
+
+logger = logging.getLogger(__name__)
+
+PREVIEW_WIDTH = 240
+PREVIEW_MAX_HEIGHT = 340
+PDF_RENDER_TIMEOUT = 30
+IMAGE_EXTENSIONS = {".jpg", ".jpeg", ".png", ".gif", ".webp"}
+
+
+def supported(name):
+    ext = os.path.splitext(name)[1].lower()
+    return ext == ".pdf" or ext in IMAGE_EXTENSIONS
+
+
+def preview_name(name):
+    root = os.path.splitext(name)[0]
+    return f"{root}__apercu.{FORMATS[derivative_format()][0]}"
+
+
+def _render_pdf(path):
+    """Premiere page en image Pillow, ou None sans moteur de rendu."""
+    try:
+        import fitz  # PyMuPDF
+    except ImportError:
+        fitz = None
+    if fitz is not None:
+        with fitz.open(path) as pdf:
+            page = pdf[0]
+            zoom = 2 * PREVIEW_WIDTH / max(page.rect.width, 1)
+            pixmap = page.get_pixmap(matrix=fitz.Matrix(zoom, zoom), alpha=False)
+            return Image.frombytes("RGB", (pixmap.width, pixmap.height), pixmap.samples)
+
+    pdftoppm = shutil.which("pdftoppm")
+    if pdftoppm is None:
+        return None
+    with tempfile.TemporaryDirectory() as tmp:
+        prefix = os.path.join(tmp, "page")
+        subprocess.run(
+            [pdftoppm, "-f", "1", "-l", "1", "-singlefile", "-png",
+             "-scale-to", str(2 * PREVIEW_WIDTH), path, prefix],
+            check=True,
+            capture_output=True,
+            timeout=PDF_RENDER_TIMEOUT,
+        )
+        with Image.open(prefix + ".png") as image:
+            image.load()
+            return image
+
+
+def _render(path):
+    ext = os.path.splitext(path)[1].lower()
+    if ext == ".pdf":
+        return _render_pdf(path)
+    with Image.open(path) as image:
+        image.seek(0)  # GIF anime : premiere image
+        return ImageOps.exif_transpose(image).copy()
+
+
+def generate_preview(document, force=False):
+    """Cree l'apercu de ``document`` si besoin ; retourne son nom ("" si impossible)."""
+    name = document.fichier.name
+    if not name or not supported(name):
+        return ""
+    storage = document.fichier.storage
+    target = preview_name(name)
+    if force or not storage.exists(target):
+        try:
+            image = _render(storage.path(name))
+        except (OSError, UnidentifiedImageError, subprocess.SubprocessError, ValueError, RuntimeError):
+            logger.warning("Apercu impossible pour %s", name, exc_info=True)
+            image = None
+        if image is None:
+            target = ""
+        else:
+            image.thumbnail((PREVIEW_WIDTH, PREVIEW_MAX_HEIGHT), Image.LANCZOS)
+            fmt = derivative_format()
+            if image.mode not in ("RGB", "RGBA") or (fmt == "JPEG" and image.mode != "RGB"):
+                image = image.convert("RGB")
+            # Ecriture atomique : un lecteur ne voit jamais d'apercu tronque
+            path = storage.path(target)
+            fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path))
+            with os.fdopen(fd, "wb") as out:
+                image.save(out, format=fmt, **FORMATS[fmt][1])
+            os.chmod(tmp, 0o644)
+            os.replace(tmp, path)
+    if document.apercu != target:
+        type(document).objects.filter(pk=document.pk).update(apercu=target)
+        document.apercu = target
+    return target
+
+
+def generate_preview_in_worker(pk, force=False):
+    """Point d'entree pour un pool de processus (initialise Django si besoin)."""
+    import django
+    from django.apps import apps
+
+    if not apps.ready:
+        django.setup()
+    from .models import DocumentVehicule
+
+    try:
+        document = DocumentVehicule.objects.get(pk=pk)
+        return pk, generate_preview(document, force=force), None
+    except Exception as exc:  # remonte l'erreur au processus parent
+        return pk, "", str(exc)
@@ -0,0 +1,34 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from core import jobs
+from core.storage import release_on_commit, release_replaced_on_commit
+
+from . import previews
+from .models import DocumentVehicule
+
+
+@receiver(post_save, sender=DocumentVehicule)
+def queue_document_preview(sender, instance, **kwargs):
+    name = instance.fichier.name
+    if name and previews.supported(name) and instance.apercu != previews.preview_name(name):
+        jobs.enqueue("documents.preview", instance.pk, unique=True)
+
+
+@receiver(post_delete, sender=DocumentVehicule)
+def release_document_file(sender, instance, **kwargs):
+    """Le fichier (core.storage) n'est supprime qu'avec sa derniere reference,
+    y compris lors de la suppression en cascade d'un vehicule."""
+    release_on_commit(instance.fichier)
+    if instance.apercu:
+        transaction.on_commit(lambda: _delete_unused_preview(instance.fichier.storage, instance.apercu))
+
+
+pre_save.connect(release_replaced_on_commit, sender=DocumentVehicule, dispatch_uid="release_replaced_document_file")
+
+
+def _delete_unused_preview(storage, name):
+    # Apercu partage par les documents d'un meme fichier
+    if not DocumentVehicule.objects.filter(apercu=name).exists():
+        storage.delete(name)
@@ -0,0 +1,13 @@
+"""Taches de fond des documents (file core.jobs)."""
+
+from core import jobs
+
+from . import previews
+from .models import DocumentVehicule
+
+
+@jobs.task("documents.preview", max_attempts=2)
+def generate_document_preview(pk):
+    document = DocumentVehicule.objects.filter(pk=pk).first()
+    if document is not None:  # supprime entre-temps
+        previews.generate_preview(document)
@@ -0,0 +1,116 @@
+"""Envoi par morceaux (documents.uploads) : ordre d'arrivee, renvois, sommes de
+controle, reprise apres coupure et reprise de session."""
+
+import hashlib
+import io
+import shutil
+import tempfile
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.files.storage import default_storage
+from django.test import TestCase, override_settings
+
+from core.models import Vehicule
+
+from . import uploads
+from .models import UploadSession
+
+CHUNK_SIZE = 8
+CONTENT = b"%PDF-1.4 facture d'entretien du vehicule\n"  # 6 morceaux, le dernier court
+
+
+class UploadTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = get_user_model().objects.create_user("staff", password="x", is_staff=True)
+        cls.vehicule = Vehicule.objects.create(
+            titre="Roma", marque="ferrari", modele="Roma", annee=2022, kilometrage=1000,
+            prix=200000, puissance_ch=620, moteur="V8",
+        )
+
+    def setUp(self):
+        root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, root, ignore_errors=True)
+        settings_override = override_settings(MEDIA_ROOT=root)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        patcher = mock.patch.object(uploads, "UPLOAD_CHUNK_SIZE", CHUNK_SIZE)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def data(self, content=CONTENT, **extra):
+        return {
+            "nom": "facture.pdf",
+            "taille": len(content),
+            "sha256": hashlib.sha256(content).hexdigest(),
+            "type_document": "facture",
+            "titre": "Facture",
+            **extra,
+        }
+
+    def send(self, session, index, content=CONTENT, sha256=""):
+        chunk = content[index * CHUNK_SIZE : (index + 1) * CHUNK_SIZE]
+        uploads.write_chunk(session, index, io.BytesIO(chunk), len(chunk), sha256)
+
+    def assertDocument(self, session, content=CONTENT):
+        document = uploads.finalize(session, self.user)
+        with document.fichier.open("rb") as fh:
+            self.assertEqual(fh.read(), content)
+        self.assertEqual(UploadSession.objects.get(pk=session.pk).statut, "termine")
+        return document
+
+    def test_chunks_out_of_order_and_repeated(self):
+        session = uploads.create_session(self.vehicule, self.user, self.data())
+        self.assertEqual(session.nb_morceaux, 6)
+        for index in (5, 2, 0, 2, 4, 1, 3, 5):
+            self.send(session, index)
+        self.assertEqual(sorted(uploads.received_indexes(session)), list(range(6)))
+        self.assertDocument(session)
+
+    def test_chunk_checksum_mismatch(self):
+        session = uploads.create_session(self.vehicule, self.user, self.data())
+        with self.assertRaisesMessage(uploads.UploadError, "Somme de controle du morceau 1"):
+            self.send(session, 1, sha256="0" * 64)
+        self.assertEqual(uploads.received_indexes(session), [])
+
+    def test_file_checksum_mismatch(self):
+        session = uploads.create_session(self.vehicule, self.user, self.data(sha256="0" * 64))
+        for index in range(session.nb_morceaux):
+            self.send(session, index)
+        with self.assertRaisesMessage(uploads.UploadError, "Fichier corrompu"):
+            uploads.finalize(session, self.user)
+        session.refresh_from_db()
+        self.assertEqual(session.statut, "echec")
+        self.assertIsNone(session.document)
+        self.assertFalse(default_storage.exists(session.chemin))
+
+    def test_resume_after_interruption(self):
+        session = uploads.create_session(self.vehicule, self.user, self.data())
+        self.send(session, 0)
+        self.send(session, 1)
+        # Connexion coupee au milieu du morceau 2
+        with self.assertRaisesMessage(uploads.UploadError, "Morceau 2 incomplet"):
+            uploads.write_chunk(session, 2, io.BytesIO(CONTENT[16:20]), CHUNK_SIZE)
+        with self.assertRaisesMessage(uploads.UploadError, "manquant"):
+            uploads.finalize(session, self.user)
+
+        resumed = uploads.create_session(self.vehicule, self.user, self.data())
+        self.assertEqual(resumed.pk, session.pk)
+        self.assertEqual(sorted(uploads.received_indexes(resumed)), [0, 1])
+        for index in range(2, resumed.nb_morceaux):
+            self.send(resumed, index)
+        self.assertDocument(resumed)
+
+    def test_session_reused_only_with_same_metadata(self):
+        session = uploads.create_session(self.vehicule, self.user, self.data())
+        other_user = get_user_model().objects.create_user("autre", password="x", is_staff=True)
+        for user, data in [
+            (self.user, self.data(titre="Autre facture")),
+            (self.user, self.data(type_document="carte_grise")),
+            (self.user, self.data(notes="Double")),
+            (other_user, self.data()),
+        ]:
+            with self.subTest(user=user.username, data=data):
+                self.assertNotEqual(uploads.create_session(self.vehicule, user, data).pk, session.pk)
+        self.assertEqual(uploads.create_session(self.vehicule, self.user, self.data()).pk, session.pk)
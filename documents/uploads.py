@@ -0,0 +1,172 @@
+"""Envoi de documents par morceaux : initialisation, ecriture, finalisation.
+
+Le fichier final est cree a sa taille definitive des l'initialisation ;
+chaque morceau y est ecrit a sa position (``os.pwrite``), directement depuis
+le flux de la requete, sans fichier temporaire ni mise en memoire complete.
+Plusieurs morceaux d'un meme fichier peuvent donc arriver en parallele.
+Une fois le SHA-256 verifie, le fichier rejoint le stockage dedoublonne
+(core.storage).
+"""
+
+import hashlib
+import os
+
+from django.core.files.storage import default_storage
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+
+from core.storage import blob_storage, file_sha256
+
+from .models import DocumentVehicule, UploadChunk, UploadSession, document_upload_to
+
+UPLOAD_CHUNK_SIZE = 4 * 1024 * 1024  # 4 Mo
+READ_BLOCK_SIZE = 64 * 1024
+
+
+class UploadError(Exception):
+    """Erreur renvoyee au client (message affichable)."""
+
+
+def _path(session):
+    return default_storage.path(session.chemin)
+
+
+def create_session(vehicule, user, data):
+    """Nouvelle session a partir des donnees validees d'UploadInitForm.
+
+    Une session en cours avec exactement les memes metadonnees (fichier,
+    vehicule, lot, type, titre, date, notes, utilisateur) est reprise plutot
+    que recreee ; le moindre changement ouvre une nouvelle session, pour ne
+    pas creer le document avec les metadonnees d'un autre envoi.
+    """
+    fields = {
+        "vehicule": vehicule,
+        "lot": data.get("lot"),
+        "type_document": data["type_document"],
+        "titre": data.get("titre", ""),
+        "date_document": data.get("date_document"),
+        "notes": data.get("notes", ""),
+        "nom_original": data["nom"],
+        "taille": data["taille"],
+        "sha256": data["sha256"],
+        "created_by": user,
+    }
+    existing = UploadSession.objects.filter(statut="en_cours", **fields).first()
+    if existing is not None:
+        return existing
+
+    session = UploadSession(taille_morceau=UPLOAD_CHUNK_SIZE, **fields)
+    session.chemin = default_storage.get_available_name(document_upload_to(session, data["nom"]))
+    path = _path(session)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    # Reserve l'emplacement final a la bonne taille (fichier creux)
+    with open(path, "xb") as fh:
+        fh.truncate(session.taille)
+    session.save()
+    return session
+
+
+def received_indexes(session):
+    return list(session.morceaux.values_list("index", flat=True))
+
+
+def write_chunk(session, index, stream, content_length, expected_sha256=""):
+    """Ecrit le morceau ``index`` lu depuis ``stream`` ; idempotent (renvoi possible)."""
+    if session.statut != "en_cours":
+        raise UploadError("Envoi deja termine ou abandonne.")
+    if not 0 <= index < session.nb_morceaux:
+        raise UploadError("Index de morceau invalide.")
+    expected = session.taille_attendue(index)
+    if content_length != expected:
+        raise UploadError(f"Taille du morceau {index} : {content_length} octets recus, {expected} attendus.")
+
+    digest = hashlib.sha256()
+    offset = index * session.taille_morceau
+    written = 0
+    fd = os.open(_path(session), os.O_WRONLY)
+    try:
+        while written < expected:
+            block = stream.read(min(READ_BLOCK_SIZE, expected - written))
+            if not block:
+                break
+            digest.update(block)
+            view = memoryview(block)
+            while view:
+                n = os.pwrite(fd, view, offset + written)
+                view = view[n:]
+                written += n
+    finally:
+        os.close(fd)
+    if written != expected:
+        raise UploadError(f"Morceau {index} incomplet ({written}/{expected} octets).")
+    if expected_sha256 and digest.hexdigest() != expected_sha256.lower():
+        raise UploadError(f"Somme de controle du morceau {index} invalide.")
+
+    try:
+        with transaction.atomic():
+            UploadChunk.objects.create(
+                session=session, index=index, taille=written, sha256=digest.hexdigest()
+            )
+    except IntegrityError:
+        # Morceau renvoye (reprise) : les octets ont ete reecrits a l'identique
+        UploadChunk.objects.filter(session=session, index=index).update(sha256=digest.hexdigest())
+    UploadSession.objects.filter(pk=session.pk).update(updated_at=timezone.now())
+
+
+def finalize(session, user):
+    """Verifie morceaux et SHA-256 puis cree le DocumentVehicule."""
+    with transaction.atomic():
+        session = UploadSession.objects.select_for_update().get(pk=session.pk)
+        if session.statut == "termine":
+            return session.document
+        if session.statut != "en_cours":
+            raise UploadError("Envoi abandonne.")
+        missing = set(range(session.nb_morceaux)) - set(received_indexes(session))
+        if missing:
+            raise UploadError(f"{len(missing)} morceau(x) manquant(s).")
+
+        corrupt = file_sha256(_path(session)) != session.sha256
+        if corrupt:
+            session.statut = "echec"
+            session.erreur = "Somme de controle SHA-256 differente."
+            session.save(update_fields=["statut", "erreur", "updated_at"])
+        else:
+            # Fichier deja verifie : rejoint le stockage dedoublonne sans relecture
+            document = DocumentVehicule.objects.create(
+                vehicule=session.vehicule,
+                type_document=session.type_document,
+                titre=session.titre,
+                fichier=blob_storage().adopt(_path(session), session.sha256),
+                date_document=session.date_document,
+                notes=session.notes,
+                uploaded_by=user,
+            )
+            session.document = document
+            session.statut = "termine"
+            session.save(update_fields=["document", "statut", "updated_at"])
+            session.morceaux.all().delete()
+
+    if corrupt:
+        default_storage.delete(session.chemin)
+        raise UploadError("Fichier corrompu (SHA-256 different), envoi a recommencer.")
+    return document
+
+
+def abort(session):
+    """Abandon : supprime le fichier partiel et la session."""
+    if session.statut == "termine":
+        raise UploadError("Envoi deja termine.")
+    default_storage.delete(session.chemin)
+    session.delete()
+
+
+def purge_stale(max_age):
+    """Abandonne les envois inactifs depuis ``max_age`` (timedelta) ; renvoie leur nombre."""
+    stale = UploadSession.objects.filter(
+        statut__in=["en_cours", "echec"], updated_at__lt=timezone.now() - max_age
+    )
+    count = 0
+    for session in stale.iterator():
+        abort(session)
+        count += 1
+    return count
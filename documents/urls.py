@@ -14,5 +14,18 @@ urlpatterns = [
         views.cms_document_create,
         name="cms_document_create",
     ),
+    path(
+        "vehicule/<int:vehicule_pk>/ajouter-lot/",
+        views.cms_document_batch,
+        name="cms_document_batch",
+    ),
     path("<int:pk>/supprimer/", views.cms_document_delete, name="cms_document_delete"),
+    path("vehicule/<int:vehicule_pk>/envois/", views.cms_upload_init, name="cms_upload_init"),
+    path("envois/<uuid:upload_id>/", views.cms_upload_detail, name="cms_upload_detail"),
+    path(
+        "envois/<uuid:upload_id>/morceaux/<int:index>/",
+        views.cms_upload_chunk,
+        name="cms_upload_chunk",
+    ),
+    path("envois/<uuid:upload_id>/terminer/", views.cms_upload_finalize, name="cms_upload_finalize"),
 ]
@@ -1,12 +1,19 @@
+import json
+import uuid
+
 from django.contrib import messages
 from django.contrib.auth.decorators import login_required, user_passes_test
 from django.db.models import Count
+from django.http import HttpResponse, JsonResponse
 from django.shortcuts import get_object_or_404, redirect, render
+from django.urls import reverse
+from django.views.decorators.http import require_http_methods, require_POST
 
 from core.models import Vehicule
 
-from .forms import DocumentVehiculeForm
-from .models import DocumentVehicule
+from . import uploads
+from .forms import DOCUMENT_MAX_FILE_SIZE, DocumentVehiculeForm, UploadInitForm
+from .models import DocumentVehicule, UploadSession
 
 
 def _staff_required(user):
@@ -84,7 +91,7 @@ def cms_document_delete(request, pk):
     document = get_object_or_404(DocumentVehicule.objects.select_related("vehicule"), pk=pk)
     vehicule = document.vehicule
     if request.method == "POST":
-        document.fichier.delete(save=False)
+        # Fichier libere par documents.signals (supprime avec sa derniere reference)
         document.delete()
         messages.success(request, "Document supprime.")
         return redirect("cms_document_list", vehicule_pk=vehicule.pk)
@@ -93,3 +100,106 @@ def cms_document_delete(request, pk):
         "documents/document_confirm_delete.html",
         {"document": document, "vehicule": vehicule},
     )
+
+
+@login_required
+@user_passes_test(_staff_required, login_url="/admin/login/")
+def cms_document_batch(request, vehicule_pk):
+    """Envoi groupe de plusieurs documents, par morceaux en parallele."""
+    vehicule = get_object_or_404(Vehicule, pk=vehicule_pk)
+    return render(
+        request,
+        "documents/document_batch.html",
+        {
+            "vehicule": vehicule,
+            "type_choices": DocumentVehicule.TYPE_CHOICES,
+            "lot": uuid.uuid4(),
+            "max_file_size": DOCUMENT_MAX_FILE_SIZE,
+        },
+    )
+
+
+# API d'envoi par morceaux (documents.uploads), en JSON :
+#   POST   vehicule/<pk>/envois/             -> session (ou reprise d'une session en cours)
+#   GET    envois/<id>/                      -> etat, morceaux deja recus
+#   PUT    envois/<id>/morceaux/<index>/     -> corps brut du morceau (X-Chunk-Sha256 optionnel)
+#   POST   envois/<id>/terminer/             -> verification SHA-256 + DocumentVehicule
+#   DELETE envois/<id>/                      -> abandon
+
+
+def _upload_error(message, status=400, **extra):
+    return JsonResponse({"erreur": message, **extra}, status=status)
+
+
+def _upload_payload(session):
+    return {
+        "id": str(session.pk),
+        "url": reverse("cms_upload_detail", args=[session.pk]),
+        "statut": session.statut,
+        "taille_morceau": session.taille_morceau,
+        "nb_morceaux": session.nb_morceaux,
+        "morceaux_recus": uploads.received_indexes(session),
+    }
+
+
+@login_required
+@user_passes_test(_staff_required, login_url="/admin/login/")
+@require_POST
+def cms_upload_init(request, vehicule_pk):
+    vehicule = get_object_or_404(Vehicule, pk=vehicule_pk)
+    try:
+        data = json.loads(request.body or b"{}")
+    except ValueError:
+        return _upload_error("JSON invalide.")
+    form = UploadInitForm(data)
+    if not form.is_valid():
+        return _upload_error("Donnees invalides.", champs=form.errors)
+    session = uploads.create_session(vehicule, request.user, form.cleaned_data)
+    return JsonResponse(_upload_payload(session), status=201)
+
+
+@login_required
+@user_passes_test(_staff_required, login_url="/admin/login/")
+@require_http_methods(["GET", "DELETE"])
+def cms_upload_detail(request, upload_id):
+    session = get_object_or_404(UploadSession, pk=upload_id)
+    if request.method == "DELETE":
+        try:
+            uploads.abort(session)
+        except uploads.UploadError as exc:
+            return _upload_error(str(exc), status=409)
+        return HttpResponse(status=204)
+    return JsonResponse(_upload_payload(session))
+
+
+@login_required
+@user_passes_test(_staff_required, login_url="/admin/login/")
+@require_http_methods(["PUT"])
+def cms_upload_chunk(request, upload_id, index):
+    session = get_object_or_404(UploadSession, pk=upload_id)
+    try:
+        length = int(request.META.get("CONTENT_LENGTH") or 0)
+    except ValueError:
+        return _upload_error("Content-Length invalide.")
+    try:
+        # Lecture en flux depuis la requete (pas de request.body : ni limite
+        # DATA_UPLOAD_MAX_MEMORY_SIZE ni copie en memoire)
+        uploads.write_chunk(session, index, request, length, request.headers.get("X-Chunk-Sha256", ""))
+    except uploads.UploadError as exc:
+        return _upload_error(str(exc))
+    return JsonResponse({"index": index})
+
+
+@login_required
+@user_passes_test(_staff_required, login_url="/admin/login/")
+@require_POST
+def cms_upload_finalize(request, upload_id):
+    session = get_object_or_404(UploadSession.objects.select_related("vehicule"), pk=upload_id)
+    try:
+        document = uploads.finalize(session, request.user)
+    except uploads.UploadError as exc:
+        return _upload_error(str(exc), status=409)
+    return JsonResponse(
+        {"document": document.pk, "libelle": document.libelle, "url": document.fichier.url},
+        status=201,
+    )
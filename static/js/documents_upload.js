@@ -0,0 +1,273 @@
+(function () {
+  "use strict";
+
+  // ----- Envoi de documents par morceaux (documents.uploads)
+  // SHA-256 du fichier -> session (ou reprise) -> PUT des morceaux manquants,
+  // PARALLEL_CHUNKS a la fois tous fichiers confondus -> finalisation.
+
+  var PARALLEL_CHUNKS = 4;
+  var MAX_RETRIES = 5;
+  var HASH_SLICE = 4 * 1024 * 1024;
+
+  // SHA-256 incremental : crypto.subtle n'existe qu'en contexte securise
+  // (HTTPS / localhost), pas sur l'IP Tailscale en HTTP.
+  var K = new Uint32Array([
+    0x428a2f98, 0x71374491, 0xb5c0fbcf, 0xe9b5dba5, 0x3956c25b, 0x59f111f1, 0x923f82a4, 0xab1c5ed5,
+    0xd807aa98, 0x12835b01, 0x243185be, 0x550c7dc3, 0x72be5d74, 0x80deb1fe, 0x9bdc06a7, 0xc19bf174,
+    0xe49b69c1, 0xefbe4786, 0x0fc19dc6, 0x240ca1cc, 0x2de92c6f, 0x4a7484aa, 0x5cb0a9dc, 0x76f988da,
+    0x983e5152, 0xa831c66d, 0xb00327c8, 0xbf597fc7, 0xc6e00bf3, 0xd5a79147, 0x06ca6351, 0x14292967,
+    0x27b70a85, 0x2e1b2138, 0x4d2c6dfc, 0x53380d13, 0x650a7354, 0x766a0abb, 0x81c2c92e, 0x92722c85,
+    0xa2bfe8a1, 0xa81a664b, 0xc24b8b70, 0xc76c51a3, 0xd192e819, 0xd6990624, 0xf40e3585, 0x106aa070,
+    0x19a4c116, 0x1e376c08, 0x2748774c, 0x34b0bcb5, 0x391c0cb3, 0x4ed8aa4a, 0x5b9cca4f, 0x682e6ff3,
+    0x748f82ee, 0x78a5636f, 0x84c87814, 0x8cc70208, 0x90befffa, 0xa4506ceb, 0xbef9a3f7, 0xc67178f2
+  ]);
+
+  function Sha256() {
+    this.h = new Uint32Array([
+      0x6a09e667, 0xbb67ae85, 0x3c6ef372, 0xa54ff53a, 0x510e527f, 0x9b05688c, 0x1f83d9ab, 0x5be0cd19
+    ]);
+    this.w = new Uint32Array(64);
+    this.buf = new Uint8Array(64);
+    this.bufLen = 0;
+    this.length = 0;
+  }
+
+  Sha256.prototype.compress = function (p, o) {
+    var w = this.w, h = this.h, i;
+    for (i = 0; i < 16; i++) {
+      w[i] = (p[o + 4 * i] << 24) | (p[o + 4 * i + 1] << 16) | (p[o + 4 * i + 2] << 8) | p[o + 4 * i + 3];
+    }
+    for (i = 16; i < 64; i++) {
+      var x = w[i - 15], y = w[i - 2];
+      var s0 = ((x >>> 7) | (x << 25)) ^ ((x >>> 18) | (x << 14)) ^ (x >>> 3);
+      var s1 = ((y >>> 17) | (y << 15)) ^ ((y >>> 19) | (y << 13)) ^ (y >>> 10);
+      w[i] = (w[i - 16] + s0 + w[i - 7] + s1) | 0;
+    }
+    var a = h[0], b = h[1], c = h[2], d = h[3], e = h[4], f = h[5], g = h[6], k = h[7];
+    for (i = 0; i < 64; i++) {
+      var S1 = ((e >>> 6) | (e << 26)) ^ ((e >>> 11) | (e << 21)) ^ ((e >>> 25) | (e << 7));
+      var t1 = (k + S1 + ((e & f) ^ (~e & g)) + K[i] + w[i]) | 0;
+      var S0 = ((a >>> 2) | (a << 30)) ^ ((a >>> 13) | (a << 19)) ^ ((a >>> 22) | (a << 10));
+      var t2 = (S0 + ((a & b) ^ (a & c) ^ (b & c))) | 0;
+      k = g; g = f; f = e; e = (d + t1) | 0; d = c; c = b; b = a; a = (t1 + t2) | 0;
+    }
+    h[0] += a; h[1] += b; h[2] += c; h[3] += d; h[4] += e; h[5] += f; h[6] += g; h[7] += k;
+  };
+
+  Sha256.prototype.update = function (data) {
+    var i = 0, n = data.length;
+    this.length += n;
+    if (this.bufLen) {
+      while (this.bufLen < 64 && i < n) this.buf[this.bufLen++] = data[i++];
+      if (this.bufLen < 64) return;
+      this.compress(this.buf, 0);
+      this.bufLen = 0;
+    }
+    for (; i + 64 <= n; i += 64) this.compress(data, i);
+    while (i < n) this.buf[this.bufLen++] = data[i++];
+  };
+
+  Sha256.prototype.hex = function () {
+    var bits = this.length * 8;
+    var pad = new Uint8Array((this.bufLen < 56 ? 56 : 120) - this.bufLen + 8);
+    var n = pad.length, hi = Math.floor(bits / 0x100000000), lo = bits >>> 0, i;
+    pad[0] = 0x80;
+    for (i = 0; i < 4; i++) {
+      pad[n - 8 + i] = (hi >>> (24 - 8 * i)) & 0xff;
+      pad[n - 4 + i] = (lo >>> (24 - 8 * i)) & 0xff;
+    }
+    this.update(pad);
+    var out = "";
+    for (i = 0; i < 8; i++) out += ("0000000" + this.h[i].toString(16)).slice(-8);
+    return out;
+  };
+
+  function fileSha256(file, onProgress) {
+    var hash = new Sha256();
+    var offset = 0;
+    function next() {
+      if (offset >= file.size) return Promise.resolve(hash.hex());
+      var slice = file.slice(offset, offset + HASH_SLICE);
+      return slice.arrayBuffer().then(function (buffer) {
+        hash.update(new Uint8Array(buffer));
+        offset += buffer.byteLength;
+        onProgress(offset / file.size);
+        return next();
+      });
+    }
+    return next();
+  }
+
+  var form = document.getElementById("cms-batch-form");
+  if (!form) return;
+
+  var input = document.getElementById("batch-files");
+  var typeSelect = document.getElementById("batch-type");
+  var list = document.getElementById("batch-list");
+  var csrfToken = form.querySelector("input[name=csrfmiddlewaretoken]").value;
+  var maxSize = parseInt(form.getAttribute("data-max-size"), 10);
+  var items = [];
+
+  function formatSize(bytes) {
+    return (bytes / 1024 / 1024).toFixed(1).replace(".", ",") + " Mo";
+  }
+
+  function jsonRequest(method, url, body) {
+    return fetch(url, {
+      method: method,
+      credentials: "same-origin",
+      headers: { "Content-Type": "application/json", "X-CSRFToken": csrfToken },
+      body: body ? JSON.stringify(body) : undefined
+    }).then(function (r) {
+      return r.json().then(function (data) {
+        if (!r.ok) throw new Error(data.erreur || ("HTTP " + r.status));
+        return data;
+      });
+    });
+  }
+
+  function setStatus(item, text, state) {
+    item.status.textContent = text;
+    item.row.className = "cms-upload-item" + (state ? " cms-upload-item--" + state : "");
+  }
+
+  function setProgress(item, ratio) {
+    item.bar.style.width = Math.round(ratio * 100) + "%";
+  }
+
+  function renderList() {
+    list.innerHTML = "";
+    items = Array.prototype.map.call(input.files, function (file) {
+      var row = document.createElement("li");
+      row.className = "cms-upload-item";
+      row.innerHTML =
+        '<span class="cms-upload-name"></span>' +
+        '<select class="cms-select cms-upload-type"></select>' +
+        '<span class="cms-upload-status"></span>' +
+        '<span class="cms-upload-progress"><span class="cms-upload-bar"></span></span>';
+      row.querySelector(".cms-upload-name").textContent = file.name + " (" + formatSize(file.size) + ")";
+      var select = row.querySelector(".cms-upload-type");
+      select.innerHTML = typeSelect.innerHTML;
+      select.value = typeSelect.value;
+      list.appendChild(row);
+      var item = {
+        file: file, row: row, select: select,
+        status: row.querySelector(".cms-upload-status"),
+        bar: row.querySelector(".cms-upload-bar"),
+        done: 0, total: 0
+      };
+      if (file.size > maxSize) setStatus(item, "Trop volumineux (max " + formatSize(maxSize) + ")", "error");
+      return item;
+    });
+  }
+
+  function putChunk(item, index, attempt) {
+    var size = item.session.taille_morceau;
+    var blob = item.file.slice(index * size, Math.min((index + 1) * size, item.file.size));
+    return fetch(item.session.url + "morceaux/" + index + "/", {
+      method: "PUT",
+      credentials: "same-origin",
+      headers: { "X-CSRFToken": csrfToken, "Content-Type": "application/octet-stream" },
+      body: blob
+    }).then(function (r) {
+      if (!r.ok) throw new Error("HTTP " + r.status);
+    }).catch(function (err) {
+      if (attempt >= MAX_RETRIES) throw err;
+      // Reprise avec attente croissante (coupure reseau, redemarrage serveur…)
+      return new Promise(function (resolve) {
+        setTimeout(resolve, 500 * Math.pow(2, attempt));
+      }).then(function () { return putChunk(item, index, attempt + 1); });
+    });
+  }
+
+  function prepare(item) {
+    setStatus(item, "Calcul de l'empreinte…");
+    return fileSha256(item.file, function (ratio) { setProgress(item, ratio); })
+      .then(function (sha256) {
+        return jsonRequest("POST", form.getAttribute("data-init-url"), {
+          nom: item.file.name,
+          taille: item.file.size,
+          sha256: sha256,
+          type_document: item.select.value,
+          lot: form.getAttribute("data-lot")
+        });
+      })
+      .then(function (session) {
+        item.session = session;
+        var received = {};
+        session.morceaux_recus.forEach(function (i) { received[i] = true; });
+        item.pending = [];
+        for (var i = 0; i < session.nb_morceaux; i++) {
+          if (!received[i]) item.pending.push(i);
+        }
+        item.total = session.nb_morceaux;
+        item.done = item.total - item.pending.length;
+        setProgress(item, item.done / item.total);
+        setStatus(item, item.done ? "Reprise…" : "Envoi…");
+        return item;
+      });
+  }
+
+  function finalize(item) {
+    setStatus(item, "Vérification…");
+    return jsonRequest("POST", item.session.url + "terminer/").then(function () {
+      setProgress(item, 1);
+      setStatus(item, "Ajouté", "done");
+    });
+  }
+
+  function uploadAll(ready) {
+    // File d'attente commune : les morceaux de tous les fichiers se partagent
+    // PARALLEL_CHUNKS connexions.
+    var queue = [];
+    ready.forEach(function (item) {
+      item.pending.forEach(function (index) { queue.push({ item: item, index: index }); });
+    });
+
+    function worker() {
+      var task = queue.shift();
+      if (!task) return Promise.resolve();
+      var item = task.item;
+      if (item.failed) return worker();
+      return putChunk(item, task.index, 0).then(function () {
+        item.done += 1;
+        setProgress(item, item.done / item.total);
+        if (item.done === item.total) return finalize(item);
+      }).catch(function (err) {
+        item.failed = true;
+        setStatus(item, "Échec : " + err.message + " (renvoyer pour reprendre)", "error");
+      }).then(worker);
+    }
+
+    var workers = [];
+    for (var i = 0; i < PARALLEL_CHUNKS; i++) workers.push(worker());
+    // Fichiers deja entierement recus (reprise) : finalisation directe
+    ready.forEach(function (item) {
+      if (!item.pending.length) workers.push(finalize(item));
+    });
+    return Promise.all(workers);
+  }
+
+  input.addEventListener("change", renderList);
+
+  form.addEventListener("submit", function (e) {
+    e.preventDefault();
+    var todo = items.filter(function (item) {
+      return item.file.size <= maxSize && !item.row.classList.contains("cms-upload-item--done");
+    });
+    if (!todo.length) return;
+    form.classList.add("is-uploading");
+    var ready = [];
+    // Empreintes calculees l'une apres l'autre (CPU), envois en parallele ensuite
+    todo.reduce(function (chain, item) {
+      item.failed = false;
+      return chain.then(function () {
+        return prepare(item).then(function () { ready.push(item); }).catch(function (err) {
+          setStatus(item, "Échec : " + err.message, "error");
+        });
+      });
+    }, Promise.resolve())
+      .then(function () { return uploadAll(ready); })
+      .then(function () { form.classList.remove("is-uploading"); });
+  });
+})();
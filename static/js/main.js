@@ -286,6 +286,77 @@
     });
   }
 
+  // ----- Recherche : autocomplétion (core.search, réponse JSON)
+  document.querySelectorAll(".search-input[data-suggest-url]").forEach(function (input) {
+    var list = document.getElementById(input.getAttribute("aria-controls"));
+    if (!list) return;
+    var timer;
+    var controller = null;
+    var active = -1;
+
+    function close() {
+      list.hidden = true;
+      list.innerHTML = "";
+      active = -1;
+    }
+
+    function render(suggestions) {
+      list.innerHTML = "";
+      active = -1;
+      suggestions.forEach(function (s) {
+        var li = document.createElement("li");
+        li.setAttribute("role", "option");
+        var a = document.createElement("a");
+        a.href = s.url;
+        a.textContent = s.titre;
+        li.appendChild(a);
+        list.appendChild(li);
+      });
+      list.hidden = suggestions.length === 0;
+    }
+
+    function fetchSuggestions() {
+      var q = input.value.trim();
+      if (q.length < 2) {
+        close();
+        return;
+      }
+      if (controller) controller.abort();
+      controller = "AbortController" in window ? new AbortController() : null;
+      fetch(input.getAttribute("data-suggest-url") + "?q=" + encodeURIComponent(q), controller ? { signal: controller.signal } : {})
+        .then(function (r) {
+          if (!r.ok) throw new Error(r.status);
+          return r.json();
+        })
+        .then(function (data) {
+          render(data.suggestions || []);
+        })
+        .catch(function () {});
+    }
+
+    input.addEventListener("input", function () {
+      clearTimeout(timer);
+      timer = setTimeout(fetchSuggestions, 120);
+    });
+    input.addEventListener("keydown", function (e) {
+      var links = list.querySelectorAll("a");
+      if (list.hidden || !links.length) return;
+      if (e.key === "ArrowDown" || e.key === "ArrowUp") {
+        e.preventDefault();
+        active = (active + (e.key === "ArrowDown" ? 1 : -1) + links.length) % links.length;
+        links.forEach(function (a, i) { a.classList.toggle("is-active", i === active); });
+      } else if (e.key === "Enter" && active >= 0) {
+        e.preventDefault();
+        window.location.href = links[active].href;
+      } else if (e.key === "Escape") {
+        close();
+      }
+    });
+    document.addEventListener("click", function (e) {
+      if (!list.contains(e.target) && e.target !== input) close();
+    });
+  });
+
   // ----- Filtres AJAX (page À vendre) — mise à jour dynamique de la grille
   var filtersForm = document.getElementById("filters-form");
   var vehiculesGrid = document.getElementById("vehicules-grid");
@@ -305,6 +376,96 @@
     var baseUrl = (filtersForm.getAttribute("action") || window.location.pathname).replace(/\?.*$/, "").trim();
     if (baseUrl.indexOf("/") !== 0) baseUrl = "/" + baseUrl;
 
+    // ----- Défilement infini : la sentinelle en fin de grille charge la page suivante
+    var vehiculesCount = document.getElementById("vehicules-count");
+    var sentinelObserver = null;
+    var loadingNextPage = false;
+
+    function updateTotal(total) {
+      if (!vehiculesCount || total === null || total === undefined) return;
+      var n = parseInt(total, 10) || 0;
+      vehiculesCount.setAttribute("data-total", n);
+      vehiculesCount.textContent = n + " véhicule" + (n > 1 ? "s" : "");
+    }
+
+    // ----- Facettes : nombre de véhicules par marque / tranche (en-tête X-Facets)
+    function updateFacets(header) {
+      if (!header) return;
+      var facets;
+      try {
+        facets = JSON.parse(header);
+      } catch (e) {
+        return;
+      }
+      filtersForm.querySelectorAll(".filter-facet-count[data-facet]").forEach(function (el) {
+        var counts = facets[el.getAttribute("data-facet")] || {};
+        var n = counts[el.getAttribute("data-key")] || 0;
+        el.textContent = n;
+        var option = el.closest(".filter-dropdown-option");
+        if (option) option.classList.toggle("is-empty", n === 0);
+      });
+      filtersForm.querySelectorAll(".filter-facet[data-facet]").forEach(function (btn) {
+        var counts = facets[btn.getAttribute("data-facet")] || {};
+        var n = counts[btn.getAttribute("data-key")] || 0;
+        var countEl = btn.querySelector(".filter-facet-count");
+        if (countEl) countEl.textContent = n;
+        btn.classList.toggle("is-empty", n === 0);
+      });
+    }
+
+    var facetInputs = { annee: ["f-annee-min", "f-annee-max"], prix: ["f-prix-min", "f-prix-max"], km: ["f-km-min", "f-km-max"] };
+    filtersForm.querySelectorAll(".filter-facet[data-facet]").forEach(function (btn) {
+      btn.addEventListener("click", function () {
+        var ids = facetInputs[btn.getAttribute("data-facet")];
+        if (!ids) return;
+        var minInput = document.getElementById(ids[0]);
+        var maxInput = document.getElementById(ids[1]);
+        // Tranche ouverte : bornes du curseur (ou champ vide pour l'année)
+        if (minInput) minInput.value = btn.getAttribute("data-min") || (minInput.type === "range" ? minInput.min : "");
+        if (maxInput) maxInput.value = btn.getAttribute("data-max") || (maxInput.type === "range" ? maxInput.max : "");
+        if (updatePrixSlider) updatePrixSlider();
+        if (updateKmSlider) updateKmSlider();
+        applyFiltersFromForm();
+      });
+    });
+
+    function loadNextPage(sentinel) {
+      if (loadingNextPage) return;
+      loadingNextPage = true;
+      sentinelObserver.unobserve(sentinel);
+      fetch(sentinel.getAttribute("data-next-url"), { headers: { "X-Requested-With": "XMLHttpRequest" } })
+        .then(function (r) {
+          if (!r.ok) throw new Error(r.status);
+          return r.text();
+        })
+        .then(function (html) {
+          loadingNextPage = false;
+          // Grille remplacée entre-temps par un nouveau filtrage : page obsolète
+          if (!sentinel.isConnected) return;
+          sentinel.insertAdjacentHTML("beforebegin", html);
+          sentinel.remove();
+          observeSentinel();
+        })
+        .catch(function () {
+          loadingNextPage = false;
+        });
+    }
+
+    function observeSentinel() {
+      var sentinel = vehiculesGrid.querySelector(".vehicules-sentinel");
+      if (!sentinel || !("IntersectionObserver" in window)) return;
+      if (!sentinelObserver) {
+        sentinelObserver = new IntersectionObserver(function (entries) {
+          entries.forEach(function (entry) {
+            if (entry.isIntersecting) loadNextPage(entry.target);
+          });
+        }, { rootMargin: "600px 0px" });
+      }
+      sentinelObserver.observe(sentinel);
+    }
+
+    observeSentinel();
+
     function applyFilters(queryString) {
       var sep = queryString && queryString.length ? "?" : "";
       var url = baseUrl + sep + (queryString || "");
@@ -315,11 +476,14 @@
       fetch(url, { headers: { "X-Requested-With": "XMLHttpRequest" } })
         .then(function (r) {
           if (!r.ok) throw new Error(r.status);
+          updateTotal(r.headers.get("X-Total-Count"));
+          updateFacets(r.headers.get("X-Facets"));
           return r.text();
         })
         .then(function (html) {
           vehiculesGrid.innerHTML = html;
           vehiculesSection.classList.remove("is-loading");
+          observeSentinel();
           var cleanQs = (queryString || "").replace(/&?ajax=1&?/g, "").replace(/^&|&$/g, "");
           history.pushState({}, "", cleanQs ? baseUrl + "?" + cleanQs : baseUrl);
         })